@@ -0,0 +1,54 @@
+import mapmakers as m
+from pathlib import Path
+import logging
+import os
+import tempfile
+import time
+
+logging.basicConfig(
+    format="%(asctime)s %(message)s",
+    datefmt="%m/%d/%Y %I:%M:%S %p",
+    level=logging.INFO,
+)
+
+# Compares the size and load time of the Grants Pass workbooks stored as plain
+# .csv, gzip and Zstandard (the latter requires the zstandard package).
+WORKBOOKS = "examples/grants_pass/workbooks"
+RUNS = 5
+
+
+def load_all(paths: list[Path]) -> float:
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        for path in paths:
+            m.Template.from_workbook(str(path))
+    return (time.perf_counter() - start) / RUNS
+
+
+def bench():
+    templates = []
+    for path in sorted(Path(WORKBOOKS).glob("*.csv")):
+        try:
+            templates.append(m.Template.from_workbook(str(path)))
+        except KeyError:
+            logging.info("Skipping empty workbook %s.", path.name)
+    with tempfile.TemporaryDirectory() as dir:
+        for compression in [None, "gz", "zst"]:
+            paths = []
+            for template in templates:
+                path = Path(dir, m.utils.workbook_file(template.name, compression))
+                template.workbook(str(path), named=True)
+                paths.append(path)
+            size = sum(os.path.getsize(path) for path in paths)
+            seconds = load_all(paths)
+            logging.info(
+                "%s: %.2f MB, %.3f s to load %s workbooks",
+                compression or "csv",
+                size / 1_000_000,
+                seconds,
+                len(paths),
+            )
+
+
+if __name__ == "__main__":
+    bench()
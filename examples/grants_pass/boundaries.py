@@ -1,4 +1,5 @@
 import mapmakers as m
+from examples.grants_pass.refs import groups
 from examples.grants_pass.services import Service
 from mapmakers import expand_urls
 import logging
@@ -10,7 +11,7 @@ def plss(t):
     for itm in plss.items:
         itm.visible = True
     # parent group set to invisible
-    return plss.group("PLSS", False)
+    return plss.group("PLSS", False, cache=groups)
 
 
 def boundaries_service():
@@ -36,7 +37,7 @@ def boundaries(t, portal="agol"):
     # set target urls by portal
     boundaries = boundaries_service().urls(portal, boundaries)
     logging.info("Appending PLSS")
-    boundaries = boundaries.layers().append(pls).group("Boundaries")
+    boundaries = boundaries.layers(groups).append(pls).group("Boundaries", cache=groups)
     return boundaries
 
 
@@ -1,11 +1,13 @@
 import mapmakers as m
+from examples.grants_pass.refs import groups
 import logging
 
 
 def business(t):
     lyrs = t.template["business"].into_items()
     lyrs.items[1].visible = True  # set business points to visible
-    return lyrs.group("Economic Development", False)  # set group to invisible
+    # set group to invisible
+    return lyrs.group("Economic Development", False, cache=groups)
 
 
 if __name__ == "__main__":
@@ -1,4 +1,5 @@
 import mapmakers as m
+from examples.grants_pass.refs import groups
 import logging
 
 
@@ -6,7 +7,7 @@ def fema(t):
     lyrs = t.template["fema_flood_wv"].into_items()
     for lyr in lyrs:
         lyr.visible = True
-    return lyrs.group("NFHL (FEMA)", False)
+    return lyrs.group("NFHL (FEMA)", False, cache=groups)
 
 
 def nfhl(t):
@@ -16,29 +17,30 @@ def nfhl(t):
     lyrs.items[6].visible = True  # base flood elevations
     lyrs.items[11].visible = True  # LOMRS
     lyrs.items[12].visible = True  # FIRM panels
-    return lyrs.group("NFHL (local copy)", False)  # parent group not visible
+    # parent group not visible
+    return lyrs.group("NFHL (local copy)", False, cache=groups)
 
 
 def esh(t):
     lyrs = t.template["esh_2025"].into_items()
     lyrs.reverse()
     lyrs.items[8].visible = True  # show main ESH layer only by default
-    return lyrs.group("Essential Salmon Habitat (DSL)", False)
+    return lyrs.group("Essential Salmon Habitat (DSL)", False, cache=groups)
 
 
 def deq(t):
     lyrs = t.template["deq_dw_source"].into_items()
-    lyrs.items[4].visible = True  # Groundwater 2-yr TOT (Zone 1 for Springs)
-    return lyrs.group("Drinking Water Source Areas (DEQ)", False)
+    lyrs.set_visible(["Groundwater 2-yr TOT (Zone 1 for Springs)"], by="title")
+    return lyrs.group("Drinking Water Source Areas (DEQ)", False, cache=groups)
 
 
 def environment(t):
     env = t.template["contours_1ft"].into_items().vector_tiles()
-    wetlands = t.template["wetlands"].into_items().layers()
+    wetlands = t.template["wetlands"].into_items().layers(groups)
     streams = t.template["features"].items["features_1"].into_item().layer()
-    hazards = t.template["hazards"].into_items().layers()
+    hazards = t.template["hazards"].into_items().layers(groups)
     env.extend([wetlands, esh(t), deq(t), streams, nfhl(t), fema(t), hazards])
-    return env.group("Environment")
+    return env.group("Environment", cache=groups)
 
 
 if __name__ == "__main__":
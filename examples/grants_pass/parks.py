@@ -1,4 +1,5 @@
 import mapmakers as m
+from examples.grants_pass.refs import groups
 from mapmakers import expand_urls
 from examples.grants_pass.services import Service
 import logging
@@ -19,10 +20,9 @@ def parks_service():
 
 def parks(t, portal="agol"):
     lyrs = t.template["parks"].into_items()
-    lyrs.items[0].visible = True  # set city parks to visible
-    lyrs.items[2].visible = True  # set county parks to visible
+    lyrs.set_visible(["Parks (City)", "Parks (County)"], by="title")
     lyrs = parks_service().urls(portal, lyrs)
-    return lyrs.group("Parks", False)  # set group to invisible
+    return lyrs.group("Parks", False, cache=groups)  # set group to invisible
 
 
 if __name__ == "__main__":
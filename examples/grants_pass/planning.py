@@ -1,4 +1,5 @@
 import mapmakers as m
+from examples.grants_pass.refs import groups
 from examples.grants_pass.services import Service
 from mapmakers import expand_urls
 import logging
@@ -20,8 +21,8 @@ def historic(t, portal="agol"):
         lyr.visible = True
     # parent group set to invisible
     lyrs = historic_service().urls(portal, lyrs)
-    lyrs = lyrs.layers().insert(2, oprd(t))
-    return lyrs.group("Historic & Cultural Areas", False)
+    lyrs = lyrs.layers(groups).insert(2, oprd(t))
+    return lyrs.group("Historic & Cultural Areas", False, cache=groups)
 
 
 def oprd(t):
@@ -30,7 +31,7 @@ def oprd(t):
     for lyr in lyrs.items:
         lyr.visible = True
 
-    return lyrs.group("Historic Sites (OPRD)", False)
+    return lyrs.group("Historic Sites (OPRD)", False, cache=groups)
 
 
 def agreements_service():
@@ -45,11 +46,13 @@ def agreements_service():
 def agreements(t, portal="agol"):
     lyrs = t.template["agreements"].into_items()
     lyrs = agreements_service().urls(portal, lyrs)
-    return lyrs.group("Agreements & Financial")
+    return lyrs.group("Agreements & Financial", cache=groups)
 
 
 def marijuana(t):
-    return t.template["marijuana"].into_items().group("Marijuana Permitting")
+    return (
+        t.template["marijuana"].into_items().group("Marijuana Permitting", cache=groups)
+    )
 
 
 def adult_use_service():
@@ -64,7 +67,7 @@ def adult_use_service():
 def adult_use(t, portal="agol"):
     adult = t.template["adult_use"].into_items()
     adult = adult_use_service().urls(portal, adult)
-    return adult.group("Adult Use")
+    return adult.group("Adult Use", cache=groups)
 
 
 def zoning_service():
@@ -80,7 +83,7 @@ def zoning(t, portal="agol"):
     lyrs = t.template["zoning"].into_items()
     lyrs.items[1].visible = True
     lyrs = zoning_service().urls(portal, lyrs)
-    return lyrs.group("Zoning Group", False)
+    return lyrs.group("Zoning Group", False, cache=groups)
 
 
 def planning(t, portal="agol"):
@@ -93,9 +96,9 @@ def planning(t, portal="agol"):
     planning = t.template["planning"].into_items()
     planning.items = planning.items[0:5]
     planning.items[4].title = "Lawnridge-Washington Conservation District"
-    planning = planning.layers()
+    planning = planning.layers(groups)
     planning.extend([zon, adult, permit, agr, hist])
-    return planning.group("Planning")
+    return planning.group("Planning", cache=groups)
 
 
 if __name__ == "__main__":
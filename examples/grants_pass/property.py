@@ -1,4 +1,5 @@
 import mapmakers as m
+from examples.grants_pass.refs import groups
 from mapmakers import expand_urls
 from examples.grants_pass.services import Service
 import logging
@@ -25,7 +26,7 @@ def strategic_plan(t):
     plan.items.pop(0)
     for lyr in plan:
         lyr.visible = True
-    return plan.group("Address Strategic Plan", False)
+    return plan.group("Address Strategic Plan", False, cache=groups)
 
 
 def property(t, portal="agol"):
@@ -41,10 +42,10 @@ def property(t, portal="agol"):
             lyrs.items.pop(3)  # verification
         case "gp" | "edit":
             strat = strategic_plan(t)
-            lyrs = lyrs.layers()
+            lyrs = lyrs.layers(groups)
             lyrs.insert(5, strat)
 
-    return lyrs.group("Property", False)
+    return lyrs.group("Property", False, cache=groups)
 
 
 if __name__ == "__main__":
@@ -1,5 +1,5 @@
 import mapmakers as m
-import copy
+from examples.grants_pass.refs import groups
 import logging
 
 
@@ -8,7 +8,7 @@ def public_safety(t, public=False):
     zonehaven.title = "Zonehaven"
     fire = t.template["fire"].into_items()
     fire.items.append(zonehaven)
-    fire = fire.group("Fire").into_layer()
+    fire = fire.group("Fire", cache=groups).into_layer()
     ems = m.Item(
         "https://gis.ecso911.com/server/rest/services/Hosted/EMS_Polygon_View/FeatureServer/0",
         title="EMS Response Zones (ECSO 911)",
@@ -21,15 +21,14 @@ def public_safety(t, public=False):
         "https://gis.ecso911.com/server/rest/services/Hosted/Law_Polygon_View/FeatureServer/0",
         title="Law Enforcement Zone (ECSO 911)",
     )
-    ecso = m.Items([law, fire_zone, ems]).layers()
-    ecso_public = copy.deepcopy(ecso)
+    # each variant builds its own layers from the shared frozen items
+    ecso = m.Items([law, fire_zone, ems]).freeze()
     if public:
-        ecso_public = ecso_public.group("Public Safety")
-        return ecso_public
+        return ecso.group("Public Safety", cache=groups)
     else:
-        ecso.append(fire)
-        ecso = ecso.group("Public Safety")
-        return ecso
+        lyrs = ecso.layers(groups)
+        lyrs.append(fire)
+        return lyrs.group("Public Safety", cache=groups)
 
 
 if __name__ == "__main__":
@@ -1,5 +1,10 @@
+import mapmakers as m
 import logging
 
+# shared by the builders, so that rebuilding the viewer in the same session only
+# rebuilds the groups whose items changed
+groups = m.GroupCache()
+
 templates = {}
 templates.update({"address_editing": "b948c317919d46a09abafcc7a121037b"})
 templates.update({"address_verification": "ee863ea743d94221abe0418b5162f6ef"})
@@ -0,0 +1,39 @@
+import mapmakers as m
+from examples.grants_pass.web_viewer import Target, compose, read_template
+import logging
+
+logging.basicConfig(
+    format="%(asctime)s %(message)s",
+    datefmt="%m/%d/%Y %I:%M:%S %p",
+    level=logging.INFO,
+)
+
+gis = GIS_CONN
+
+# run login.py prior to obtain the gis connection
+#
+# Keeps the workbook and portal session loaded between builds.  From another shell:
+#   curl -X POST localhost:8765/build/public -d '{"target": "<item id>"}'
+#   curl -X POST localhost:8765/build/public  # publishes to the TEST map
+#   curl -X POST localhost:8765/build/internal -d '{"publish": false}'
+#   curl -X POST localhost:8765/build/public -d '{"target": "<item id>", "trim": true, "budget": {"visible": 40}}'
+#   curl -X POST localhost:8765/reload
+
+
+def public(t, portal="agol"):
+    return compose(t, True, portal)
+
+
+def internal(t, portal="agol"):
+    return compose(t, False, portal)
+
+
+if __name__ == "__main__":
+    server = m.BuildServer(
+        {"public": public, "internal": internal},
+        read_template,
+        gis,
+        m.Manifest("examples/grants_pass/manifest.json"),
+        Target.TEST.value,
+    )
+    server.serve()
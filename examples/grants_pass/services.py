@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from mapmakers import expand_urls, Items
+from mapmakers import expand_urls, Items, FrozenItems
 import logging
 import copy
 
@@ -70,6 +70,9 @@ class Service:
 
     def urls(self, portal: str, items: Items) -> Items:
         urls = self.portal(portal)
+        if isinstance(items, FrozenItems):
+            # frozen items are left untouched, a new view with the urls is returned
+            return items.with_url(dict(enumerate(urls)), by="position")
         for i in range(0, len(urls)):
             item = items.items[i]
             logging.info("Item: %s", item.title)
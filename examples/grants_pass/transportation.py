@@ -1,7 +1,7 @@
 import mapmakers as m
+from examples.grants_pass.refs import groups
 from mapmakers import expand_urls
 from examples.grants_pass.services import Service
-import copy
 import logging
 
 
@@ -26,7 +26,7 @@ def parking(t):
     lyrs = t.template["parking"].into_items()
     for lyr in lyrs:
         lyr.visible = True
-    return lyrs.group("Parking", False)
+    return lyrs.group("Parking", False, cache=groups)
 
 
 def fixtures(t, public=False, portal="agol"):
@@ -46,17 +46,17 @@ def fixtures(t, public=False, portal="agol"):
     if public:
         for lyr in fixtures_public:
             lyr.visible = True
-        return fixtures_public.group("Fixtures", False)
+        return fixtures_public.group("Fixtures", False, cache=groups)
     else:
-        fixtures = t.template["transportation_editing"].into_items()
-        fixtures.items.pop(0)
-        # add street lights
-        fixtures.items.insert(2, fixtures_public.items[2])
-        # add traffic signals
-        fixtures.items.insert(4, fixtures_public.items[4])
-        for lyr in fixtures:
-            lyr.visible = True
-        return fixtures.group("Fixtures", False)
+        fixtures = t.template["transportation_editing"].into_items().freeze()
+        fixtures = (
+            fixtures.without([0], by="position")
+            # add street lights
+            .insert(2, fixtures_public.items[2])
+            # add traffic signals
+            .insert(4, fixtures_public.items[4]).with_visible()
+        )
+        return fixtures.group("Fixtures", False, cache=groups)
 
 
 def bike(t, portal="agol"):
@@ -71,7 +71,7 @@ def bike(t, portal="agol"):
     bike.items[0].visible = True  # trails
     bike.items[1].visible = True  # bike lane striping
     bike.items[2].visible = True  # paved bike surfaces
-    return bike.group("Bike | Walk | Ride", False)
+    return bike.group("Bike | Walk | Ride", False, cache=groups)
 
 
 def streets(t, public=False, portal="agol"):
@@ -89,19 +89,20 @@ def streets(t, public=False, portal="agol"):
     urls.agol = agol
     urls.gp = gp
     logging.info("Calling urls for streets.")
-    streets = urls.urls(portal, streets)
-    streets.items[4].visible = True  # make streets (county) visible
-    streets_public = copy.deepcopy(streets)
+    streets = urls.urls(portal, streets.freeze())
+    # make streets (county) visible
+    streets = streets.with_visible([4], by="position")
     if public:
-        return streets_public.group("Streets Group", False)
+        return streets.group("Streets Group", False, cache=groups)
     else:
-        streets.items = streets.items[0:7]
-        streets.items[6] = (
+        # the internal map shares the public layers, swapping in the editing layer
+        editing = (
             t.template["transportation_editing"]
             .items["transportation_editing_0"]
             .into_item()
         )
-        return streets.group("Streets Group", False)
+        streets = streets.without([6, 7], by="position").insert(6, editing)
+        return streets.group("Streets Group", False, cache=groups)
 
 
 def traffic(t):
@@ -110,7 +111,7 @@ def traffic(t):
     lyrs.items = lyrs.items[1:3]
     for lyr in lyrs:
         lyr.visible = True
-    return lyrs.group("Traffic", False)
+    return lyrs.group("Traffic", False, cache=groups)
 
 
 def transportation(t, public=False, portal="agol"):
@@ -119,8 +120,8 @@ def transportation(t, public=False, portal="agol"):
     logging.info("Calling url for transportation.")
     transportation = transport_service().urls(portal, transportation)
     transportation.items = [transportation.items[0]]  # just keep the railroad layer
-    transportation = (
-        transportation.layers()
+    transportation = transportation.layers(
+        groups
     )  # convert to Layers type to extend with more layers
     transportation.extend(
         [  # add sub-groups
@@ -132,7 +133,7 @@ def transportation(t, public=False, portal="agol"):
         ]
     )
 
-    transportation = transportation.group("Transportation")
+    transportation = transportation.group("Transportation", cache=groups)
     return transportation
 
 
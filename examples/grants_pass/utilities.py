@@ -1,4 +1,5 @@
 import mapmakers as m
+from examples.grants_pass.refs import groups
 from mapmakers import expand_urls
 from examples.grants_pass.services import Service
 import logging
@@ -23,7 +24,7 @@ def water(t, portal="agol"):
     seen = [3, 4, 6, 7, 8, 9]
     for item in seen:
         lyrs.items[item].visible = True
-    return lyrs.group("Water Distribution", False)
+    return lyrs.group("Water Distribution", False, cache=groups)
 
 
 def storm_service():
@@ -44,7 +45,7 @@ def storm(t, portal="agol"):
     seen = [2, 3, 4, 5, 7, 8, 9, 10, 11]
     for item in seen:
         lyrs.items[item].visible = True
-    return lyrs.group("Stormwater", False)
+    return lyrs.group("Stormwater", False, cache=groups)
 
 
 def waste_service():
@@ -64,7 +65,7 @@ def sewer(t, portal="agol"):
     show = [4, 5, 6, 7, 8, 9, 11]
     for item in show:
         lyrs.items[item].visible = True
-    return lyrs.group("Wastewater", False)
+    return lyrs.group("Wastewater", False, cache=groups)
 
 
 def power_gas(t):
@@ -72,19 +73,19 @@ def power_gas(t):
     show = [0, 2, 3]
     for item in show:
         lyrs.items[item].visible = True
-    return lyrs.group("Power & Gas (Internal Use Only)", False)
+    return lyrs.group("Power & Gas (Internal Use Only)", False, cache=groups)
 
 
 def impervious(t):
     lyrs = t.template["impervious"].into_items()
     lyrs.items[1].visible = True
-    return lyrs.group("Impervious Surface", False)
+    return lyrs.group("Impervious Surface", False, cache=groups)
 
 
 def as_builts(t):
     lyrs = t.template["as_builts"].into_items()
     lyrs.items[0].visible = True
-    return lyrs.group("As-Builts", False)
+    return lyrs.group("As-Builts", False, cache=groups)
 
 
 def tracker_service():
@@ -101,7 +102,7 @@ def project_tracker(t, portal="agol"):
     lyrs = tracker_service().urls(portal, lyrs)
     for lyr in lyrs:
         lyr.visible = True
-    return lyrs.group("Project Tracker", False)
+    return lyrs.group("Project Tracker", False, cache=groups)
 
 
 def utilities(t, public=False, portal="agol"):
@@ -117,7 +118,7 @@ def utilities(t, public=False, portal="agol"):
     )
     if not public:
         utilities.append(power_gas(t))
-    return utilities.group("Utilities")
+    return utilities.group("Utilities", cache=groups)
 
 
 if __name__ == "__main__":
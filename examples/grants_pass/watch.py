@@ -0,0 +1,58 @@
+import mapmakers as m
+from examples.grants_pass.web_viewer import (
+    Target,
+    aerials,
+    boundaries,
+    business,
+    environment,
+    parks,
+    planning,
+    property,
+    public_safety,
+    transportation,
+    utilities,
+)
+from examples.grants_pass.refs import groups
+from functools import partial
+import logging
+
+logging.basicConfig(
+    format="%(asctime)s %(message)s",
+    datefmt="%m/%d/%Y %I:%M:%S %p",
+    level=logging.INFO,
+)
+
+gis = GIS_CONN
+
+# run login.py prior to obtain the gis connection
+#
+# Reruns the builders that use the edited templates whenever the workbook is
+# saved, and republishes the test map.  The builders share the group cache in
+# refs.py, so only the groups holding edited rows are rebuilt.
+
+
+def publish(layers, target=Target.TEST.value):
+    logging.info("Group cache: %s", groups.counters)
+    m.Map(target, layers, gis).build()
+
+
+if __name__ == "__main__":
+    public = True
+    portal = "agol"
+    watcher = m.Watcher(
+        "examples/grants_pass/workbooks/workbook.csv",
+        {
+            "aerials": aerials,
+            "public_safety": partial(public_safety, public=public),
+            "environment": environment,
+            "parks": partial(parks, portal=portal),
+            "utilities": partial(utilities, public=public, portal=portal),
+            "transportation": partial(transportation, public=public, portal=portal),
+            "business": business,
+            "planning": partial(planning, portal=portal),
+            "property": partial(property, portal=portal),
+            "boundaries": partial(boundaries, portal=portal),
+        },
+        publish,
+    )
+    watcher.watch()
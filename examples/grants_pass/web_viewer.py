@@ -1,6 +1,6 @@
 import mapmakers as m
 import logging
-from examples.grants_pass.refs import templates
+from examples.grants_pass.refs import groups, templates
 from examples.grants_pass.boundaries import boundaries
 from examples.grants_pass.economy import business
 from examples.grants_pass.environment import environment
@@ -40,7 +40,7 @@ def workbook():
 
 
 def sketch(t):
-    return t.template["sketch"].into_items().group("Sketch Editing")
+    return t.template["sketch"].into_items().group("Sketch Editing", cache=groups)
 
 
 # def street_imagery(t):
@@ -54,26 +54,35 @@ def aerials(t):
     imagery.items[
         len(imagery.items) - 1
     ].visible = True  # Top-most aerial is the most recent.
-    imagery = imagery.rasters().group("Aerials", False)
+    imagery = imagery.rasters().group("Aerials", False, cache=groups)
     return imagery
 
 
+def compose(t, public=True, portal="agol", workers=None):
+    # the subsystem builders are independent, so they run side by side
+    graph = m.BuildGraph(workers)
+    graph.add("aerials", aerials, t)
+    graph.add("public_safety", public_safety, t, public)
+    if not public:
+        graph.add("sketch", sketch, t)
+    graph.add("environment", environment, t)
+    graph.add("parks", parks, t, portal)
+    graph.add("utilities", utilities, t, public, portal)
+    graph.add("transportation", transportation, t, public, portal)
+    graph.add("business", business, t)
+    graph.add("planning", planning, t, portal)
+    graph.add("property", property, t, portal)
+    graph.add("boundaries", boundaries, t, portal)
+    layers = list(graph.run().values())
+    graph.report()
+    logging.info("Slowest builder: %s", graph.slowest)
+    logging.info("Group cache: %s", groups.counters)
+    return layers
+
+
 def build(target=Target.TEST.value, public=True, portal="agol"):
     t = read_template()
-    layers = [
-        aerials(t),
-        public_safety(t, public),
-        environment(t),
-        parks(t, portal),
-        utilities(t, public, portal),
-        transportation(t, public, portal),
-        business(t),
-        planning(t, portal),
-        property(t, portal),
-        boundaries(t, portal),
-    ]
-    if not public:
-        layers.insert(2, sketch(t))
+    layers = compose(t, public, portal)
     mp = m.Map(
         target,
         layers,
@@ -86,22 +95,8 @@ def build(target=Target.TEST.value, public=True, portal="agol"):
 
 def internal_build(target=Target.TEST.value, public=False, portal="agol"):
     t = read_template()
-    layers = [
-        aerials(t),
-        # removed (its getting old)
-        # street_imagery(t),
-        public_safety(t, public),
-        environment(t),
-        parks(t, portal),
-        utilities(t, public, portal),
-        transportation(t, public, portal),
-        business(t),
-        planning(t, portal),
-        property(t, portal),
-        boundaries(t, portal),
-    ]
-    if not public:
-        layers.insert(2, sketch(t))
+    # street_imagery removed (its getting old)
+    layers = compose(t, public, portal)
     mp = m.Map(
         target,
         layers,
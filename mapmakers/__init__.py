@@ -1,3 +1,20 @@
-from .map import Map, Layer, Layers, Group, Item, Items
+from .cache import CachedItem, GroupCache, ItemCache, get_cache, set_cache
+from .catalog import Catalog
+from .graph import BuildGraph
+from .scheduler import Scheduler, get_scheduler, set_scheduler
+from .search import SearchRegistry
+from .manifest import Manifest
+from .optimize import (
+    BudgetExceeded,
+    assign_reduction,
+    assign_scales,
+    check_search,
+    load_cost,
+    trim_definition,
+)
+from .map import Map, Layer, Layers, Group, Item, Items, FrozenItem, FrozenItems
 from .template import TemplateItem, Template, Templates
-from .utils import create_layer_id, expand_urls
+from .store import TemplateStore
+from .serve import BuildServer
+from .watch import Watcher
+from .utils import content_hash, create_layer_id, definition_hash, expand_urls
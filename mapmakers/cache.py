@@ -0,0 +1,439 @@
+from dataclasses import dataclass
+from pathlib import Path
+from mapmakers.scheduler import Scheduler, get_scheduler
+import arcgis
+from arcgis.gis import GIS
+import copy
+import json
+import logging
+import os
+import threading
+import time
+
+
+# item properties saved with each definition on disk, enough to read the definition in a later session
+HANDLE_FIELDS = ["id", "modified", "type", "title", "owner"]
+
+
+@dataclass(frozen=True, slots=True)
+class CachedItem:
+    """
+    The ``CachedItem`` class stands in for a portal item whose definition was read from the on-disk cache of an ``ItemCache``, holding the item properties saved with the definition.  It is returned by *ItemCache.get* with *data_only* set, so that reading a template does not contact the portal.
+    """
+
+    id: str
+    modified: int | None = None
+    type: str | None = None
+    title: str | None = None
+    owner: str | None = None
+    _gis: object = None
+
+    def get_data(self) -> dict:
+        """
+        The *get_data* method fetches the definition of the item from the portal, used if the cached definition has since been evicted.
+
+        :return: The JSON definition of the item.
+        :rtype: dict
+        """
+        host = Scheduler.host(getattr(self._gis, "url", None))
+        item = get_scheduler().call(host, self._gis.content.get, self.id)
+        return item.get_data()
+
+
+@dataclass
+class ItemCache:
+    """
+    The ``ItemCache`` class memoizes portal item handles for the current session, and optionally stores web map definitions on disk so they can be reused across sessions.  The id, modification time, type, title and owner of each item are stored with its definition, so a later session can read a fresh definition without contacting the portal.
+    """
+
+    _items: dict[tuple, arcgis.gis.Item]
+    _data: dict[str, tuple]
+    _path: Path | None
+    _ttl: float
+    _max_bytes: int
+    _lock: threading.Lock
+
+    __slots__ = ("_items", "_data", "_path", "_ttl", "_max_bytes", "_lock")
+
+    def __init__(
+        self, path: str | None = None, ttl: float = 3600, max_bytes: int = 100_000_000
+    ):
+        """
+        Creates a new ``ItemCache``.  Item handles and definitions are always held in memory for the session.  If *path* is provided, definitions are also written to that directory, and read back in later sessions until they are older than *ttl* seconds.  When the directory grows beyond *max_bytes*, the least recently used definitions are removed.
+
+        :param path: Optional directory for the on-disk cache.
+        :type path: str
+        :param ttl: Number of seconds before a definition on disk is considered stale.
+        :type ttl: float
+        :param max_bytes: Maximum size in bytes of the on-disk cache.
+        :type max_bytes: int
+        :return: Returns the newly created ``ItemCache``.
+        :rtype: ItemCache
+        """
+        self._items = {}
+        self._data = {}
+        self._path = None
+        if path is not None:
+            self._path = Path(path).expanduser()
+            self._path.mkdir(parents=True, exist_ok=True)
+        self._ttl = ttl
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def get(
+        self, gis: GIS, id: str, data_only: bool = False
+    ) -> arcgis.gis.Item | CachedItem | None:
+        """
+        The *get* method wraps *gis.content.get*, returning the memoized handle if the item has already been fetched during this session.  If *data_only* is true and the on-disk cache holds a definition of the item younger than *ttl*, a ``CachedItem`` is returned without contacting the portal.  Use *data_only* only when the handle is passed to *get_data*, since changes made to the item on the portal within *ttl* are not seen.
+
+        :param gis: An authenticated GIS connection.
+        :type gis: arcgis.gis.GIS
+        :param id: The Item ID of the target item.
+        :type id: str
+        :param data_only: Allows a ``CachedItem`` read from disk to be returned.
+        :type data_only: bool
+        :return: The item with ID *id*, or None if it cannot be found.
+        :rtype: arcgis.gis.Item | CachedItem | None
+        """
+        key = (getattr(gis, "url", None), id)
+        if key in self._items:
+            logging.debug("Item cache hit: %s", id)
+            return self._items[key]
+        if data_only:
+            handle = self.handle(gis, id)
+            if handle is not None:
+                return handle
+        host = Scheduler.host(getattr(gis, "url", None))
+        item = get_scheduler().call(host, gis.content.get, id)
+        if item is not None:
+            self._items.update({key: item})
+        return item
+
+    def put(self, gis: GIS, item: arcgis.gis.Item):
+        """
+        The *put* method adds an item handle that was fetched by other means, such as a content search, to the session memo.
+
+        :param gis: The GIS connection used to fetch *item*.
+        :type gis: arcgis.gis.GIS
+        :param item: The item handle to memoize.
+        :type item: arcgis.gis.Item
+        :return: Modifies self as a side effect.
+        :rtype: NoneType
+        """
+        self._items.update({(getattr(gis, "url", None), item.id): item})
+
+    def handle(self, gis: GIS, id: str) -> CachedItem | None:
+        """
+        The *handle* method returns a ``CachedItem`` holding the item properties saved with the definition of item *id* on disk, or None if there is no fresh definition saved with its properties.  Called by *get* and *Templates.resolve*.
+
+        :param gis: The GIS connection used to fetch the definition if it is evicted.
+        :type gis: arcgis.gis.GIS
+        :param id: The Item ID of the target item.
+        :type id: str
+        :return: The cached item, or None.
+        :rtype: CachedItem | None
+        """
+        entry = self.entry(id)
+        if entry is None or type(entry.get("item")) is not dict:
+            return None
+        logging.debug("Item handle read from disk: %s", id)
+        return CachedItem(
+            **{field: entry["item"].get(field) for field in HANDLE_FIELDS}, _gis=gis
+        )
+
+    def entry(self, id: str) -> dict | None:
+        """
+        The *entry* method is an internal library function that loads the cache entry for item *id* from disk, returning None if it is missing, unreadable or older than *ttl*.  Called by *read* and *handle*.
+
+        :param id: The Item ID of the target item.
+        :type id: str
+        :return: The cache entry, holding the keys "time", "modified", "data" and, in entries written by this version, "item".
+        :rtype: dict | None
+        """
+        if self._path is None:
+            return None
+        path = Path(self._path, "{}.json".format(id))
+        if not path.is_file():
+            return None
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            logging.warn("Unreadable cache entry %s.", path)
+            return None
+        if time.time() - entry["time"] > self._ttl:
+            logging.debug("Stale cache entry: %s", id)
+            return None
+        return entry
+
+    def get_data(self, item: arcgis.gis.Item) -> dict:
+        """
+        The *get_data* method wraps *item.get_data*, returning a cached definition if one is available that is fresh and was saved from the same version of the item.
+
+        :param item: The target item.
+        :type item: arcgis.gis.Item
+        :return: The JSON definition of the item.
+        :rtype: dict
+        """
+        modified = getattr(item, "modified", None)
+        if item.id in self._data:
+            cached, data = self._data[item.id]
+            if cached == modified:
+                logging.debug("Data cache hit: %s", item.id)
+                return data
+        data = self.read(item.id, modified)
+        if data is None:
+            host = Scheduler.host(getattr(getattr(item, "_gis", None), "url", None))
+            data = get_scheduler().call(host, item.get_data)
+            self.write(item.id, modified, data, item)
+        self._data.update({item.id: (modified, data)})
+        return data
+
+    def read(self, id: str, modified=None) -> dict | None:
+        """
+        The *read* method is an internal library function that loads the definition for item *id* from disk, returning None if it is missing, stale or was saved from a different version of the item.  Called by *get_data*.
+
+        :param id: The Item ID of the target item.
+        :type id: str
+        :param modified: The modification time of the current version of the item.
+        :type modified: int
+        :return: The cached definition, or None.
+        :rtype: dict | None
+        """
+        entry = self.entry(id)
+        if entry is None:
+            return None
+        if modified is not None and entry["modified"] != modified:
+            logging.debug("Item %s has been modified since it was cached.", id)
+            return None
+        # touch the entry so eviction removes the least recently used first
+        os.utime(Path(self._path, "{}.json".format(id)))
+        logging.debug("Disk cache hit: %s", id)
+        return entry["data"]
+
+    def write(self, id: str, modified, data: dict, item=None):
+        """
+        The *write* method is an internal library function that saves the definition for item *id* to disk, with the properties of *item* listed in ``HANDLE_FIELDS``, then evicts the least recently used entries until the cache fits within *max_bytes*.  Called by *get_data*.
+
+        :param id: The Item ID of the item.
+        :type id: str
+        :param modified: The modification time of the item.
+        :type modified: int
+        :param data: The JSON definition of the item.
+        :type data: dict
+        :param item: Optional item whose properties are saved with the definition.
+        :type item: arcgis.gis.Item
+        :return: Writes to the cache directory as a side effect.
+        :rtype: NoneType
+        """
+        if self._path is None or data is None:
+            return
+        path = Path(self._path, "{}.json".format(id))
+        entry = {"time": time.time(), "modified": modified, "data": data}
+        if item is not None:
+            entry.update(
+                {"item": {field: getattr(item, field, None) for field in HANDLE_FIELDS}}
+            )
+        with self._lock:
+            with open(path, "w") as f:
+                json.dump(entry, f, default=str)
+            entries = sorted(self._path.glob("*.json"), key=lambda p: p.stat().st_mtime)
+            size = sum(entry.stat().st_size for entry in entries)
+            for entry in entries:
+                if size <= self._max_bytes:
+                    break
+                logging.debug("Evicting %s from cache.", entry.stem)
+                size -= entry.stat().st_size
+                entry.unlink()
+
+    def invalidate(self, id: str):
+        """
+        The *invalidate* method removes the item with ID *id* from the memo and the on-disk cache.  Called after an item is updated, so the next read returns the new version.
+
+        :param id: The Item ID of the item.
+        :type id: str
+        :return: Modifies self and the cache directory as a side effect.
+        :rtype: NoneType
+        """
+        self._items = {key: value for key, value in self._items.items() if key[1] != id}
+        self._data.pop(id, None)
+        if self._path is not None:
+            Path(self._path, "{}.json".format(id)).unlink(missing_ok=True)
+
+    def clear(self):
+        """
+        The *clear* method empties the memo and the on-disk cache.
+
+        :return: Modifies self and the cache directory as a side effect.
+        :rtype: NoneType
+        """
+        self._items = {}
+        self._data = {}
+        if self._path is not None:
+            for entry in self._path.glob("*.json"):
+                entry.unlink()
+
+    @property
+    def path(self):
+        """
+        The *path* property holds the directory of the on-disk cache, or None if definitions are held in memory only.
+        """
+        return self._path
+
+    @property
+    def ttl(self):
+        """
+        The *ttl* property holds the number of seconds a definition on disk remains fresh.
+        """
+        return self._ttl
+
+    @ttl.setter
+    def ttl(self, value: float):
+        self._ttl = value
+
+    @property
+    def max_bytes(self):
+        """
+        The *max_bytes* property holds the maximum size in bytes of the on-disk cache.
+        """
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value: int):
+        self._max_bytes = value
+
+
+@dataclass
+class GroupCache:
+    """
+    The ``GroupCache`` class memoizes finished group layers, keyed by a hash of the items they were built from, so that a group is only rebuilt when one of its template items, urls or settings changes.
+    """
+
+    _entries: dict[str, tuple[dict, list]]
+    _path: Path | None
+    _counters: dict[str, int]
+    _lock: threading.Lock
+
+    __slots__ = ("_entries", "_path", "_counters", "_lock")
+
+    def __init__(self, path: str | None = None):
+        """
+        Creates a new ``GroupCache``.  Groups are always held in memory for the session.  If *path* is provided, groups are also written to that directory and read back in later sessions.
+
+        :param path: Optional directory for the on-disk cache.
+        :type path: str
+        :return: Returns the newly created ``GroupCache``.
+        :rtype: GroupCache
+        """
+        self._entries = {}
+        self._path = None
+        if path is not None:
+            self._path = Path(path).expanduser()
+            self._path.mkdir(parents=True, exist_ok=True)
+        self._counters = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> tuple[dict, list] | None:
+        """
+        The *get* method returns a copy of the group layer JSON and search entries stored under *key*, or None if the group has not been built.  The copy may be modified without changing the cache.
+
+        :param key: The content hash of the group.
+        :type key: str
+        :return: A tuple of the group layer JSON and its search entries, or None.
+        :rtype: tuple[dict, list] | None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None and self._path is not None:
+            path = Path(self._path, "{}.json".format(key))
+            if path.is_file():
+                try:
+                    with open(path) as f:
+                        data = json.load(f)
+                    entry = (data["group"], data["search"])
+                    with self._lock:
+                        self._entries.update({key: entry})
+                except (OSError, json.JSONDecodeError, KeyError):
+                    logging.warn("Unreadable group cache entry %s.", path)
+        with self._lock:
+            if entry is None:
+                self._counters["misses"] += 1
+            else:
+                self._counters["hits"] += 1
+        if entry is None:
+            return None
+        return copy.deepcopy(entry)
+
+    def put(self, key: str, group: dict, search: list):
+        """
+        The *put* method stores a copy of the group layer JSON *group* and its search entries *search* under *key*, so later changes to *group* do not reach the cache.
+
+        :param key: The content hash of the group.
+        :type key: str
+        :param group: The JSON representation of the group layer.
+        :type group: dict
+        :param search: The search entries of the group.
+        :type search: list[dict]
+        :return: Modifies self and the cache directory as a side effect.
+        :rtype: NoneType
+        """
+        entry = copy.deepcopy((group, search))
+        with self._lock:
+            self._entries.update({key: entry})
+            if self._path is not None:
+                path = Path(self._path, "{}.json".format(key))
+                with open(path, "w") as f:
+                    json.dump({"group": entry[0], "search": entry[1]}, f)
+
+    def clear(self):
+        """
+        The *clear* method empties the memo and the on-disk cache.
+
+        :return: Modifies self and the cache directory as a side effect.
+        :rtype: NoneType
+        """
+        with self._lock:
+            self._entries = {}
+            if self._path is not None:
+                for entry in self._path.glob("*.json"):
+                    entry.unlink()
+
+    @property
+    def counters(self):
+        """
+        The *counters* property holds the number of cache hits and misses.
+        """
+        return dict(self._counters)
+
+    @property
+    def path(self):
+        """
+        The *path* property holds the directory of the on-disk cache, or None if groups are held in memory only.
+        """
+        return self._path
+
+
+_cache = ItemCache()
+
+
+def get_cache() -> ItemCache:
+    """
+    Return the ``ItemCache`` shared by the library.  *Template* and *Map* methods fetch portal items through this cache.
+
+    :return: The shared cache.
+    :rtype: ItemCache
+    """
+    return _cache
+
+
+def set_cache(cache: ItemCache):
+    """
+    Replace the ``ItemCache`` shared by the library, for example with one that persists definitions to disk.
+
+    :param cache: The cache to share.
+    :type cache: ItemCache
+    :return: Sets the shared cache as a side effect.
+    :rtype: NoneType
+    """
+    global _cache
+    _cache = cache
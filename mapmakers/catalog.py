@@ -0,0 +1,232 @@
+from dataclasses import dataclass
+from pathlib import Path
+from mapmakers.scheduler import get_scheduler
+from mapmakers.utils import expand_urls
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+
+@dataclass
+class Catalog:
+    """
+    The ``Catalog`` class caches the layer metadata published by ArcGIS FeatureServer and MapServer services, so that layers can be referenced by name instead of by index.
+    """
+
+    _path: Path | None
+    _ttl: float
+    _entries: dict[str, dict]
+    _lock: threading.Lock
+
+    __slots__ = ("_path", "_ttl", "_entries", "_lock")
+
+    def __init__(self, path: str | None = None, ttl: float = 86400):
+        """
+        Creates a new ``Catalog``.  If *path* is provided, cached metadata is read from and written to the JSON file at *path*, so that it persists across sessions.
+
+        :param path: Optional file path of the on-disk cache.
+        :type path: str
+        :param ttl: Number of seconds before a cached response is considered stale.
+        :type ttl: float
+        :return: Returns the newly created ``Catalog``.
+        :rtype: Catalog
+        """
+        self._path = None
+        self._ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        if path is not None:
+            self._path = Path(path)
+            if self._path.is_file():
+                with open(self._path) as f:
+                    try:
+                        self._entries = json.load(f)
+                    except json.JSONDecodeError:
+                        logging.warn("Catalog cache %s is unreadable.", self._path)
+
+    @staticmethod
+    def root(url: str) -> str:
+        """
+        The *root* method strips the layer index and any query string from *url*, returning the url of the parent service.
+
+        :param url: Url of a service or of a layer within a service.
+        :type url: str
+        :return: The url of the service root.
+        :rtype: str
+        """
+        url = url.split("?")[0].rstrip("/")
+        return re.sub(r"/\d+$", "", url)
+
+    def fetch(self, url: str, params: dict | None = None) -> dict | None:
+        """
+        The *fetch* method returns the JSON response for *url*, requesting it from the server only if no fresh copy is held in the cache.
+
+        :param url: Url of the service resource.
+        :type url: str
+        :param params: Optional query parameters added to the request.  The *f* parameter is always set to "json".
+        :type params: dict
+        :return: The parsed JSON response, or None if the request fails.
+        :rtype: dict | None
+        """
+        query = {"f": "json"}
+        if params is not None:
+            query.update(params)
+        key = (
+            url.rstrip("/")
+            + "?"
+            + "&".join("{}={}".format(k, query[k]) for k in sorted(query))
+        )
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and time.time() - entry["time"] < self._ttl:
+            logging.debug("Catalog hit: %s", key)
+            return entry["data"]
+        logging.debug("Catalog miss: %s", key)
+        response = get_scheduler().get(url, params=query)
+        if response.status_code != 200:
+            logging.warn("Url %s returned status %s.", url, response.status_code)
+            return None
+        data = response.json()
+        if "error" in data:
+            logging.warn("Url %s returned error: %s", url, data["error"])
+            return None
+        with self._lock:
+            self._entries.update({key: {"time": time.time(), "data": data}})
+        self.save()
+        return data
+
+    def service(self, url: str) -> list[dict]:
+        """
+        The *service* method returns the id, name and geometry type of each layer and table in the service at *url*.
+
+        :param url: Url of the service, or of any layer within the service.
+        :type url: str
+        :return: A list of dictionaries with the keys "id", "name" and "geometryType".
+        :rtype: list[dict]
+        """
+        data = self.fetch(Catalog.root(url))
+        layers = []
+        if data is None:
+            return layers
+        for kind in ["layers", "tables"]:
+            for layer in data.get(kind, []):
+                layers.append(
+                    {
+                        "id": layer["id"],
+                        "name": layer["name"],
+                        "geometryType": layer.get("geometryType"),
+                    }
+                )
+        return layers
+
+    def layer_id(self, url: str, name: str) -> int | None:
+        """
+        The *layer_id* method looks up the index of the layer called *name* in the service at *url*.  Names are compared without regard to case.
+
+        :param url: Url of the service.
+        :type url: str
+        :param name: Name of the layer in the service.
+        :type name: str
+        :return: The index of the layer, or None if no layer has the given name.
+        :rtype: int | None
+        """
+        matches = [
+            layer["id"]
+            for layer in self.service(url)
+            if layer["name"].lower() == name.lower()
+        ]
+        if len(matches) == 0:
+            logging.warn("Layer %s not found in %s.", name, Catalog.root(url))
+            return None
+        if len(matches) > 1:
+            logging.warn("Layer name %s is not unique in %s.", name, url)
+        return matches[0]
+
+    def layer(self, url: str) -> dict | None:
+        """
+        The *layer* method returns the full metadata for the layer at *url*, including its fields and indexes.
+
+        :param url: Url of the layer.
+        :type url: str
+        :return: The layer metadata, or None if the request fails.
+        :rtype: dict | None
+        """
+        return self.fetch(url)
+
+    def count(self, url: str) -> int | None:
+        """
+        The *count* method returns the number of features in the layer at *url*, using a *returnCountOnly* query so that no features are downloaded.
+
+        :param url: Url of the layer.
+        :type url: str
+        :return: The number of features, or None if the request fails.
+        :rtype: int | None
+        """
+        data = self.fetch(
+            url.split("?")[0].rstrip("/") + "/query",
+            {"where": "1=1", "returnCountOnly": "true"},
+        )
+        if data is None or "count" not in data:
+            return None
+        return data["count"]
+
+    def expand_urls(self, stub: str, names: list[str | int]) -> list[str]:
+        """
+        The *expand_urls* method generates a list of layer urls from the service *stub*, resolving each layer name in *names* to its index using the cached service metadata.
+
+        :param stub: Url base string for the service.
+        :type stub: str
+        :param names: Layer names, or layer indexes, in the desired order.
+        :type names: list[str | int]
+        :return: List of urls for the named layers.
+        :rtype: list[str]
+        """
+        return expand_urls(stub, names, self)
+
+    def save(self):
+        """
+        The *save* method writes the cached metadata to the file at *path*, if one was provided.  The file is written to a temporary file first and then moved into place, so readers never see a partial cache.
+
+        :return: Writes the cache to disk as a side effect.
+        :rtype: NoneType
+        """
+        if self._path is None:
+            return
+        with self._lock:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._path.with_name(self._path.name + ".tmp")
+            with open(tmp, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp, self._path)
+
+    def clear(self):
+        """
+        The *clear* method discards all cached metadata.
+
+        :return: Modifies self and the on-disk cache as a side effect.
+        :rtype: NoneType
+        """
+        with self._lock:
+            self._entries = {}
+        self.save()
+
+    @property
+    def path(self):
+        """
+        The *path* property holds the file path of the on-disk cache, or None if the cache is held in memory only.
+        """
+        return self._path
+
+    @property
+    def ttl(self):
+        """
+        The *ttl* property holds the number of seconds a cached response remains fresh.
+        """
+        return self._ttl
+
+    @ttl.setter
+    def ttl(self, value: float):
+        self._ttl = value
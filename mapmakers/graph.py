@@ -0,0 +1,233 @@
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass
+import logging
+import time
+
+
+def timed(fn, args: tuple, kwargs: dict) -> tuple:
+    """
+    Call *fn* with *args* and *kwargs*, returning the result and the time taken in seconds.  Defined at module level so that it can be sent to a worker process.
+
+    :param fn: The function to call.
+    :type fn: function
+    :param args: Positional arguments for *fn*.
+    :type args: tuple
+    :param kwargs: Keyword arguments for *fn*.
+    :type kwargs: dict
+    :return: A tuple of the return value of *fn* and the elapsed seconds.
+    :rtype: tuple
+    """
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+@dataclass
+class BuildNode:
+    """
+    The ``BuildNode`` class holds a named step of a ``BuildGraph``: the function to call, its arguments, the names of the nodes it depends on, and an optional cache key.
+    """
+
+    name: str
+    fn: object
+    args: tuple
+    kwargs: dict
+    deps: list[str]
+    key: str | None
+
+    __slots__ = ("name", "fn", "args", "kwargs", "deps", "key")
+
+
+@dataclass
+class BuildGraph:
+    """
+    The ``BuildGraph`` class runs the builder functions of a map as a graph of named nodes.  Nodes whose dependencies are complete run at the same time on a thread or process pool, the time taken by each node is recorded, and results can be reused from a cache.
+    """
+
+    _nodes: dict[str, BuildNode]
+    _workers: int | None
+    _processes: bool
+    _cache: object
+    _timings: dict[str, float]
+    _hooks: list
+
+    __slots__ = ("_nodes", "_workers", "_processes", "_cache", "_timings", "_hooks")
+
+    def __init__(self, workers: int | None = None, processes=False, cache=None):
+        """
+        Creates a new ``BuildGraph``.
+
+        :param workers: The number of workers.  Defaults to the executor default.
+        :type workers: int
+        :param processes: Runs nodes on a process pool if true, or a thread pool if false.  Functions, arguments and results must be picklable to run on processes.
+        :type processes: bool
+        :param cache: Optional mapping, such as a dictionary or a ``shelve``, holding the results of nodes added with a *key*.
+        :type cache: dict
+        :return: Returns the newly created ``BuildGraph``.
+        :rtype: BuildGraph
+        """
+        self._nodes = {}
+        self._workers = workers
+        self._processes = processes
+        self._cache = cache
+        self._timings = {}
+        self._hooks = []
+
+    def add(self, name: str, fn, *args, deps=None, key=None, **kwargs):
+        """
+        The *add* method registers the node *name*, which calls *fn* with *args* and *kwargs*.  The results of the nodes named in *deps* are passed to *fn* as further positional arguments, in order.  If *key* is provided and the graph has a cache holding *key*, the cached result is used instead of calling *fn*.
+
+        :param name: The name of the node.
+        :type name: str
+        :param fn: The builder function.
+        :type fn: function
+        :param deps: Names of the nodes that must complete first.
+        :type deps: list[str]
+        :param key: Optional cache key, such as a content hash of the inputs of *fn*.
+        :type key: str
+        :return: Modifies and returns self.
+        :rtype: BuildGraph
+        """
+        if name in self._nodes:
+            logging.warn("Replacing build node %s.", name)
+        if deps is None:
+            deps = []
+        self._nodes.update({name: BuildNode(name, fn, args, kwargs, list(deps), key)})
+        return self
+
+    def hook(self, fn):
+        """
+        The *hook* method registers *fn* to be called as *fn(name, seconds, cached)* when each node completes.
+
+        :param fn: The function to call.
+        :type fn: function
+        :return: Modifies and returns self.
+        :rtype: BuildGraph
+        """
+        self._hooks.append(fn)
+        return self
+
+    def order(self) -> list[str] | None:
+        """
+        The *order* method returns the names of the nodes in an order that respects their dependencies, or None if a dependency is missing or the graph has a cycle.
+
+        :return: A list of node names.
+        :rtype: list[str] | None
+        """
+        order = []
+        state = {}
+
+        def visit(name: str, path: list[str]) -> bool:
+            if state.get(name) == "done":
+                return True
+            if state.get(name) == "visiting":
+                logging.warn("Build graph has a cycle: %s", " -> ".join(path))
+                return False
+            if name not in self._nodes:
+                logging.warn("Build node %s depends on missing node.", path[-2])
+                return False
+            state.update({name: "visiting"})
+            for dep in self._nodes[name].deps:
+                if not visit(dep, path + [dep]):
+                    return False
+            state.update({name: "done"})
+            order.append(name)
+            return True
+
+        for name in self._nodes:
+            if not visit(name, [name]):
+                return None
+        return order
+
+    def finish(self, name: str, seconds: float, cached: bool):
+        """
+        The *finish* method is an internal library function that records the time taken by node *name* and calls the registered hooks.  Called by *run*.
+
+        :return: Modifies self as a side effect.
+        :rtype: NoneType
+        """
+        self._timings.update({name: seconds})
+        logging.debug("Built %s in %.2fs.", name, seconds)
+        for hook in self._hooks:
+            hook(name, seconds, cached)
+
+    def run(self) -> dict | None:
+        """
+        The *run* method builds every node, starting each node as soon as its dependencies are complete.  If a node raises an exception, the exception is raised once the running nodes have finished.
+
+        :return: A dictionary with node names as keys and results as values, in the order the nodes were added, or None if the graph cannot be ordered.
+        :rtype: dict | None
+        """
+        if self.order() is None:
+            return None
+        self._timings = {}
+        results = {}
+        pending = dict(self._nodes)
+        running = {}
+        executor = ThreadPoolExecutor
+        if self._processes:
+            executor = ProcessPoolExecutor
+        with executor(max_workers=self._workers) as pool:
+            while pending or running:
+                ready = [
+                    node
+                    for node in pending.values()
+                    if all(dep in results for dep in node.deps)
+                ]
+                for node in ready:
+                    del pending[node.name]
+                    if (
+                        node.key is not None
+                        and self._cache is not None
+                        and node.key in self._cache
+                    ):
+                        results.update({node.name: self._cache[node.key]})
+                        self.finish(node.name, 0.0, True)
+                        continue
+                    args = node.args + tuple(results[dep] for dep in node.deps)
+                    future = pool.submit(timed, node.fn, args, node.kwargs)
+                    running.update({future: node})
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    result, seconds = future.result()
+                    results.update({node.name: result})
+                    if node.key is not None and self._cache is not None:
+                        self._cache[node.key] = result
+                    self.finish(node.name, seconds, False)
+        return {name: results[name] for name in self._nodes}
+
+    def report(self):
+        """
+        The *report* method logs the time taken by each node in the last run, slowest first.
+
+        :return: Logs a summary as a side effect.
+        :rtype: NoneType
+        """
+        for name, seconds in sorted(
+            self._timings.items(), key=lambda timing: timing[1], reverse=True
+        ):
+            logging.info("%s: %.2fs", name, seconds)
+
+    @property
+    def timings(self):
+        """
+        The *timings* property holds the seconds taken by each node in the last run.  Nodes read from the cache take no time.
+        """
+        return dict(self._timings)
+
+    @property
+    def slowest(self):
+        """
+        The *slowest* property holds the name of the node that took the longest in the last run, or None if the graph has not run.
+        """
+        if len(self._timings) == 0:
+            return None
+        return max(self._timings, key=self._timings.get)
@@ -0,0 +1,129 @@
+from dataclasses import dataclass
+from pathlib import Path
+import json
+import logging
+import threading
+import time
+
+
+@dataclass
+class Manifest:
+    """
+    The ``Manifest`` class records the hash of the definition last published to each target web map, so that unchanged targets can be skipped without contacting the portal, and reports which targets were published or skipped.
+    """
+
+    _path: Path | None
+    _entries: dict[str, dict]
+    _published: list[str]
+    _skipped: list[str]
+    _lock: threading.Lock
+
+    __slots__ = ("_path", "_entries", "_published", "_skipped", "_lock")
+
+    def __init__(self, path: str | None = None):
+        """
+        Creates a new ``Manifest``.  If *path* is provided, the manifest is read from and saved to the JSON file at *path*.
+
+        :param path: Optional file path of the manifest.
+        :type path: str
+        :return: Returns the newly created ``Manifest``.
+        :rtype: Manifest
+        """
+        self._path = None
+        self._entries = {}
+        self._published = []
+        self._skipped = []
+        self._lock = threading.Lock()
+        if path is not None:
+            self._path = Path(path)
+            if self._path.is_file():
+                with open(self._path, encoding="utf-8") as f:
+                    self._entries = json.load(f)
+
+    def get(self, id: str) -> str | None:
+        """
+        The *get* method returns the hash of the definition last published to the web map with Item ID *id*.
+
+        :param id: The Item ID of the target web map.
+        :type id: str
+        :return: The recorded hash, or None if the target has not been published.
+        :rtype: str | None
+        """
+        entry = self._entries.get(id)
+        if entry is None:
+            return None
+        return entry["hash"]
+
+    def publish(self, id: str, hash: str):
+        """
+        The *publish* method records that the definition with hash *hash* was published to the web map with Item ID *id*, and saves the manifest.
+
+        :param id: The Item ID of the target web map.
+        :type id: str
+        :param hash: The hash of the published definition.
+        :type hash: str
+        :return: Modifies self and the manifest file as a side effect.
+        :rtype: NoneType
+        """
+        with self._lock:
+            self._entries.update({id: {"hash": hash, "time": time.time()}})
+            self._published.append(id)
+            self.save()
+
+    def skip(self, id: str, hash: str):
+        """
+        The *skip* method records that publishing to the web map with Item ID *id* was skipped because its definition has hash *hash* already.
+
+        :param id: The Item ID of the target web map.
+        :type id: str
+        :param hash: The hash of the unchanged definition.
+        :type hash: str
+        :return: Modifies self and the manifest file as a side effect.
+        :rtype: NoneType
+        """
+        with self._lock:
+            if self.get(id) != hash:
+                self._entries.update({id: {"hash": hash, "time": time.time()}})
+                self.save()
+            self._skipped.append(id)
+
+    def save(self):
+        """
+        The *save* method writes the manifest to the file at *path*, if one was provided.
+
+        :return: Writes the manifest to disk as a side effect.
+        :rtype: NoneType
+        """
+        if self._path is None:
+            return
+        with open(self._path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, indent=2)
+
+    def report(self):
+        """
+        The *report* method logs the targets published and skipped since the ``Manifest`` was created.
+
+        :return: Logs a summary as a side effect.
+        :rtype: NoneType
+        """
+        logging.info(
+            "Published %s targets, skipped %s unchanged.",
+            len(self._published),
+            len(self._skipped),
+        )
+        for id in self._skipped:
+            logging.info("Skipped %s.", id)
+
+    @property
+    def published(self):
+        """
+        The *published* property holds the Item IDs of the targets published since the ``Manifest`` was created.
+        """
+        return list(self._published)
+
+    @property
+    def skipped(self):
+        """
+        The *skipped* property holds the Item IDs of the targets skipped since the ``Manifest`` was created.
+        """
+        return list(self._skipped)
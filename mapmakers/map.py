@@ -1,13 +1,39 @@
 from dataclasses import dataclass
+from mapmakers.cache import GroupCache, get_cache
+from mapmakers.optimize import (
+    BudgetExceeded,
+    assign_reduction,
+    assign_scales,
+    check_search,
+    feature_reduction,
+    is_point,
+    leaves,
+    load_cost,
+    trim_definition,
+)
+from mapmakers.scheduler import Scheduler, get_scheduler
+from mapmakers.search import SearchRegistry
 from mapmakers.template import Template, TemplateItem
-from mapmakers.utils import create_layer_id
+from mapmakers.utils import (
+    content_hash,
+    create_layer_id,
+    definition_hash,
+    gather_limited,
+)
 import arcgis
 from arcgis.gis import GIS
 from arcgis.mapping import WebMap
+import asyncio
+import dataclasses
 import json
 import logging
 import random
-import requests
+import re
+
+# layer ids produced by create_layer_id
+GENERATED_ID = re.compile(r"^[a-z0-9]{11}-layer-\d+$")
+# a generated layer id quoted in JSON text
+GENERATED_VALUE = re.compile(r'"[a-z0-9]{11}-layer-\d+"')
 
 
 @dataclass
@@ -21,6 +47,7 @@ class Item:
     _visible: bool
     _title: str | None
     _opacity: float | None
+    _reduction: str | dict | None
 
     __slots__ = (
         "_url",
@@ -28,13 +55,20 @@ class Item:
         "_visible",
         "_title",
         "_opacity",
+        "_reduction",
     )
 
     def __init__(
-        self, url: str, template=None, visible=False, title=None, opacity=None
+        self,
+        url: str,
+        template=None,
+        visible=False,
+        title=None,
+        opacity=None,
+        reduction=None,
     ):
         """
-        Creates a new map Item from a given URL and optional TemplateItem, setting the visibility, title and opacity using the `visible`, `title` and `opacity` fields respectively.
+        Creates a new map Item from a given URL and optional TemplateItem, setting the visibility, title, opacity and feature reduction using the `visible`, `title`, `opacity` and `reduction` fields respectively.
 
         :param url: A string representation of the ArcGIS service URL.
         :type url: str
@@ -46,6 +80,8 @@ class Item:
         :type title: str
         :param opacity: Sets the opacity of the map layer.
         :type opacity: float
+        :param reduction: Draws the features of the map layer as clusters or bins.  Either "cluster", "binning" or the JSON representation of a feature reduction.  Only set it on point layers, since clustering and binning do not apply to lines, polygons or tables.
+        :type reduction: str | dict
         :return: Returns the newly created map Item.
         :rtype: Item
         """
@@ -54,6 +90,7 @@ class Item:
         self._visible = visible
         self._title = title
         self._opacity = opacity
+        self._reduction = reduction
 
     @staticmethod
     def check_url_in(path: str) -> bool:
@@ -65,7 +102,7 @@ class Item:
         :return: Boolean indicating whether a "GET" request returns a status code 200.
         :rtype: bool
         """
-        check = requests.get(path)
+        check = get_scheduler().get(path)
         if check.status_code == 200:
             logging.info("Url %s is valid.", path)
             return True
@@ -82,6 +119,27 @@ class Item:
         """
         return Item.check_url_in(self._url)
 
+    @staticmethod
+    async def acheck_url_in(path: str) -> bool:
+        """
+        The `acheck_url_in` static method is the asynchronous counterpart to `check_url_in`, sending the "GET" request on a worker thread.
+
+        :param path: String representation of the target URL.
+        :type path: str
+        :return: Boolean indicating whether a "GET" request returns a status code 200.
+        :rtype: bool
+        """
+        return await asyncio.to_thread(Item.check_url_in, path)
+
+    async def acheck_url(self) -> bool:
+        """
+        The `acheck_url` method wraps the static method `acheck_url_in` to enable ergonomic checking of ``Item`` urls.
+
+        :return: Boolean indicating whether a "GET" request returns a status code 200.
+        :rtype: bool
+        """
+        return await Item.acheck_url_in(self._url)
+
     def layer(self):
         """
         The *layer* method converts feature class data in a map ``Item`` into a map ``Layer``.
@@ -169,21 +227,36 @@ class Item:
     def opacity(self, value: float):
         self._opacity = value
 
+    @property
+    def reduction(self):
+        """
+        The *reduction* property sets the feature reduction of the map ``Item``, such as "cluster" or "binning".  If None, the feature reduction of the template is kept.
+        """
+        return self._reduction
+
+    @reduction.setter
+    def reduction(self, value: str | dict | None):
+        self._reduction = value
+
 
 @dataclass
 class Items:
     """
-    The ``Items`` class holds a list of ``Item`` objects.
+    The ``Items`` class holds a list of ``Item`` objects, indexed by item name, title and url so that items can be selected and updated without scanning the list.
     """
 
     _items: list[Item]
     _index: int
+    _indexes: dict[str, dict[str, list[int]]] | None
+    _size: int
 
-    __slots__ = ("_items", "_index")
+    __slots__ = ("_items", "_index", "_indexes", "_size")
 
     def __init__(self, items: list[Item]):
         self._items = items
         self._index = -1
+        self._indexes = None
+        self._size = 0
 
     def __next__(self):
         if self._index == len(self._items) - 1:
@@ -197,6 +270,157 @@ class Items:
     def reverse(self):
         """Wrapper calling reverse on the _items field of `Items`."""
         self._items.reverse()
+        self._indexes = None
+        return self
+
+    @staticmethod
+    def keys(item: Item) -> dict[str, str | None]:
+        """
+        The *keys* method returns the name, title and url of *item*, used as keys in the indexes of ``Items``.  The name and title are taken from the template of *item* if it does not set its own.
+
+        :param item: The ``Item`` to index.
+        :type item: Item
+        :return: A dictionary with the keys "name", "title" and "url".
+        :rtype: dict[str, str | None]
+        """
+        name = None
+        title = item.title
+        if item.template is not None:
+            name = item.template.item_name
+            if title is None:
+                title = item.template.title
+        return {"name": name, "title": title, "url": item.url}
+
+    def reindex(self):
+        """
+        The *reindex* method rebuilds the name, title and url indexes of self.  The methods of ``Items`` keep the indexes up to date, and a lookup rebuilds them when an item it finds no longer matches the key.  Call *reindex* after changing the name, title or url of an item directly, so that lookups by the new value find it.
+
+        :return: Modifies self as a side effect.
+        :rtype: NoneType
+        """
+        indexes = {"name": {}, "title": {}, "url": {}}
+        for position, item in enumerate(self._items):
+            for by, key in Items.keys(item).items():
+                if key is not None:
+                    indexes[by].setdefault(key, []).append(position)
+        self._indexes = indexes
+        self._size = len(self._items)
+
+    def index(self, position: int):
+        """
+        The *index* method is an internal library function that adds the item at *position* to the indexes of self, if they have been built.  Called by *append* and *insert*.
+
+        :param position: The position of the item in *items*.
+        :type position: int
+        :return: Modifies self as a side effect.
+        :rtype: NoneType
+        """
+        if self._indexes is None:
+            return
+        for by, key in Items.keys(self._items[position]).items():
+            if key is not None:
+                self._indexes[by].setdefault(key, []).append(position)
+        self._size = len(self._items)
+
+    def positions(self, key: str, by: str = "name") -> list[int]:
+        """
+        The *positions* method returns the positions in *items* of the items whose name, title or url, as selected by *by*, equals *key*.
+
+        :param key: The name, title or url to look up.
+        :type key: str
+        :param by: The index to search, one of "name", "title" or "url".
+        :type by: str
+        :return: A list of positions in *items*.
+        :rtype: list[int]
+        """
+        if self._indexes is None or self._size != len(self._items):
+            self.reindex()
+        positions = self._indexes[by].get(key, [])
+        # items may have been replaced in the list since the index was built
+        for position in positions:
+            if Items.keys(self._items[position])[by] != key:
+                self.reindex()
+                return self._indexes[by].get(key, [])
+        return positions
+
+    def get(self, key: str, by: str = "name") -> Item | None:
+        """
+        The *get* method returns the first item whose name, title or url, as selected by *by*, equals *key*.
+
+        :param key: The name, title or url to look up.
+        :type key: str
+        :param by: The index to search, one of "name", "title" or "url".
+        :type by: str
+        :return: The matching ``Item``, or None if no item matches.
+        :rtype: Item | None
+        """
+        positions = self.positions(key, by)
+        if len(positions) == 0:
+            return None
+        return self._items[positions[0]]
+
+    def select(self, keys: list[str], by: str = "name"):
+        """
+        The *select* method returns a new ``Items`` object holding the items whose name, title or url, as selected by *by*, is in *keys*, in the order of *keys*.
+
+        :param keys: The names, titles or urls to select.
+        :type keys: list[str]
+        :param by: The index to search, one of "name", "title" or "url".
+        :type by: str
+        :return: An ``Items`` object with the selected items.
+        :rtype: Items
+        """
+        items = []
+        for key in keys:
+            positions = self.positions(key, by)
+            if len(positions) == 0:
+                logging.warn("No item with %s %s.", by, key)
+            items.extend(self._items[position] for position in positions)
+        return Items(items)
+
+    def set_visible(self, keys: list[str], visible: bool = True, by: str = "name"):
+        """
+        The *set_visible* method sets the visibility of the items whose name, title or url, as selected by *by*, is in *keys*.
+
+        :param keys: The names, titles or urls of the items to update.
+        :type keys: list[str]
+        :param visible: The visibility to set.
+        :type visible: bool
+        :param by: The index to search, one of "name", "title" or "url".
+        :type by: str
+        :return: Modifies and returns self.
+        :rtype: Items
+        """
+        for key in keys:
+            positions = self.positions(key, by)
+            if len(positions) == 0:
+                logging.warn("No item with %s %s.", by, key)
+            for position in positions:
+                self._items[position].visible = visible
+        return self
+
+    def set_urls(self, urls: dict[str, str], by: str = "name"):
+        """
+        The *set_urls* method sets the url of each item whose name, title or url, as selected by *by*, is a key in *urls* to the corresponding value.
+
+        :param urls: A dictionary with names, titles or urls as keys and new urls as values.
+        :type urls: dict[str, str]
+        :param by: The index to search, one of "name", "title" or "url".
+        :type by: str
+        :return: Modifies and returns self.
+        :rtype: Items
+        """
+        for key, url in urls.items():
+            positions = list(self.positions(key, by))
+            if len(positions) == 0:
+                logging.warn("No item with %s %s.", by, key)
+            for position in positions:
+                item = self._items[position]
+                old = self._indexes["url"].get(item.url)
+                if old is not None and position in old:
+                    old.remove(position)
+                item.url = url
+                self._indexes["url"].setdefault(url, []).append(position)
         return self
 
     # def gen(self):
@@ -250,25 +474,58 @@ class Items:
                 i += 1
             return Items(members)
 
-    def group(self, name: str, visible: bool = True):
+    async def acheck_urls(self, limit: int = 16) -> list[bool]:
         """
-        The *group* method coverts an ``Items`` object into a map ``Group`` with name *name*.
+        The *acheck_urls* method checks the urls of all items in self, sending up to *limit* requests at the same time.  Each distinct url is requested only once.
+
+        :param limit: Maximum number of requests to send concurrently.
+        :type limit: int
+        :return: Booleans indicating whether the url of each item is valid, in the order of *items*.
+        :rtype: list[bool]
+        """
+        urls = list(dict.fromkeys(item.url for item in self._items))
+
+        def call(url: str):
+            return lambda: Item.acheck_url_in(url)
+
+        checks = dict(
+            zip(urls, await gather_limited([call(url) for url in urls], limit))
+        )
+        return [checks[item.url] for item in self._items]
+
+    def group(
+        self,
+        name: str,
+        visible: bool = True,
+        cache: GroupCache | None = None,
+        reduction: str | dict | None = None,
+    ):
+        """
+        The *group* method coverts an ``Items`` object into a map ``Group`` with name *name*.  If *cache* is provided, the group is reused from the cache when its items are unchanged.
 
         :param name: Display name of the ``Group`` layer.
         :type name: str
+        :param visible: A boolean indicating whether the group should be visible.
+        :type visible: bool
+        :param cache: Optional ``GroupCache`` holding groups built earlier.
+        :type cache: mapmakers.cache.GroupCache
+        :param reduction: Optional feature reduction, such as "cluster" or "binning", for items that do not set their own.  It is only applied to layers whose template shows they draw points, since clustering and binning do not apply to lines, polygons or tables.
+        :type reduction: str | dict
         :return: ``Group`` instance constructed from self.
         :rtype: Group
         """
-        return Group.from_items(name, self, visible)
+        return Group.from_items(name, self, visible, cache, reduction)
 
-    def layers(self):
+    def layers(self, cache: GroupCache | None = None):
         """
-        The *layers* method converts the *items* in self into a ``Layers`` object.
+        The *layers* method converts the *items* in self into a ``Layers`` object.  If *cache* is provided, the layers are reused from the cache when the items are unchanged.
 
+        :param cache: Optional ``GroupCache`` holding layers built earlier.
+        :type cache: mapmakers.cache.GroupCache
         :return: ``Layers`` instance constructed from self.
         :rtype: Layers
         """
-        return Layers.from_items(self)
+        return Layers.from_items(self, cache)
 
     def rasters(self):
         """
@@ -292,6 +549,7 @@ class Items:
         :rtype: Items
         """
         self._items.append(item)
+        self.index(len(self._items) - 1)
         return self
 
     def extend(self, items: list[Item]):
@@ -303,7 +561,10 @@ class Items:
         :return: Modifies and returns self.
         :rtype: Items
         """
+        start = len(self._items)
         self._items.extend(items)
+        for position in range(start, len(self._items)):
+            self.index(position)
         return self
 
     def insert(self, idx: int, item: Item):
@@ -315,7 +576,17 @@ class Items:
         :return: Modifies and returns self.
         :rtype: Items
         """
+        # the position list.insert places the item at
+        position = min(
+            max(idx + len(self._items) if idx < 0 else idx, 0), len(self._items)
+        )
         self._items.insert(idx, item)
+        if self._indexes is not None:
+            # shift the positions after the new item instead of rebuilding the indexes
+            for index in self._indexes.values():
+                for positions in index.values():
+                    positions[:] = [p + 1 if p >= position else p for p in positions]
+            self.index(position)
         return self
 
     @property
@@ -328,6 +599,289 @@ class Items:
     @items.setter
     def items(self, members: list[Item]):
         self._items = members
+        self._indexes = None
+
+    def freeze(self):
+        """
+        The *freeze* method converts self into an immutable ``FrozenItems`` object.
+
+        :return: A ``FrozenItems`` object holding the items of self.
+        :rtype: FrozenItems
+        """
+        return FrozenItems(self._items)
+
+
+@dataclass(frozen=True, slots=True)
+class FrozenItem:
+    """
+    The ``FrozenItem`` class is an immutable counterpart to ``Item``.  Changes produce a new ``FrozenItem``, so a frozen item can be shared by any number of ``FrozenItems`` collections, and by builders running concurrently, without being copied.
+    """
+
+    url: str
+    template: TemplateItem | None = None
+    visible: bool = False
+    title: str | None = None
+    opacity: float | None = None
+    reduction: str | dict | None = None
+
+    @staticmethod
+    def from_item(item):
+        """
+        The *from_item* method converts an ``Item`` into a ``FrozenItem``.  The template of *item* is shared, not copied.
+
+        :param item: The ``Item`` or ``FrozenItem`` to convert.
+        :type item: Item | FrozenItem
+        :return: A ``FrozenItem`` with the settings of *item*.
+        :rtype: FrozenItem
+        """
+        if isinstance(item, FrozenItem):
+            return item
+        return FrozenItem(
+            item.url,
+            item.template,
+            item.visible,
+            item.title,
+            item.opacity,
+            item.reduction,
+        )
+
+    def replace(self, **changes):
+        """
+        The *replace* method returns a copy of self with the fields in *changes* replaced.
+
+        :return: A new ``FrozenItem``.
+        :rtype: FrozenItem
+        """
+        return dataclasses.replace(self, **changes)
+
+    def thaw(self) -> Item:
+        """
+        The *thaw* method converts self into a mutable ``Item``.
+
+        :return: An ``Item`` with the settings of self.
+        :rtype: Item
+        """
+        return Item(
+            self.url,
+            self.template,
+            self.visible,
+            self.title,
+            self.opacity,
+            self.reduction,
+        )
+
+    def layer(self):
+        """
+        The *layer* method converts the ``FrozenItem`` into a map ``Layer``.
+
+        :return: A ``Layer`` object constructed from self.
+        :rtype: Layer
+        """
+        return Layer(self)
+
+
+@dataclass
+class FrozenItems:
+    """
+    The ``FrozenItems`` class is an immutable counterpart to ``Items``, holding a tuple of ``FrozenItem`` objects.  Methods such as *with_visible*, *with_url*, *without* and *insert* return a new ``FrozenItems`` that shares every unchanged item with the original, so public and internal variants of a layer list can be derived from one another without defensive copies.
+    """
+
+    _items: tuple[FrozenItem, ...]
+    _indexes: Items | None
+
+    __slots__ = ("_items", "_indexes")
+
+    def __init__(self, items):
+        self._items = tuple(FrozenItem.from_item(item) for item in items)
+        self._indexes = None
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def positions(self, keys: list, by: str = "name") -> list[int]:
+        """
+        The *positions* method returns the positions of the items whose name, title or url, as selected by *by*, is in *keys*.  If *by* is "position", *keys* are positions and are returned as given.
+
+        :param keys: The names, titles, urls or positions to look up.
+        :type keys: list
+        :param by: One of "name", "title", "url" or "position".
+        :type by: str
+        :return: A list of positions in *items*.
+        :rtype: list[int]
+        """
+        if by == "position":
+            return list(keys)
+        if self._indexes is None:
+            # frozen items never change, but a template they share may be renamed, which
+            # Items.positions detects when a lookup finds an item that no longer matches
+            self._indexes = Items(list(self._items))
+        positions = []
+        for key in keys:
+            found = self._indexes.positions(key, by)
+            if len(found) == 0:
+                logging.warn("No item with %s %s.", by, key)
+            positions.extend(found)
+        return positions
+
+    def update(self, positions: list[int], **changes):
+        """
+        The *update* method is an internal library function that returns a new ``FrozenItems`` with the fields in *changes* replaced on the items at *positions*.  Called by *with_visible* and *with_url*.
+
+        :param positions: The positions of the items to change.
+        :type positions: list[int]
+        :return: A new ``FrozenItems``.
+        :rtype: FrozenItems
+        """
+        items = list(self._items)
+        for position in positions:
+            items[position] = items[position].replace(**changes)
+        return FrozenItems(items)
+
+    def with_visible(self, keys: list | None = None, visible=True, by="name"):
+        """
+        The *with_visible* method returns a new ``FrozenItems`` in which the items whose name, title, url or position, as selected by *by*, is in *keys* have visibility *visible*.  If *keys* is None, every item is changed.
+
+        :param keys: The names, titles, urls or positions of the items to change.
+        :type keys: list
+        :param visible: The visibility to set.
+        :type visible: bool
+        :param by: One of "name", "title", "url" or "position".
+        :type by: str
+        :return: A new ``FrozenItems``.
+        :rtype: FrozenItems
+        """
+        if keys is None:
+            positions = range(len(self._items))
+        else:
+            positions = self.positions(keys, by)
+        return self.update(positions, visible=visible)
+
+    def with_url(self, urls: dict, by: str = "name"):
+        """
+        The *with_url* method returns a new ``FrozenItems`` in which each item whose name, title, url or position, as selected by *by*, is a key in *urls* has the corresponding url.
+
+        :param urls: A dictionary with names, titles, urls or positions as keys and new urls as values.
+        :type urls: dict
+        :param by: One of "name", "title", "url" or "position".
+        :type by: str
+        :return: A new ``FrozenItems``.
+        :rtype: FrozenItems
+        """
+        items = list(self._items)
+        for key, url in urls.items():
+            for position in self.positions([key], by):
+                items[position] = items[position].replace(url=url)
+        return FrozenItems(items)
+
+    def without(self, keys: list, by: str = "name"):
+        """
+        The *without* method returns a new ``FrozenItems`` leaving out the items whose name, title, url or position, as selected by *by*, is in *keys*.
+
+        :param keys: The names, titles, urls or positions of the items to leave out.
+        :type keys: list
+        :param by: One of "name", "title", "url" or "position".
+        :type by: str
+        :return: A new ``FrozenItems``.
+        :rtype: FrozenItems
+        """
+        drop = set(self.positions(keys, by))
+        return FrozenItems(
+            item for position, item in enumerate(self._items) if position not in drop
+        )
+
+    def select(self, keys: list, by: str = "name"):
+        """
+        The *select* method returns a new ``FrozenItems`` holding the items whose name, title, url or position, as selected by *by*, is in *keys*, in the order of *keys*.
+
+        :param keys: The names, titles, urls or positions of the items to keep.
+        :type keys: list
+        :param by: One of "name", "title", "url" or "position".
+        :type by: str
+        :return: A new ``FrozenItems``.
+        :rtype: FrozenItems
+        """
+        return FrozenItems(
+            self._items[position] for position in self.positions(keys, by)
+        )
+
+    def insert(self, idx: int, item):
+        """
+        The *insert* method returns a new ``FrozenItems`` with *item* inserted at position *idx*.
+
+        :param idx: The position at which to insert *item*.
+        :type idx: int
+        :param item: The item to insert.
+        :type item: Item | FrozenItem
+        :return: A new ``FrozenItems``.
+        :rtype: FrozenItems
+        """
+        items = list(self._items)
+        items.insert(idx, item)
+        return FrozenItems(items)
+
+    def append(self, item):
+        """
+        The *append* method returns a new ``FrozenItems`` with *item* added at the end.
+
+        :param item: The item to append.
+        :type item: Item | FrozenItem
+        :return: A new ``FrozenItems``.
+        :rtype: FrozenItems
+        """
+        return FrozenItems(self._items + (FrozenItem.from_item(item),))
+
+    def thaw(self) -> Items:
+        """
+        The *thaw* method converts self into a mutable ``Items`` object.
+
+        :return: An ``Items`` object with a mutable copy of each item.
+        :rtype: Items
+        """
+        return Items([item.thaw() for item in self._items])
+
+    def group(
+        self,
+        name: str,
+        visible: bool = True,
+        cache: GroupCache | None = None,
+        reduction: str | dict | None = None,
+    ):
+        """
+        The *group* method converts the ``FrozenItems`` into a map ``Group`` with name *name*.  If *cache* is provided, the group is reused from the cache when its items are unchanged.
+
+        :param name: Display name of the ``Group`` layer.
+        :type name: str
+        :param visible: A boolean indicating whether the group should be visible.
+        :type visible: bool
+        :param cache: Optional ``GroupCache`` holding groups built earlier.
+        :type cache: mapmakers.cache.GroupCache
+        :param reduction: Optional feature reduction, such as "cluster" or "binning", for items that do not set their own.  It is only applied to layers whose template shows they draw points, since clustering and binning do not apply to lines, polygons or tables.
+        :type reduction: str | dict
+        :return: ``Group`` instance constructed from self.
+        :rtype: Group
+        """
+        return Group.from_items(name, self, visible, cache, reduction)
+
+    def layers(self, cache: GroupCache | None = None):
+        """
+        The *layers* method converts the ``FrozenItems`` into a ``Layers`` object.  If *cache* is provided, the layers are reused from the cache when the items are unchanged.
+
+        :param cache: Optional ``GroupCache`` holding layers built earlier.
+        :type cache: mapmakers.cache.GroupCache
+        :return: ``Layers`` instance constructed from self.
+        :rtype: Layers
+        """
+        return Layers.from_items(self, cache)
+
+    @property
+    def items(self):
+        """
+        The *items* property holds a tuple of ``FrozenItem`` objects.
+        """
+        return self._items
 
 
 @dataclass
@@ -337,12 +891,12 @@ class Layer:
     """
 
     _layer: dict
-    _search: list | None
+    _search: SearchRegistry
     _index: int
 
     __slots__ = ("_layer", "_search", "_index")
 
-    def __init__(self, item: Item, raster=False):
+    def __init__(self, item: Item, raster=False, reduction=None):
         logging.debug("Calling init for Layer.")
         contents = {}
         id = create_layer_id(random.randint(10000, 99999))
@@ -402,15 +956,26 @@ class Layer:
                         contents.update({"popupInfo": popup})
             else:
                 logging.debug("Popup info is 'nan'.")
+        if item.reduction is not None:
+            reduction = item.reduction
+        elif reduction is not None and not is_point(contents.get("layerDefinition")):
+            # a group default only applies to layers known to draw points
+            logging.debug("No feature reduction for %s.", contents.get("title"))
+            reduction = None
+        if reduction is not None and not raster:
+            definition = contents.get("layerDefinition", {})
+            reduction = feature_reduction(reduction)
+            if type(definition) is dict and reduction is not None:
+                # the layer definition may be shared with the template, so it is copied
+                definition = dict(definition)
+                definition.update({"featureReduction": reduction})
+                contents.update({"layerDefinition": definition})
         contents.update({"visibility": item.visible})
         # contents.update({"disablePopup": False})
         self._layer = contents
-        self._search = None
+        self._search = SearchRegistry()
         if item.template is not None:
-            srch = item.template.search
-            if srch is not None:
-                if len(srch) > 0:
-                    self._search = item.template.into_search(id)
+            self._search.extend(item.template.into_search(id))
         self._index = -1
 
     def __next__(self):
@@ -452,10 +1017,10 @@ class Layer:
                 if "ArcGISTiledMapServiceLayer" in layer_def:
                     logging.debug("Tiled map layer.")
                     data.update({"layerType": "ArcGISTiledMapServiceLayer"})
-            if raster.template.search is not None:
-                search = raster.template.search
-        data.update({"maxScale": "None"})
-        data.update({"minScale": "None"})
+            search = raster.template.into_search(raster.template.item_name)
+        # a scale of zero places no limit on the layer
+        data.update({"maxScale": 0})
+        data.update({"minScale": 0})
         data.update({"opacity": 1})
         data.update({"title": raster.title})
         data.update({"url": raster.url})
@@ -482,8 +1047,7 @@ class Layer:
                 if "VectorTileLayer" in layer_def:
                     logging.debug("Vector tile layer.")
                     data.update({"layerType": "VectorTileLayer"})
-            if tile.template.search is not None:
-                search = tile.template.search
+            search = tile.template.into_search(tile.template.item_name)
         data.update({"layerType": "VectorTileLayer"})
         data.update({"opacity": 0.5})
         data.update({"title": tile.title})
@@ -505,10 +1069,7 @@ class Layer:
         """
         layer = Layer(Item("placeholder"))
         layer.layer = group.layers
-        if layer.search is None:
-            layer.search = group.search
-        else:
-            layer.search.extend(group.search)
+        layer.search.extend(group.search)
         return layer
 
     def group(self, name: str):
@@ -536,13 +1097,13 @@ class Layer:
     @property
     def search(self):
         """
-        The *search* property holds a dictionary with search instructions for the ``Layer`` object.
+        The *search* property holds a ``SearchRegistry`` with search instructions for the ``Layer`` object.
         """
         return self._search
 
     @search.setter
     def search(self, items: list):
-        self._search = items
+        self._search = SearchRegistry(items)
 
 
 @dataclass
@@ -552,7 +1113,7 @@ class Layers:
     """
 
     _layers: list[dict]
-    _search: list[dict]
+    _search: SearchRegistry
     _index: int
 
     __slots__ = ("_layers", "_search", "_index")
@@ -571,7 +1132,7 @@ class Layers:
                 case _:
                     logging.warn("Unexpected type: %s", type(content))
         self._layers = items
-        self._search = search
+        self._search = SearchRegistry(search)
         self._index = -1
 
     def __next__(self):
@@ -584,22 +1145,34 @@ class Layers:
         return self
 
     @staticmethod
-    def from_items(items: Items):
+    def from_items(items: Items, cache: GroupCache | None = None):
         """
-        The *from_items* method converts an ``Items`` object *items* into a ``Layers`` object.
+        The *from_items* method converts an ``Items`` object *items* into a ``Layers`` object.  If *cache* is provided, layers built earlier from the same items are reused instead of being rebuilt.
 
         :param items: The ``Items`` object to convert to a ``Layers`` object.
         :type items: Items
+        :param cache: Optional ``GroupCache`` holding layers built earlier.
+        :type cache: mapmakers.cache.GroupCache
         :return: A ``Layers`` object constructed from *items*.
         :rtype: Layers
         """
+        key = None
+        if cache is not None:
+            # no group has a title of None, so the key cannot match a group of the same items
+            key = Group.key(None, items)
+            entry = cache.get(key)
+            if entry is not None:
+                logging.debug("Layers cache hit.")
+                group, search = Group.renew(*entry)
+                return Layers(group["layers"], search)
         layers = []
-        search = []
+        search = SearchRegistry()
         for item in items.items:
             layer = Layer(item)
             layers.append(layer.layer)
-            if layer.search is not None:
-                search.extend(layer.search)
+            search.extend(layer.search)
+        if cache is not None:
+            cache.put(key, {"layers": layers}, search.entries())
         return Layers(layers, search)
 
     @staticmethod
@@ -627,37 +1200,37 @@ class Layers:
         :rtype: Layers
         """
         layers = []
-        search = []
+        search = SearchRegistry()
         for raster in rasters.items:
-            layers.append(Layer.from_raster(raster))
-            if raster.template is not None:
-                tmp = raster.template
-                if tmp.search is not None:
-                    search.extend(tmp.search)
+            layer = Layer.from_raster(raster)
+            layers.append(layer)
+            search.extend(layer.search)
         return Layers(layers, search)
 
     @staticmethod
     def from_vector_tiles(tiles: Items):
         layers = []
-        search = []
+        search = SearchRegistry()
         for tile in tiles.items:
-            layers.append(Layer.from_vector_tile(tile))
-            if tile.template is not None:
-                tmp = tile.template
-                if tmp.search is not None:
-                    search.extend(tmp.search)
+            layer = Layer.from_vector_tile(tile)
+            layers.append(layer)
+            search.extend(layer.search)
         return Layers(layers, search)
 
-    def group(self, name: str, visible: bool = True):
+    def group(self, name: str, visible: bool = True, cache: GroupCache | None = None):
         """
-        The *group* method converts a ``Layers`` object into a ``Group`` object.
+        The *group* method converts a ``Layers`` object into a ``Group`` object.  If *cache* is provided, the group is reused from the cache when its layers are unchanged.
 
         :param name: The display name of the ``Group`` object.
         :type name: str
+        :param visible: A boolean indicating whether the group should be visible.
+        :type visible: bool
+        :param cache: Optional ``GroupCache`` holding groups built earlier.
+        :type cache: mapmakers.cache.GroupCache
         :return: A ``Group`` object constructed from self.
         :rtype: Group
         """
-        return Group.from_layers(name, self, visible)
+        return Group.from_layers(name, self, visible, cache)
 
     def append(self, item):
         """
@@ -791,13 +1364,13 @@ class Layers:
     @property
     def search(self):
         """
-        The *search* property holds a list of dictionaries with the JSON representation of the search fields for each layer in ``Layers``.
+        The *search* property holds a ``SearchRegistry`` with the JSON representation of the search fields for each layer in ``Layers``.
         """
         return self._search
 
     @search.setter
     def search(self, items: list):
-        self._search = items
+        self._search = SearchRegistry(items)
 
 
 @dataclass
@@ -807,7 +1380,7 @@ class Group:
     """
 
     _group: dict
-    _search: list
+    _search: SearchRegistry
     _visible: bool
     _index: int
 
@@ -822,7 +1395,7 @@ class Group:
         group.update({"visibility": visible})
         group.update({"layers": layers})
         self._group = group
-        self._search = search
+        self._search = SearchRegistry(search)
         self._index = -1
 
     def __next__(self):
@@ -836,9 +1409,15 @@ class Group:
         return self
 
     @staticmethod
-    def from_items(name: str, items: Items, visible: bool = True):
+    def from_items(
+        name: str,
+        items: Items,
+        visible: bool = True,
+        cache: GroupCache | None = None,
+        reduction: str | dict | None = None,
+    ):
         """
-        The *from_items* method converts an ``Items`` object *items* into a ``Group`` object.
+        The *from_items* method converts an ``Items`` object *items* into a ``Group`` object.  If *cache* is provided, a group built earlier from the same items and settings is reused instead of being rebuilt.
 
         :param name: The display title of the ``Group`` object.
         :type name: str
@@ -846,17 +1425,125 @@ class Group:
         :type items: Items
         :param visible: A boolean indicating whether the group should be visible.
         :type visible: Bool
+        :param cache: Optional ``GroupCache`` holding groups built earlier.
+        :type cache: mapmakers.cache.GroupCache
+        :param reduction: Optional feature reduction, such as "cluster" or "binning", for items that do not set their own.  It is only applied to layers whose template shows they draw points, since clustering and binning do not apply to lines, polygons or tables.
+        :type reduction: str | dict
         :return: A ``Group`` object constructed from *items*.
         :rtype: Group
         """
+        key = None
+        if cache is not None:
+            key = Group.key(name, items, visible, reduction)
+            entry = cache.get(key)
+            if entry is not None:
+                logging.debug("Group cache hit: %s", name)
+                return Group.from_entry(name, entry, visible)
         layers = []
-        search = []
+        search = SearchRegistry()
         for item in items.items:
-            layer = Layer(item)
+            layer = Layer(item, reduction=reduction)
             layers.append(layer.layer)
-            if layer.search is not None:
-                search.extend(layer.search)
-        return Group(name, layers, search, visible)
+            search.extend(layer.search)
+        group = Group(name, layers, search, visible)
+        if cache is not None:
+            cache.put(key, group.group, group.search.entries())
+        return group
+
+    @staticmethod
+    def from_entry(name: str, entry: tuple[dict, list], visible: bool = True):
+        """
+        The *from_entry* method is an internal library function that converts a group read from a ``GroupCache`` into a ``Group`` object, with new layer ids.  Called by *from_items* and *from_layers*.
+
+        :param name: The display title of the ``Group`` object.
+        :type name: str
+        :param entry: A tuple of the group layer JSON and its search entries.
+        :type entry: tuple[dict, list]
+        :param visible: A boolean indicating whether the group should be visible.
+        :type visible: Bool
+        :return: A ``Group`` object holding the cached group.
+        :rtype: Group
+        """
+        # each use of a cached group needs its own layer ids
+        layers, search = Group.renew(*entry)
+        group = Group(name, [], search, visible)
+        group.group = layers
+        return group
+
+    @staticmethod
+    def renew(group: dict, search: list) -> tuple[dict, list]:
+        """
+        The *renew* method replaces the generated layer ids in the group layer JSON *group* with new ones, and updates the search entries in *search* to match, so that a group read from a ``GroupCache`` can appear in a map more than once.  Ids taken from templates, such as those of raster layers, are kept.  Both arguments are modified in place.  Called by *from_entry* and *Layers.from_items*.
+
+        :param group: The JSON representation of a group layer.
+        :type group: dict
+        :param search: The search entries of the group.
+        :type search: list[dict]
+        :return: A tuple of *group* and *search*.
+        :rtype: tuple[dict, list]
+        """
+        ids = {}
+        stack = [group]
+        while stack:
+            layer = stack.pop()
+            if type(layer) is not dict:
+                continue
+            id = layer.get("id")
+            if type(id) is str and GENERATED_ID.match(id):
+                ids.update({id: create_layer_id(random.randint(10000, 99999))})
+                layer.update({"id": ids[id]})
+            if type(layer.get("layers")) is list:
+                stack.extend(layer["layers"])
+        for entry in search:
+            if entry.get("id") in ids:
+                entry.update({"id": ids[entry["id"]]})
+        return group, search
+
+    @staticmethod
+    def key(
+        name: str,
+        items: Items,
+        visible: bool = True,
+        reduction: str | dict | None = None,
+    ) -> str:
+        """
+        The *key* method returns a hash of the contents of a group: its name and visibility, and the url, settings and template of each item in *items*.  Groups with the same key produce the same layers.  Called by *from_items*.
+
+        :param name: The display title of the group.
+        :type name: str
+        :param items: The items in the group.
+        :type items: Items
+        :param visible: A boolean indicating whether the group should be visible.
+        :type visible: Bool
+        :param reduction: The feature reduction for items that do not set their own.
+        :type reduction: str | dict
+        :return: The hexadecimal digest of the group contents.
+        :rtype: str
+        """
+        contents = []
+        for item in items.items:
+            template = None
+            if item.template is not None:
+                tmp = item.template
+                template = [
+                    tmp.title,
+                    tmp.item_name,
+                    tmp.layer_definition,
+                    tmp.popup_info,
+                    tmp.url,
+                    tmp.search,
+                ]
+            contents.append(
+                [
+                    item.url,
+                    item.visible,
+                    item.title,
+                    item.opacity,
+                    item.reduction,
+                    template,
+                ]
+            )
+        return content_hash([name, visible, reduction, contents])
 
     @staticmethod
     def from_item(name: str, item: Item, visible: bool = True):
@@ -887,27 +1574,57 @@ class Group:
         :rtype: Group
         """
         lyr = list(layer.layer.items())
-        search = []
-        if layer.search is not None:
-            search = layer.search
-        return Group(name, lyr, search, visible)
+        return Group(name, lyr, layer.search, visible)
 
     @staticmethod
-    def from_layers(name: str, layers: Layers, visible: bool = True):
+    def layers_key(name: str, layers: Layers, visible: bool = True) -> str:
         """
-        The *from_layers* method converts a ``Layers`` object *layers* into a ``Group`` object.
+        The *layers_key* method returns a hash of a group built from *layers*: its name and visibility, and the JSON of the layers and their search entries with the generated layer ids left out, since those differ on every build.  Called by *from_layers*.
+
+        :param name: The display title of the group.
+        :type name: str
+        :param layers: The layers in the group.
+        :type layers: Layers
+        :param visible: A boolean indicating whether the group should be visible.
+        :type visible: Bool
+        :return: The hexadecimal digest of the group contents.
+        :rtype: str
+        """
+        contents = json.dumps(
+            [layers.layers, layers.search.entries()],
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str,
+        )
+        return content_hash([name, visible, GENERATED_VALUE.sub('""', contents)])
+
+    @staticmethod
+    def from_layers(
+        name: str, layers: Layers, visible: bool = True, cache: GroupCache | None = None
+    ):
+        """
+        The *from_layers* method converts a ``Layers`` object *layers* into a ``Group`` object.  If *cache* is provided, a group built earlier from the same layers is reused.  The layers themselves are built before this method is called, so pass the same cache to *Items.layers* and *Items.group* to reuse the layers of unchanged items.
 
         :param layers: The ``Layers`` object to convert into a ``Group`` object.
         :type item: Layers
         :param visible: A boolean indicating whether the group should be visible.
         :type visible: Bool
+        :param cache: Optional ``GroupCache`` holding groups built earlier.
+        :type cache: mapmakers.cache.GroupCache
         :return: A ``Group`` object constructed from *layers*.
         :rtype: Group
         """
-        search = []
-        if layers.search is not None:
-            search = layers.search
-        return Group(name, layers.layers, search, visible)
+        key = None
+        if cache is not None:
+            key = Group.layers_key(name, layers, visible)
+            entry = cache.get(key)
+            if entry is not None:
+                logging.debug("Group cache hit: %s", name)
+                return Group.from_entry(name, entry, visible)
+        group = Group(name, layers.layers, layers.search, visible)
+        if cache is not None:
+            cache.put(key, group.group, group.search.entries())
+        return group
 
     def into_layer(self):
         """
@@ -932,13 +1649,13 @@ class Group:
     @property
     def search(self):
         """
-        The *search* property holds the JSON representation of the search fields for the group layer.
+        The *search* property holds a ``SearchRegistry`` with the JSON representation of the search fields for the group layer.
         """
         return self._search
 
     @search.setter
     def search(self, items: list):
-        self._search = items
+        self._search = SearchRegistry(items)
 
 
 @dataclass
@@ -947,17 +1664,31 @@ class Map:
     The ``Map`` class holds layer information and methods for building an ESRI web map.
     """
 
-    _handle: arcgis.gis.Item
+    _handle: arcgis.gis.Item | None
     _layers: list
-    _search: list
+    _search: SearchRegistry
 
     __slots__ = ("_handle", "_layers", "_search")
 
-    def __init__(self, id: str, layers, gis: GIS):
+    def __init__(self, id: str, layers, gis: GIS | None = None):
+        """
+        Creates a new ``Map`` targeting the web map with Item ID *id*.  If *gis* is None, the map is built offline: *to_definition* and *write* are available, but the map cannot be published.
+
+        :param id: The Item ID of the target web map.
+        :type id: str
+        :param layers: The layer information for the map.
+        :type layers: Layers | Group | Layer | Items | Item | dict | list
+        :param gis: An authenticated GIS connection.
+        :type gis: arcgis.gis.GIS
+        :return: Returns the newly created ``Map``.
+        :rtype: Map
+        """
         logging.debug("Calling init for Map.")
-        handle = gis.content.get(id)
+        handle = None
+        if gis is not None:
+            handle = get_cache().get(gis, id)
         lyrs = []
-        search = []
+        search = SearchRegistry()
         logging.debug(type(layers).__name__)
         match type(layers).__name__:
             case "Layers":
@@ -1025,7 +1756,8 @@ class Map:
         :return: Removes layers from web map at `handle` as side effect.
         :rtype: NoneType
         """
-        definition = self._handle.get_data()
+        host = self.host()
+        definition = get_scheduler().call(host, self._handle.get_data)
         if "applicationProperties" in definition:
             if "viewing" in definition["applicationProperties"]:
                 logging.debug("Stripping search terms.")
@@ -1041,60 +1773,291 @@ class Map:
         layers = webmap.layers
         for layer in layers:
             webmap.remove_layer(layer)
-        webmap.update()
+        get_scheduler().call(host, webmap.update)
 
         # Check to see if layers remain, call recursively if so
         if len(webmap.layers) != 0:
             self.clear()
         logging.debug("Layers cleared.")
 
-    def build(self):
+    async def aclear(self):
         """
-        The *build* method attempts to clear and update the target web map in the *handle* property with the layer information in the *layers* property and the search information in the *search* property.
+        The *aclear* method is the asynchronous counterpart to *clear*, running on a worker thread.
 
-        :return: Modifies the target web map as a side effect.
+        :return: Removes layers from web map at `handle` as side effect.
         :rtype: NoneType
         """
-        self.clear()
-        definition = self._handle.get_data()
-        if "operationalLayers" not in definition:
-            logging.debug("Adding operational layers.")
-            definition.update({"operationalLayers": [json.loads(str(self._layers))]})
+        await asyncio.to_thread(self.clear)
+
+    @staticmethod
+    def merge(base: dict, layers: list, search: list | None) -> dict:
+        """
+        The *merge* method returns a copy of the web map definition *base* with its operational layers replaced by *layers* and its search layers replaced by *search*.  All other properties of *base*, such as the basemap, are kept.  Called by *to_definition* and *publish*.
+
+        :param base: The web map definition to build upon.
+        :type base: dict
+        :param layers: The JSON representation of the operational layers.
+        :type layers: list[dict]
+        :param search: The JSON representation of the search fields.
+        :type search: list[dict]
+        :return: The JSON definition of the web map.
+        :rtype: dict
+        """
+        definition = dict(base)
+        definition.update({"operationalLayers": list(layers)})
+        app = dict(definition.get("applicationProperties", {}))
+        viewing = dict(app.get("viewing", {}))
+        viewing.pop("search", None)
+        if search is not None and len(search) > 0:
+            logging.debug("Adding search.")
+            entry = {}
+            entry.update({"enabled": True})
+            entry.update({"disablePlaceFinder": False})
+            entry.update({"hintText": "Address or Fields"})
+            entry.update({"layers": list(search)})
+            viewing.update({"search": entry})
         else:
-            logging.debug("Appending to operational layers.")
-            definition["operationalLayers"].extend(self._layers)
-        if self._search is not None:
-            if len(self._search) > 0:
-                logging.debug("Adding search.")
-                logging.debug(self._search)
-                search = {}
-                search.update({"enabled": True})
-                search.update({"disablePlaceFinder": False})
-                search.update({"hintText": "Address or Fields"})
-                search.update({"layers": self._search})
-                if "applicationProperties" in definition:
-                    if "viewing" in definition["applicationProperties"]:
-                        definition["applicationProperties"]["viewing"].update(
-                            {"search": search}
-                        )
-                    else:
-                        logging.debug("viewing not found.")
-                        definition["applicationProperties"].update(
-                            {"viewing": {"search": search}}
-                        )
-                else:
-                    logging.debug("application properties not found.")
-                    definition.update(
-                        {"applicationProperties": {"viewing": {"search": search}}}
-                    )
-            else:
-                logging.debug("Search field empty.")
-        self._handle.update({"text": str(definition)})
+            logging.debug("Search field empty.")
+        if len(viewing) > 0:
+            app.update({"viewing": viewing})
+        else:
+            app.pop("viewing", None)
+        if len(app) > 0:
+            definition.update({"applicationProperties": app})
+        else:
+            definition.pop("applicationProperties", None)
+        return definition
+
+    def to_definition(
+        self, base: dict | None = None, trim: bool = False, catalog=None
+    ) -> dict:
+        """
+        The *to_definition* method returns the web map JSON for the layer information in the *layers* property and the search information in the *search* property, without contacting the portal.  If *base* is provided, its operational layers and search settings are replaced and its other properties are kept.  If *trim* is `True`, hidden popup fields and default-valued keys are removed with *trim_definition*, and the bytes saved are logged.  If *catalog* is provided, dense feature layers without a scale range are given one with *assign_scales*, and dense point layers without a feature reduction are clustered with *assign_reduction*.
+
+        :param base: Optional web map definition to build upon.
+        :type base: dict
+        :param trim: Trims the payload if true.
+        :type trim: bool
+        :param catalog: Optional ``Catalog`` used to look up feature counts when assigning scale ranges.
+        :type catalog: mapmakers.catalog.Catalog
+        :return: The JSON definition of the web map.
+        :rtype: dict
+        """
+        if base is None:
+            base = {}
+        # search entries are assembled once, from every registry linked to the map
+        definition = Map.merge(base, self._layers, self._search.entries())
+        if catalog is not None:
+            definition, _ = assign_scales(definition, catalog)
+            definition, _ = assign_reduction(definition, catalog)
+        if trim:
+            definition, _ = trim_definition(definition)
+        return definition
+
+    def check_search(
+        self, catalog, drop: bool = False, exact: bool | list[str] = False
+    ) -> dict[str, str]:
+        """
+        The *check_search* method checks the search fields of the map against the fields and attribute indexes of the searched layers, using *check_search* from ``mapmakers.optimize``.  The search entries of the map are replaced by the checked copies, so that fields can be dropped or switched to exact match before the map is built.  The registries of the layers and groups in the map are not changed.
+
+        :param catalog: The ``Catalog`` used to look up layer fields and indexes.
+        :type catalog: mapmakers.catalog.Catalog
+        :param drop: Removes missing and unindexed search fields if true.
+        :type drop: bool
+        :param exact: Switches code-like fields to exact match if true, or the fields named if a list.
+        :type exact: bool | list[str]
+        :return: A dictionary with "<layer id>.<field name>" keys and descriptions of the problems found as values.
+        :rtype: dict[str, str]
+        """
+        urls = {
+            layer.get("id"): layer.get("url")
+            for layer, _ in leaves(self._layers)
+            if type(layer.get("url")) is str
+        }
+        entries, issues = check_search(
+            self._search.entries(), urls, catalog, drop, exact
+        )
+        self._search = SearchRegistry(entries)
+        return issues
+
+    def cost_report(
+        self, budget: dict | None = None, definition: dict | None = None
+    ) -> dict:
+        """
+        The *cost_report* method estimates how heavy the map will be for a viewer when it opens, without contacting the portal.  Layers count as drawn only if they and every group holding them are visible.  See *load_cost* for the figures reported.
+
+        :param budget: Optional limits, with any of the keys "visible", "services", "hosts", "requests" and "bytes".
+        :type budget: dict
+        :param definition: The definition to measure.  Defaults to the result of *to_definition*.
+        :type definition: dict
+        :return: A dictionary describing the cost of the map, listing the figures over *budget* under "exceeded".
+        :rtype: dict
+        """
+        if definition is None:
+            definition = self.to_definition()
+        report = load_cost(definition, budget)
+        logging.info(
+            "%s of %s layers drawn on load, from %s services on %s hosts (%s requests, %s bytes).",
+            report["visible"],
+            report["layers"],
+            report["services"],
+            report["hosts"],
+            report["requests"],
+            report["bytes"],
+        )
+        for title, count in report["groups"].items():
+            logging.debug("%s: %s bytes.", title, count)
+        return report
+
+    def write(self, path: str):
+        """
+        The *write* method saves the web map JSON produced by *to_definition* to a file at *path*, so that it can be inspected, cached or published later with *publish_definition*.
+
+        :param path: The file path of the snapshot.
+        :type path: str
+        :return: Writes the snapshot to *path* as a side effect.
+        :rtype: NoneType
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_definition(), f)
+
+    def publish(self, definition: dict, force: bool = False, manifest=None) -> bool:
+        """
+        The *publish* method replaces the operational layers and search settings of the target web map in the *handle* property with those in *definition*, using a single update.  Called by *build* and *publish_definition*.
+
+        Unless *force* is `True`, publishing is skipped when *definition* has the same hash as the definition recorded for the target in *manifest*, or, without a manifest entry, as the definition currently published.
+
+        :param definition: A web map definition produced by *to_definition*.
+        :type definition: dict
+        :param force: Publish even if the definition is unchanged.
+        :type force: bool
+        :param manifest: Optional ``Manifest`` recording the hash of published definitions.
+        :type manifest: mapmakers.manifest.Manifest
+        :return: Boolean indicating whether the target web map was updated.
+        :rtype: bool
+        """
+        if self._handle is None:
+            logging.warn("Map has no target web map to publish to.")
+            return False
+        id = self._handle.id
+        digest = definition_hash(definition)
+        if not force and manifest is not None and manifest.get(id) == digest:
+            logging.info("Map %s is unchanged since the last publish, skipping.", id)
+            manifest.skip(id, digest)
+            return False
+        host = self.host()
+        current = get_scheduler().call(host, self._handle.get_data)
+        if not force and definition_hash(current) == digest:
+            logging.info("Map %s already matches the definition, skipping.", id)
+            if manifest is not None:
+                manifest.skip(id, digest)
+            return False
+        search = (
+            definition.get("applicationProperties", {})
+            .get("viewing", {})
+            .get("search", {})
+            .get("layers")
+        )
+        definition = Map.merge(current, definition.get("operationalLayers", []), search)
+        get_scheduler().call(
+            host, self._handle.update, {"text": json.dumps(definition)}
+        )
+        get_cache().invalidate(id)
+        if manifest is not None:
+            manifest.publish(id, digest)
+        return True
+
+    def publish_definition(self, path: str, force: bool = False, manifest=None) -> bool:
+        """
+        The *publish_definition* method uploads a web map snapshot saved by *write* to the target web map in the *handle* property, skipping the upload if the target is unchanged as described in *publish*.
+
+        :param path: The file path of the snapshot.
+        :type path: str
+        :param force: Publish even if the definition is unchanged.
+        :type force: bool
+        :param manifest: Optional ``Manifest`` recording the hash of published definitions.
+        :type manifest: mapmakers.manifest.Manifest
+        :return: Boolean indicating whether the target web map was updated.
+        :rtype: bool
+        """
+        with open(path, encoding="utf-8") as f:
+            definition = json.load(f)
+        return self.publish(definition, force, manifest)
+
+    def build(
+        self,
+        force: bool = False,
+        manifest=None,
+        trim: bool = False,
+        catalog=None,
+        budget: dict | None = None,
+    ) -> bool:
+        """
+        The *build* method updates the target web map in the *handle* property with the layer information in the *layers* property and the search information in the *search* property, replacing any existing layers and search settings.  If the definition is unchanged from the published map, or from the hash recorded in *manifest*, the update is skipped unless *force* is `True`.
+
+        :param force: Publish even if the definition is unchanged.
+        :type force: bool
+        :param manifest: Optional ``Manifest`` recording the hash of published definitions.
+        :type manifest: mapmakers.manifest.Manifest
+        :param trim: Trims the payload before publishing, as in *to_definition*.
+        :type trim: bool
+        :param catalog: Optional ``Catalog`` used to assign scale ranges, as in *to_definition*.
+        :type catalog: mapmakers.catalog.Catalog
+        :param budget: Optional limits checked with *cost_report* against the definition to be published.
+        :type budget: dict
+        :return: Boolean indicating whether the target web map was updated.
+        :rtype: bool
+        :raises BudgetExceeded: If any limit in *budget* is exceeded.  The map is not published.
+        """
+        definition = self.to_definition(None, trim, catalog)
+        if budget is not None:
+            report = self.cost_report(budget, definition)
+            if len(report["exceeded"]) > 0:
+                raise BudgetExceeded(report)
+        return self.publish(definition, force, manifest)
+
+    def host(self) -> str:
+        """
+        The *host* method returns the host name of the portal holding the target web map, used to pace requests through the shared ``Scheduler``.
+
+        :return: The host name of the portal.
+        :rtype: str
+        """
+        gis = getattr(self._handle, "_gis", None)
+        return Scheduler.host(getattr(gis, "url", None))
+
+    async def abuild(
+        self,
+        force: bool = False,
+        manifest=None,
+        trim: bool = False,
+        catalog=None,
+        budget: dict | None = None,
+    ) -> bool:
+        """
+        The *abuild* method is the asynchronous counterpart to *build*, running on a worker thread so that several maps can be published concurrently.
+
+        :param force: Publish even if the definition is unchanged.
+        :type force: bool
+        :param manifest: Optional ``Manifest`` recording the hash of published definitions.
+        :type manifest: mapmakers.manifest.Manifest
+        :param trim: Trims the payload before publishing, as in *to_definition*.
+        :type trim: bool
+        :param catalog: Optional ``Catalog`` used to assign scale ranges, as in *to_definition*.
+        :type catalog: mapmakers.catalog.Catalog
+        :param budget: Optional limits checked before publishing, as in *build*.
+        :type budget: dict
+        :return: Boolean indicating whether the target web map was updated.
+        :rtype: bool
+        """
+        return await asyncio.to_thread(
+            self.build, force, manifest, trim, catalog, budget
+        )
 
     @property
     def handle(self):
         """
-        The *handle* property holds the ESRI Item ID of the target web map.
+        The *handle* property holds the ESRI Item of the target web map, or None if the map was created without a GIS connection.
         """
         return self._handle
 
@@ -1116,10 +2079,10 @@ class Map:
     @property
     def search(self):
         """
-        The *search* property holds the search information associated with the web map.
+        The *search* property holds a ``SearchRegistry`` with the search information associated with the web map.
         """
         return self._search
 
     @search.setter
     def search(self, items: list):
-        self._search = items
+        self._search = SearchRegistry(items)
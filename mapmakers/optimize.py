@@ -0,0 +1,813 @@
+from mapmakers.catalog import Catalog
+from mapmakers.scheduler import Scheduler
+import copy
+import json
+import logging
+import re
+
+# keys that may be dropped when they hold the value the web map viewers assume anyway
+DEFAULTS = {
+    "description": [""],
+    "digitSeparator": [False],
+    "expressionInfos": [[]],
+    "featureReduction": [None, "None"],
+    "fieldDelimiter": [","],
+    "isEditable": [True],
+    "mediaInfos": [[]],
+    "stringFieldOption": ["textbox"],
+    "title": [""],
+    "tooltip": [""],
+    "transparency": [0],
+}
+
+# the first rule matching the geometry type of a layer with at least *count* features sets its
+# minimum scale; 72224, 36112, 18056 and 9028 are zoom levels 13 to 16 of the web mercator tiling
+SCALE_RULES = [
+    {"geometry": "esriGeometryPoint", "count": 50000, "minScale": 9028},
+    {"geometry": "esriGeometryPoint", "count": 10000, "minScale": 18056},
+    {"geometry": "esriGeometryPoint", "count": 2000, "minScale": 36112},
+    {"geometry": "esriGeometryPolyline", "count": 50000, "minScale": 18056},
+    {"geometry": "esriGeometryPolyline", "count": 10000, "minScale": 36112},
+    {"geometry": "esriGeometryPolyline", "count": 2000, "minScale": 72224},
+    {"geometry": "esriGeometryPolygon", "count": 20000, "minScale": 18056},
+    {"geometry": "esriGeometryPolygon", "count": 5000, "minScale": 36112},
+    {"geometry": "esriGeometryPolygon", "count": 1000, "minScale": 72224},
+]
+
+# automatic feature reduction for layers matching a rule, in the format of ``SCALE_RULES``
+REDUCTION_RULES = [
+    {"geometry": "esriGeometryPoint", "count": 5000, "reduction": "cluster"},
+]
+
+# symbol types drawn at points
+MARKERS = ["esriSMS", "esriPMS"]
+
+CLUSTER = {
+    "type": "cluster",
+    "clusterRadius": 60,
+    "clusterMinSize": 16.5,
+    "clusterMaxSize": 37.5,
+    "popupEnabled": True,
+    "showLabels": True,
+}
+
+BINNING = {
+    "type": "binning",
+    "binType": "geohash",
+    "fixedBinLevel": 6,
+    "fields": [{"name": "aggregateCount", "alias": "Count", "statisticType": "count"}],
+    "drawingInfo": {
+        "renderer": {
+            "type": "simple",
+            "symbol": {
+                "type": "esriSFS",
+                "style": "esriSFSSolid",
+                "color": [0, 112, 255, 255],
+                "outline": {
+                    "type": "esriSLS",
+                    "style": "esriSLSSolid",
+                    "color": [255, 255, 255, 64],
+                    "width": 0.5,
+                },
+            },
+            "visualVariables": [
+                {
+                    "type": "colorInfo",
+                    "field": "aggregateCount",
+                    "stops": [
+                        {"value": 1, "color": [190, 232, 255, 255]},
+                        {"value": 100, "color": [0, 38, 115, 255]},
+                    ],
+                }
+            ],
+        }
+    },
+    "popupEnabled": True,
+}
+
+# string fields holding codes or identifiers, searched faster by exact match than by a LIKE query
+CODE_FIELD = re.compile(
+    r"(^|_)(id|num|no|code|acct|account|pin|mapnum|mapnumber)$", re.I
+)
+
+FIELD = re.compile(r"\{([^{}]+)\}")
+ARCADE = re.compile(
+    r"""\$feature(?:\.([A-Za-z_][A-Za-z0-9_]*)|\[\s*["']([^"']+)["']\s*\])"""
+)
+# calls naming fields of the feature by string, such as Expects($feature, "A", "B") or DomainName($feature, "A")
+ARCADE_CALL = re.compile(r"\b[A-Za-z]+\(\s*\$feature\s*,([^()]*)\)")
+# keys of the chart values in media infos that name fields as plain strings
+CHART_FIELDS = ["fields", "normalizeField", "tooltipField"]
+STRING = re.compile(r"""["']([^"']*)["']""")
+
+
+class BudgetExceeded(Exception):
+    """
+    The ``BudgetExceeded`` exception is raised by *Map.build* when a map exceeds its load-cost budget.  The *report* attribute holds the report produced by *load_cost*.
+    """
+
+    def __init__(self, report: dict):
+        super().__init__(
+            "Map exceeds budget: {}.".format(", ".join(report["exceeded"]))
+        )
+        self.report = report
+
+
+def size(value) -> int:
+    """
+    Return the number of bytes in the compact JSON representation of *value*.
+
+    :param value: A JSON value.
+    :type value: dict | list
+    :return: The size of *value* in bytes.
+    :rtype: int
+    """
+    return len(json.dumps(value, separators=(",", ":"), default=str).encode("utf-8"))
+
+
+def strip(value):
+    """
+    Return a copy of *value* without keys whose values equal the defaults in ``DEFAULTS``.  Nested dictionaries and lists are copied, so *value* is not modified.
+
+    :param value: A JSON value.
+    :type value: dict | list
+    :return: A copy of *value* without default-valued keys.
+    :rtype: dict | list
+    """
+    match value:
+        case dict():
+            return {
+                key: strip(item)
+                for key, item in value.items()
+                if key not in DEFAULTS or item not in DEFAULTS[key]
+            }
+        case list():
+            return [strip(item) for item in value]
+        case _:
+            return value
+
+
+def references(popup: dict) -> set[str] | None:
+    """
+    Return the lower case names of the fields referenced by the text, expressions, charts and elements of *popup*, other than through the field infos of the popup itself.  Returns None when an expression uses ``$feature`` in a way that does not name its fields, such as ``Expects($feature, "*")`` or assigning it to a variable, since any field may then be referenced.
+
+    :param popup: The JSON representation of a popup.
+    :type popup: dict
+    :return: A set of field names, or None if the referenced fields are unknown.
+    :rtype: set[str] | None
+    """
+    names = set()
+    texts = []
+    stack = [
+        value
+        for key, value in popup.items()
+        if key not in ["fieldInfos", "expressionInfos"]
+    ]
+    while stack:
+        value = stack.pop()
+        match value:
+            case str():
+                texts.append(value)
+            case dict():
+                for key in CHART_FIELDS:
+                    chart = value.get(key)
+                    if type(chart) is str:
+                        chart = [chart]
+                    if type(chart) is list:
+                        names.update(
+                            name.strip().lower() for name in chart if type(name) is str
+                        )
+                if value.get("type") == "fields":
+                    # field infos listed by a fields element are shown, and handled by trim_popup
+                    stack.extend(v for k, v in value.items() if k != "fieldInfos")
+                else:
+                    stack.extend(value.values())
+            case list():
+                stack.extend(value)
+    for text in texts:
+        names.update(name.strip().lower() for name in FIELD.findall(text))
+    for info in popup.get("expressionInfos", []) or []:
+        expression = info.get("expression", "")
+        if type(expression) is not str:
+            continue
+        for arguments in ARCADE_CALL.findall(expression):
+            for name in STRING.findall(arguments):
+                if "*" in name:
+                    return None
+                names.add(name.strip().lower())
+        expression = ARCADE_CALL.sub("", expression)
+        for dotted, quoted in ARCADE.findall(expression):
+            names.add((dotted or quoted).lower())
+        if "$feature" in ARCADE.sub("", expression):
+            logging.debug("Keeping hidden fields for expression %s.", info.get("name"))
+            return None
+    return names
+
+
+def trim_fields(infos: list, keep: set[str]) -> list:
+    """
+    Return the entries of the field infos *infos* that are visible or whose field name is in *keep*.
+
+    :param infos: The field infos of a popup.
+    :type infos: list[dict]
+    :param keep: Lower case names of fields to keep, even if hidden.
+    :type keep: set[str]
+    :return: A list of field infos.
+    :rtype: list[dict]
+    """
+    return [
+        info
+        for info in infos
+        if type(info) is not dict
+        or info.get("visible", True)
+        or str(info.get("fieldName", "")).lower() in keep
+    ]
+
+
+def trim_popup(popup: dict) -> dict:
+    """
+    Return a copy of *popup* without hidden field infos that are not referenced by the popup text or expressions, and without default-valued keys.  Hidden field infos are all kept when the fields referenced by an expression cannot be determined.
+
+    :param popup: The JSON representation of a popup.
+    :type popup: dict
+    :return: The trimmed popup.
+    :rtype: dict
+    """
+    keep = references(popup)
+    trimmed = dict(popup)
+    if keep is None:
+        return strip(trimmed)
+    if type(popup.get("fieldInfos")) is list:
+        trimmed.update({"fieldInfos": trim_fields(popup["fieldInfos"], keep)})
+    if type(popup.get("popupElements")) is list:
+        elements = []
+        for element in popup["popupElements"]:
+            if (
+                type(element) is dict
+                and element.get("type") == "fields"
+                and type(element.get("fieldInfos")) is list
+            ):
+                element = dict(element)
+                element.update({"fieldInfos": trim_fields(element["fieldInfos"], keep)})
+            elements.append(element)
+        trimmed.update({"popupElements": elements})
+    return strip(trimmed)
+
+
+def trim_layer(layer: dict, saved: dict[str, int]) -> dict:
+    """
+    Return a copy of the operational *layer* with its popup and layer definition trimmed, recording the bytes saved by each layer in *saved*.  Called by *trim_definition*.
+
+    :param layer: The JSON representation of an operational layer.
+    :type layer: dict
+    :param saved: A dictionary with layer titles as keys and bytes saved as values, updated as a side effect.
+    :type saved: dict[str, int]
+    :return: The trimmed layer.
+    :rtype: dict
+    """
+    trimmed = dict(layer)
+    if type(layer.get("layers")) is list:
+        trimmed.update(
+            {
+                "layers": [
+                    trim_layer(child, saved) if type(child) is dict else child
+                    for child in layer["layers"]
+                ]
+            }
+        )
+        return trimmed
+    if type(layer.get("popupInfo")) is dict:
+        trimmed.update({"popupInfo": trim_popup(layer["popupInfo"])})
+    if type(layer.get("layerDefinition")) is dict:
+        trimmed.update({"layerDefinition": strip(layer["layerDefinition"])})
+    count = size(layer) - size(trimmed)
+    if count > 0:
+        title = str(layer.get("title", layer.get("id")))
+        saved.update({title: saved.get(title, 0) + count})
+    return trimmed
+
+
+def trim_definition(definition: dict) -> tuple[dict, dict[str, int]]:
+    """
+    The *trim_definition* function returns a copy of the web map *definition* with a smaller payload.  Popup field infos that are hidden and not referenced by the popup title, text, media or expressions are dropped, and keys holding the default values listed in ``DEFAULTS`` are removed from popups and layer definitions.  The *definition* is not modified.
+
+    :param definition: A web map definition, such as one produced by *Map.to_definition*.
+    :type definition: dict
+    :return: A tuple of the trimmed definition and a dictionary with layer titles as keys and the bytes saved as values.
+    :rtype: tuple[dict, dict[str, int]]
+    """
+    saved = {}
+    trimmed = dict(definition)
+    if type(definition.get("operationalLayers")) is list:
+        trimmed.update(
+            {
+                "operationalLayers": [
+                    trim_layer(layer, saved) if type(layer) is dict else layer
+                    for layer in definition["operationalLayers"]
+                ]
+            }
+        )
+    for title, count in sorted(saved.items(), key=lambda item: item[1], reverse=True):
+        logging.debug("Trimmed %s bytes from %s.", count, title)
+    logging.info(
+        "Trimmed %s of %s bytes from the web map.",
+        sum(saved.values()),
+        size(definition),
+    )
+    return trimmed, saved
+
+
+def is_point(definition) -> bool:
+    """
+    Return True if the layer definition *definition* is known to draw points, from its geometry type or, failing that, from the symbols of its renderer.  Clustering and binning only apply to point layers.
+
+    :param definition: The layer definition of a feature layer.
+    :type definition: dict
+    :return: Boolean indicating whether the layer draws points.
+    :rtype: bool
+    """
+    if type(definition) is not dict:
+        return False
+    if "geometryType" in definition:
+        return definition["geometryType"] == "esriGeometryPoint"
+    renderer = definition.get("drawingInfo", {}).get("renderer")
+    symbols = []
+    stack = [renderer]
+    while stack:
+        value = stack.pop()
+        match value:
+            case dict():
+                for key, item in value.items():
+                    if key in ["symbol", "defaultSymbol"] and type(item) is dict:
+                        symbols.append(item)
+                    else:
+                        stack.append(item)
+            case list():
+                stack.extend(value)
+    if len(symbols) == 0:
+        return False
+    return all(
+        symbol.get("type") in MARKERS or "CIMPointSymbol" in json.dumps(symbol)
+        for symbol in symbols
+    )
+
+
+def feature_reduction(reduction: str | dict) -> dict | None:
+    """
+    Return the JSON representation of the feature reduction *reduction*.  The names "cluster" and "binning" select ``CLUSTER`` and ``BINNING``, and a dictionary is used as given.  A new dictionary is returned each time, so it may be modified by the caller.
+
+    :param reduction: The name of a feature reduction, or its JSON representation.
+    :type reduction: str | dict
+    :return: The feature reduction, or None if *reduction* is not recognized.
+    :rtype: dict | None
+    """
+    match reduction:
+        case "cluster":
+            return copy.deepcopy(CLUSTER)
+        case "binning":
+            return copy.deepcopy(BINNING)
+        case dict():
+            return copy.deepcopy(reduction)
+        case _:
+            logging.warn("Unknown feature reduction %s.", reduction)
+            return None
+
+
+def match_rule(geometry: str | None, count: int, rules: list[dict]) -> dict | None:
+    """
+    Return the first rule in *rules* that applies to a layer with geometry type *geometry* and *count* features.  A rule without a "geometry" key applies to every geometry type.
+
+    :param geometry: The geometry type of the layer, such as "esriGeometryPoint".
+    :type geometry: str
+    :param count: The number of features in the layer.
+    :type count: int
+    :param rules: Rules in the format of ``SCALE_RULES`` or ``REDUCTION_RULES``.
+    :type rules: list[dict]
+    :return: The matching rule, or None if no rule applies.
+    :rtype: dict | None
+    """
+    for rule in rules:
+        if rule.get("geometry", geometry) == geometry and count >= rule["count"]:
+            return rule
+    return None
+
+
+def layer_stats(layer: dict, catalog) -> tuple[int, str | None] | None:
+    """
+    Return the feature count and geometry type of the operational *layer*, read through *catalog*, or None if *layer* is not a feature layer or the count is unavailable.
+
+    :param layer: The JSON representation of an operational layer.
+    :type layer: dict
+    :param catalog: The ``Catalog`` used to look up feature counts and geometry types.
+    :type catalog: mapmakers.catalog.Catalog
+    :return: A tuple of the feature count and geometry type.
+    :rtype: tuple[int, str | None] | None
+    """
+    url = layer.get("url")
+    if layer.get("layerType") != "ArcGISFeatureLayer" or type(url) is not str:
+        return None
+    count = catalog.count(url)
+    if count is None:
+        return None
+    metadata = catalog.layer(url)
+    geometry = None
+    if metadata is not None:
+        geometry = metadata.get("geometryType")
+    return count, geometry
+
+
+def service_scales(layer: dict, catalog) -> tuple[float, float]:
+    """
+    Return the minimum and maximum scales set on the service of the operational *layer*, read through *catalog*, with 0 where no limit is set.  Called by *scale_layer*.
+
+    :param layer: The JSON representation of an operational layer.
+    :type layer: dict
+    :param catalog: The ``Catalog`` used to look up layer metadata.
+    :type catalog: mapmakers.catalog.Catalog
+    :return: A tuple of the minimum and maximum scale.
+    :rtype: tuple[float, float]
+    """
+    metadata = catalog.layer(layer.get("url"))
+    if metadata is None:
+        return 0, 0
+    return metadata.get("minScale") or 0, metadata.get("maxScale") or 0
+
+
+def has_scales(layer: dict) -> bool:
+    """
+    Return True if the operational *layer* or its layer definition already limits the scales at which it draws.
+
+    :param layer: The JSON representation of an operational layer.
+    :type layer: dict
+    :return: Boolean indicating whether a scale range is set.
+    :rtype: bool
+    """
+    sources = [layer]
+    if type(layer.get("layerDefinition")) is dict:
+        sources.append(layer["layerDefinition"])
+    for source in sources:
+        for key in ["minScale", "maxScale"]:
+            if source.get(key) not in [None, 0, "None", ""]:
+                return True
+    return False
+
+
+def scale_layer(
+    layer: dict, catalog, rules: list[dict], overwrite: bool, assigned: dict
+) -> dict:
+    """
+    Return a copy of the operational *layer* with a minimum scale assigned by *rules*, recording the scales assigned in *assigned*.  A scale range set on the service is kept if it is tighter than the rule, since scales in the web map override those of the service.  Called by *assign_scales*.
+
+    :param layer: The JSON representation of an operational layer.
+    :type layer: dict
+    :param catalog: The ``Catalog`` used to look up feature counts and geometry types.
+    :type catalog: mapmakers.catalog.Catalog
+    :param rules: Rules in the format of ``SCALE_RULES``.
+    :type rules: list[dict]
+    :param overwrite: Replaces scale ranges already set if true.
+    :type overwrite: bool
+    :param assigned: A dictionary with layer titles as keys and minimum scales as values, updated as a side effect.
+    :type assigned: dict
+    :return: The layer, copied if changed.
+    :rtype: dict
+    """
+    if type(layer.get("layers")) is list:
+        scaled = dict(layer)
+        scaled.update(
+            {
+                "layers": [
+                    (
+                        scale_layer(child, catalog, rules, overwrite, assigned)
+                        if type(child) is dict
+                        else child
+                    )
+                    for child in layer["layers"]
+                ]
+            }
+        )
+        return scaled
+    if not overwrite and has_scales(layer):
+        return layer
+    stats = layer_stats(layer, catalog)
+    if stats is None:
+        return layer
+    count, geometry = stats
+    rule = match_rule(geometry, count, rules)
+    if rule is None:
+        return layer
+    minimum, maximum = service_scales(layer, catalog)
+    if 0 < minimum <= rule["minScale"]:
+        logging.debug("%s already draws from 1:%s.", layer.get("title"), minimum)
+        return layer
+    scaled = dict(layer)
+    scaled.update(
+        {
+            "minScale": rule["minScale"],
+            "maxScale": max(rule.get("maxScale", 0), maximum),
+        }
+    )
+    title = str(layer.get("title", layer.get("id")))
+    assigned.update({title: rule["minScale"]})
+    logging.debug(
+        "%s has %s features, drawing from 1:%s.", title, count, rule["minScale"]
+    )
+    return scaled
+
+
+def assign_scales(
+    definition: dict,
+    catalog,
+    rules: list[dict] | None = None,
+    overwrite: bool = False,
+) -> tuple[dict, dict[str, int]]:
+    """
+    The *assign_scales* function returns a copy of the web map *definition* in which dense feature layers only draw when zoomed in.  The feature count and geometry type of each feature layer are read through *catalog*, which caches the responses, and the first rule in *rules* matching the layer sets its minimum scale.  Layers that already have a scale range keep it unless *overwrite* is `True`.  The *definition* is not modified.
+
+    :param definition: A web map definition, such as one produced by *Map.to_definition*.
+    :type definition: dict
+    :param catalog: The ``Catalog`` used to look up feature counts and geometry types.
+    :type catalog: mapmakers.catalog.Catalog
+    :param rules: Rules with the keys "geometry", "count" and "minScale", and optionally "maxScale".  Defaults to ``SCALE_RULES``.
+    :type rules: list[dict]
+    :param overwrite: Replaces scale ranges already set if true.
+    :type overwrite: bool
+    :return: A tuple of the new definition and a dictionary with layer titles as keys and the minimum scales assigned as values.
+    :rtype: tuple[dict, dict[str, int]]
+    """
+    if rules is None:
+        rules = SCALE_RULES
+    assigned = {}
+    scaled = dict(definition)
+    if type(definition.get("operationalLayers")) is list:
+        scaled.update(
+            {
+                "operationalLayers": [
+                    (
+                        scale_layer(layer, catalog, rules, overwrite, assigned)
+                        if type(layer) is dict
+                        else layer
+                    )
+                    for layer in definition["operationalLayers"]
+                ]
+            }
+        )
+    logging.info("Assigned scale ranges to %s layers.", len(assigned))
+    return scaled, assigned
+
+
+def reduce_layer(
+    layer: dict, catalog, rules: list[dict], overwrite: bool, assigned: dict
+) -> dict:
+    """
+    Return a copy of the operational *layer* with a feature reduction assigned by *rules*, recording the reductions assigned in *assigned*.  Called by *assign_reduction*.
+
+    :param layer: The JSON representation of an operational layer.
+    :type layer: dict
+    :param catalog: The ``Catalog`` used to look up feature counts and geometry types.
+    :type catalog: mapmakers.catalog.Catalog
+    :param rules: Rules in the format of ``REDUCTION_RULES``.
+    :type rules: list[dict]
+    :param overwrite: Replaces feature reductions already set if true.
+    :type overwrite: bool
+    :param assigned: A dictionary with layer titles as keys and reduction types as values, updated as a side effect.
+    :type assigned: dict
+    :return: The layer, copied if changed.
+    :rtype: dict
+    """
+    if type(layer.get("layers")) is list:
+        reduced = dict(layer)
+        reduced.update(
+            {
+                "layers": [
+                    (
+                        reduce_layer(child, catalog, rules, overwrite, assigned)
+                        if type(child) is dict
+                        else child
+                    )
+                    for child in layer["layers"]
+                ]
+            }
+        )
+        return reduced
+    definition = layer.get("layerDefinition", {})
+    if type(definition) is not dict:
+        return layer
+    if not overwrite and type(definition.get("featureReduction")) is dict:
+        return layer
+    stats = layer_stats(layer, catalog)
+    if stats is None:
+        return layer
+    count, geometry = stats
+    rule = match_rule(geometry, count, rules)
+    if rule is None:
+        return layer
+    reduction = feature_reduction(rule["reduction"])
+    if reduction is None:
+        return layer
+    definition = dict(definition)
+    definition.update({"featureReduction": reduction})
+    reduced = dict(layer)
+    reduced.update({"layerDefinition": definition})
+    title = str(layer.get("title", layer.get("id")))
+    assigned.update({title: reduction["type"]})
+    logging.debug("%s has %s features, using %s.", title, count, reduction["type"])
+    return reduced
+
+
+def assign_reduction(
+    definition: dict,
+    catalog,
+    rules: list[dict] | None = None,
+    overwrite: bool = False,
+) -> tuple[dict, dict[str, str]]:
+    """
+    The *assign_reduction* function returns a copy of the web map *definition* in which dense feature layers are drawn as clusters or bins.  The feature count and geometry type of each feature layer are read through *catalog*, and the first rule in *rules* matching the layer sets its feature reduction.  Layers that already have a feature reduction keep it unless *overwrite* is `True`.  The *definition* is not modified.
+
+    :param definition: A web map definition, such as one produced by *Map.to_definition*.
+    :type definition: dict
+    :param catalog: The ``Catalog`` used to look up feature counts and geometry types.
+    :type catalog: mapmakers.catalog.Catalog
+    :param rules: Rules with the keys "geometry", "count" and "reduction", where "reduction" is a value accepted by *feature_reduction*.  Defaults to ``REDUCTION_RULES``.
+    :type rules: list[dict]
+    :param overwrite: Replaces feature reductions already set if true.
+    :type overwrite: bool
+    :return: A tuple of the new definition and a dictionary with layer titles as keys and the reduction types assigned as values.
+    :rtype: tuple[dict, dict[str, str]]
+    """
+    if rules is None:
+        rules = REDUCTION_RULES
+    assigned = {}
+    reduced = dict(definition)
+    if type(definition.get("operationalLayers")) is list:
+        reduced.update(
+            {
+                "operationalLayers": [
+                    (
+                        reduce_layer(layer, catalog, rules, overwrite, assigned)
+                        if type(layer) is dict
+                        else layer
+                    )
+                    for layer in definition["operationalLayers"]
+                ]
+            }
+        )
+    logging.info("Assigned feature reduction to %s layers.", len(assigned))
+    return reduced, assigned
+
+
+def leaves(layers: list, visible: bool = True):
+    """
+    Yield each layer in *layers* that is not a group, descending into group layers, together with a boolean indicating whether it is drawn when the map opens.  A layer is drawn only if it and every group containing it are visible.
+
+    :param layers: The JSON representation of operational layers.
+    :type layers: list[dict]
+    :param visible: Whether the group holding *layers* is drawn.
+    :type visible: bool
+    :return: A generator of tuples of a layer and its effective visibility.
+    :rtype: generator
+    """
+    stack = [(layer, visible) for layer in reversed(layers)]
+    while stack:
+        layer, parent = stack.pop()
+        if type(layer) is not dict:
+            continue
+        shown = parent and layer.get("visibility", True) is True
+        if type(layer.get("layers")) is list:
+            stack.extend((child, shown) for child in reversed(layer["layers"]))
+        else:
+            yield layer, shown
+
+
+def load_cost(definition: dict, budget: dict | None = None) -> dict:
+    """
+    The *load_cost* function estimates the cost of opening the web map *definition* in a viewer.  The report holds the number of layers, the number of layers drawn when the map opens, the services and hosts those layers are read from, the requests needed to draw them, and the size of the definition in bytes, in total and for each top level layer or group.  If *budget* is provided, the figures that exceed it are listed under "exceeded".
+
+    :param definition: A web map definition, such as one produced by *Map.to_definition*.
+    :type definition: dict
+    :param budget: Optional limits, with any of the keys "visible", "services", "hosts", "requests" and "bytes".
+    :type budget: dict
+    :return: A dictionary describing the cost of the web map.
+    :rtype: dict
+    """
+    layers = definition.get("operationalLayers", [])
+    total = 0
+    visible = 0
+    services = set()
+    hosts = set()
+    for layer, shown in leaves(layers):
+        total += 1
+        if not shown:
+            continue
+        visible += 1
+        url = layer.get("url", layer.get("styleUrl"))
+        if type(url) is str:
+            services.add(Catalog.root(url).lower())
+            hosts.add(Scheduler.host(url))
+    groups = {}
+    for layer in layers:
+        if type(layer) is dict:
+            title = str(layer.get("title", layer.get("id")))
+            groups.update({title: groups.get(title, 0) + size(layer)})
+    report = {
+        "layers": total,
+        "visible": visible,
+        "services": len(services),
+        "hosts": len(hosts),
+        # one metadata request per service, and one query per layer drawn
+        "requests": len(services) + visible,
+        "bytes": size(definition),
+        "groups": groups,
+        "exceeded": [],
+    }
+    if budget is not None:
+        for key, limit in budget.items():
+            if key not in report or type(report[key]) is not int:
+                logging.warn("Unknown budget figure %s.", key)
+            elif report[key] > limit:
+                logging.warn("Map exceeds budget: %s %s > %s.", key, report[key], limit)
+                report["exceeded"].append(key)
+    return report
+
+
+def check_search(
+    entries: list[dict],
+    urls: dict[str, str],
+    catalog,
+    drop: bool = False,
+    exact: bool | list[str] = False,
+) -> tuple[list[dict], dict[str, str]]:
+    """
+    The *check_search* function checks the search *entries* of a web map against the field and index metadata of the searched layers, read through *catalog*.  Search fields missing from the layer or without an attribute index are reported, and removed if *drop* is `True`.  Layers that do not publish their fields, such as service roots, are not checked, and layers that do not publish their indexes are not checked for indexes.  Numeric fields are switched to exact match, since they cannot be searched with a LIKE query.  If *exact* is `True`, string fields named like codes or identifiers, as matched by ``CODE_FIELD``, are switched to exact match, and if *exact* is a list, the fields it names are switched instead.  The field of each entry is copied before it is changed, so *entries* is not modified.
+
+    :param entries: Search entries in the format produced by *TemplateItem.into_search*.
+    :type entries: list[dict]
+    :param urls: A dictionary with layer ids as keys and layer urls as values.
+    :type urls: dict[str, str]
+    :param catalog: The ``Catalog`` used to look up layer fields and indexes.
+    :type catalog: mapmakers.catalog.Catalog
+    :param drop: Removes missing and unindexed search fields if true.
+    :type drop: bool
+    :param exact: Switches code-like fields to exact match if true, or the fields named if a list.
+    :type exact: bool | list[str]
+    :return: A tuple of the checked entries and a dictionary with "<layer id>.<field name>" keys and descriptions of the problems found as values.
+    :rtype: tuple[list[dict], dict[str, str]]
+    """
+    if type(exact) is list:
+        exact = [name.lower() for name in exact]
+    checked = []
+    issues = {}
+    for entry in entries:
+        field = dict(entry.get("field", {}))
+        name = str(field.get("name", ""))
+        key = "{}.{}".format(entry.get("id"), name)
+        url = urls.get(entry.get("id"))
+        metadata = None
+        if url is not None:
+            metadata = catalog.layer(url)
+        if metadata is None or type(metadata.get("fields")) is not list:
+            # service roots and raster layers do not list fields, so the field cannot be checked
+            logging.debug("No field metadata for search field %s.", key)
+            checked.append(entry)
+            continue
+        fields = {
+            str(info.get("name", "")).lower(): info for info in metadata["fields"]
+        }
+        info = fields.get(name.lower())
+        if info is None:
+            issues.update({key: "missing"})
+            logging.warn("Search field %s is not in %s.", key, url)
+            if not drop:
+                checked.append(entry)
+            continue
+        if "indexes" in metadata:
+            indexed = set()
+            for index in metadata.get("indexes", []) or []:
+                indexed.update(
+                    column.strip().lower()
+                    for column in str(index.get("fields", "")).split(",")
+                )
+            if name.lower() not in indexed:
+                issues.update({key: "unindexed"})
+                logging.warn("Search field %s has no attribute index.", key)
+                if drop:
+                    continue
+        kind = info.get("type")
+        if kind is not None:
+            field.update({"type": kind})
+        match exact:
+            case list():
+                code = name.lower() in exact
+            case True:
+                code = CODE_FIELD.search(name) is not None
+            case _:
+                code = False
+        if (kind is not None and kind != "esriFieldTypeString") or code:
+            field.update({"exactMatch": True})
+        if field != entry.get("field"):
+            entry = dict(entry)
+            entry.update({"field": field})
+        checked.append(entry)
+    logging.info(
+        "Checked %s search fields, %s with problems.", len(entries), len(issues)
+    )
+    return checked, issues
@@ -0,0 +1,253 @@
+from dataclasses import dataclass
+from urllib.parse import urlparse
+import logging
+import random
+import re
+import requests
+import threading
+import time
+
+THROTTLED = [429, 503]
+# the arcgis package reports the status in the message, as in "Error Code: 429"
+THROTTLED_MESSAGE = re.compile(
+    r"(error code|status code|status)\W*\b(429|503)\b|too many requests|service unavailable",
+    re.I,
+)
+
+
+@dataclass
+class Scheduler:
+    """
+    The ``Scheduler`` class paces requests to portals and services with a token bucket per host, and retries throttled requests with jittered exponential backoff.
+    """
+
+    _rate: float
+    _burst: int
+    _retries: int
+    _backoff: float
+    _max_backoff: float
+    _rates: dict[str, float]
+    _buckets: dict[str, tuple[float, float]]
+    _counters: dict[str, int]
+    _lock: threading.Lock
+
+    __slots__ = (
+        "_rate",
+        "_burst",
+        "_retries",
+        "_backoff",
+        "_max_backoff",
+        "_rates",
+        "_buckets",
+        "_counters",
+        "_lock",
+    )
+
+    def __init__(
+        self,
+        rate: float = 10,
+        burst: int = 10,
+        retries: int = 5,
+        backoff: float = 1,
+        max_backoff: float = 60,
+    ):
+        """
+        Creates a new ``Scheduler``.
+
+        :param rate: Default number of requests per second allowed for each host.
+        :type rate: float
+        :param burst: Number of requests that may be sent to a host at once before pacing begins.
+        :type burst: int
+        :param retries: Maximum number of times to retry a throttled request.
+        :type retries: int
+        :param backoff: Base delay in seconds before the first retry.  The delay doubles with each retry.
+        :type backoff: float
+        :param max_backoff: Maximum delay in seconds between retries.
+        :type max_backoff: float
+        :return: Returns the newly created ``Scheduler``.
+        :rtype: Scheduler
+        """
+        self._rate = rate
+        self._burst = burst
+        self._retries = retries
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._rates = {}
+        self._buckets = {}
+        self._counters = {"requests": 0, "throttled": 0, "retried": 0, "failed": 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host(url) -> str:
+        """
+        The *host* method returns the host name of *url*, used as the key for rate limiting.  Returns "portal" if *url* has no host.
+
+        :param url: A url, or None.
+        :type url: str
+        :return: The host name.
+        :rtype: str
+        """
+        netloc = urlparse(str(url)).netloc
+        if netloc == "":
+            return "portal"
+        return netloc
+
+    @staticmethod
+    def throttled(result) -> bool:
+        """
+        The *throttled* method returns `True` if *result* is a response or exception indicating that the server throttled the request.
+
+        :param result: A ``requests.Response`` or an exception raised by a request.
+        :type result: requests.Response | Exception
+        :return: Boolean indicating whether the request was throttled.
+        :rtype: bool
+        """
+        if isinstance(result, Exception):
+            response = getattr(result, "response", None)
+            if getattr(response, "status_code", None) is not None:
+                return response.status_code in THROTTLED
+            # item ids and urls in the message may contain the digits of a status code
+            return THROTTLED_MESSAGE.search(str(result)) is not None
+        return getattr(result, "status_code", None) in THROTTLED
+
+    def limit(self, host: str, rate: float):
+        """
+        The *limit* method sets the number of requests per second allowed for *host*, overriding the default *rate*.
+
+        :param host: The host name.
+        :type host: str
+        :param rate: Number of requests per second.
+        :type rate: float
+        :return: Modifies self as a side effect.
+        :rtype: NoneType
+        """
+        with self._lock:
+            self._rates.update({host: rate})
+
+    def acquire(self, host: str):
+        """
+        The *acquire* method blocks until the token bucket for *host* allows another request.  Called by *call*.
+
+        :param host: The host name.
+        :type host: str
+        :return: Waits as a side effect.
+        :rtype: NoneType
+        """
+        rate = self._rates.get(host, self._rate)
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(host, (self._burst, now))
+            tokens = min(self._burst, tokens + (now - last) * rate)
+            # reserve a token now, waiting for it to accrue if the bucket is empty
+            tokens -= 1
+            self._buckets.update({host: (tokens, now)})
+            self._counters["requests"] += 1
+        if tokens < 0:
+            time.sleep(-tokens / rate)
+
+    def call(self, host: str, fn, *args, **kwargs):
+        """
+        The *call* method calls *fn* with *args* and *kwargs* once the rate limit for *host* allows, retrying with jittered exponential backoff while the server reports the request as throttled.
+
+        :param host: The host name used for rate limiting.
+        :type host: str
+        :param fn: The function making the request.
+        :type fn: function
+        :return: The return value of *fn*.  If every attempt is throttled, the last response is returned, or the last exception is raised.
+        """
+        attempt = 0
+        while True:
+            self.acquire(host)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not Scheduler.throttled(e):
+                    raise
+                result = e
+            if not Scheduler.throttled(result):
+                return result
+            with self._lock:
+                self._counters["throttled"] += 1
+            if attempt >= self._retries:
+                logging.warn("Request to %s failed after %s retries.", host, attempt)
+                with self._lock:
+                    self._counters["failed"] += 1
+                if isinstance(result, Exception):
+                    raise result
+                return result
+            delay = min(self._max_backoff, self._backoff * 2**attempt)
+            delay = delay * random.uniform(0.5, 1.5)
+            retry_after = getattr(result, "headers", {}).get("Retry-After")
+            if retry_after is not None and str(retry_after).isdigit():
+                delay = max(delay, float(retry_after))
+            logging.info("Request to %s throttled, retrying in %.1fs.", host, delay)
+            with self._lock:
+                self._counters["retried"] += 1
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        The *get* method sends a "GET" request to *url* through *call*.
+
+        :param url: The target url.
+        :type url: str
+        :return: The response to the request.
+        :rtype: requests.Response
+        """
+        return self.call(Scheduler.host(url), requests.get, url, **kwargs)
+
+    def reset(self):
+        """
+        The *reset* method sets all counters back to zero.
+
+        :return: Modifies self as a side effect.
+        :rtype: NoneType
+        """
+        with self._lock:
+            for key in self._counters:
+                self._counters[key] = 0
+
+    @property
+    def counters(self):
+        """
+        The *counters* property holds the number of requests sent, throttled, retried and failed.
+        """
+        return dict(self._counters)
+
+    @property
+    def rate(self):
+        """
+        The *rate* property holds the default number of requests per second allowed for each host.
+        """
+        return self._rate
+
+    @rate.setter
+    def rate(self, value: float):
+        self._rate = value
+
+
+_scheduler = Scheduler()
+
+
+def get_scheduler() -> Scheduler:
+    """
+    Return the ``Scheduler`` shared by the library.  Portal and service requests made by the library are paced through this scheduler.
+
+    :return: The shared scheduler.
+    :rtype: Scheduler
+    """
+    return _scheduler
+
+
+def set_scheduler(scheduler: Scheduler):
+    """
+    Replace the ``Scheduler`` shared by the library, for example with one using a different request budget.
+
+    :param scheduler: The scheduler to share.
+    :type scheduler: Scheduler
+    :return: Sets the shared scheduler as a side effect.
+    :rtype: NoneType
+    """
+    global _scheduler
+    _scheduler = scheduler
@@ -0,0 +1,107 @@
+from dataclasses import dataclass
+import logging
+
+
+@dataclass
+class SearchRegistry:
+    """
+    The ``SearchRegistry`` class tracks the search entries of a layer, group or map.  Nesting a layer inside a group links the registry of the layer to the registry of the group instead of copying its entries, so each entry is held once, and the entries of a map are assembled a single time when the map is built.
+    """
+
+    _parts: list
+
+    __slots__ = "_parts"
+
+    def __init__(self, search=None):
+        """
+        Creates a new ``SearchRegistry``.
+
+        :param search: Optional search entries, or a ``SearchRegistry`` to link.
+        :type search: list[dict] | SearchRegistry
+        :return: Returns the newly created ``SearchRegistry``.
+        :rtype: SearchRegistry
+        """
+        self._parts = []
+        self.extend(search)
+
+    @staticmethod
+    def key(entry: dict) -> tuple:
+        """
+        The *key* method returns the layer id and field name of a search *entry*, used to de-duplicate entries.
+
+        :param entry: A search entry in the format produced by *TemplateItem.into_search*.
+        :type entry: dict
+        :return: A tuple of the layer id and field name.
+        :rtype: tuple
+        """
+        return (entry.get("id"), entry.get("field", {}).get("name"))
+
+    def append(self, entry: dict):
+        """
+        The *append* method adds a single search entry to the registry.
+
+        :param entry: A search entry.
+        :type entry: dict
+        :return: Modifies and returns self.
+        :rtype: SearchRegistry
+        """
+        self._parts.append(entry)
+        return self
+
+    def extend(self, search):
+        """
+        The *extend* method adds the entries in *search* to the registry.  If *search* is a ``SearchRegistry``, it is linked rather than copied, so entries added to it later are included as well.
+
+        :param search: Search entries, or a ``SearchRegistry`` to link.
+        :type search: list[dict] | SearchRegistry | None
+        :return: Modifies and returns self.
+        :rtype: SearchRegistry
+        """
+        match type(search).__name__:
+            case "NoneType":
+                pass
+            case "SearchRegistry":
+                if search is self:
+                    logging.warn("Cannot link a search registry to itself.")
+                else:
+                    self._parts.append(search)
+            case _:
+                self._parts.extend(search)
+        return self
+
+    def entries(self) -> list[dict]:
+        """
+        The *entries* method assembles the search entries of the registry and every registry linked to it, in the order they were added.  Entries with the same layer id and field name are included once.
+
+        :return: A list of search entries.
+        :rtype: list[dict]
+        """
+        entries = []
+        seen = set()
+        visited = set()
+        stack = [iter(self._parts)]
+        visited.add(id(self))
+        while stack:
+            part = next(stack[-1], None)
+            if part is None:
+                stack.pop()
+                continue
+            if isinstance(part, SearchRegistry):
+                # a registry reachable along two paths is only walked once
+                if id(part) not in visited:
+                    visited.add(id(part))
+                    stack.append(iter(part._parts))
+                continue
+            key = SearchRegistry.key(part)
+            if key in seen:
+                logging.debug("Duplicate search entry %s.", key)
+                continue
+            seen.add(key)
+            entries.append(part)
+        return entries
+
+    def __iter__(self):
+        return iter(self.entries())
+
+    def __len__(self):
+        return len(self.entries())
@@ -0,0 +1,316 @@
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from mapmakers.map import Map
+from mapmakers.optimize import BudgetExceeded
+import json
+import logging
+import socketserver
+import threading
+import time
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    The ``Handler`` class answers requests to a ``BuildServer``.  "GET /status" reports the loaded templates and request counts, "POST /build/<name>" runs the builder *name*, and "POST /reload" reloads the templates.  A build whose map exceeds the "budget" of the request is answered with status 409 and the cost report.
+    """
+
+    def address_string(self) -> str:
+        # clients on a Unix socket have no address
+        if type(self.client_address) is tuple and len(self.client_address) > 0:
+            return str(self.client_address[0])
+        return "local"
+
+    def log_message(self, format, *args):
+        logging.debug(format, *args)
+
+    def reply(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/status":
+            self.reply(200, self.server.build_server.status())
+        else:
+            self.reply(404, {"error": "Unknown path {}.".format(self.path)})
+
+    def do_POST(self):
+        server = self.server.build_server
+        length = int(self.headers.get("Content-Length", 0))
+        body = {}
+        if length > 0:
+            try:
+                body = json.loads(self.rfile.read(length))
+            except json.JSONDecodeError:
+                self.reply(400, {"error": "Request body must be JSON."})
+                return
+        path = self.path.strip("/").split("/")
+        try:
+            match path:
+                case ["reload"]:
+                    server.reload()
+                    self.reply(200, server.status())
+                case ["build", name]:
+                    target = body.get("target") or server.target
+                    if body.get("publish", True) and target is None:
+                        self.reply(400, {"error": "Publishing needs a target."})
+                        return
+                    result = server.build(
+                        name,
+                        target,
+                        body.get("publish", True),
+                        body.get("force", False),
+                        body.get("params"),
+                        body.get("trim", False),
+                        body.get("budget"),
+                    )
+                    if result is None:
+                        self.reply(404, {"error": "Unknown builder {}.".format(name)})
+                    else:
+                        self.reply(200, result)
+                case _:
+                    self.reply(404, {"error": "Unknown path {}.".format(self.path)})
+        except BudgetExceeded as e:
+            self.reply(409, {"error": str(e), "report": e.report})
+        except Exception as e:
+            logging.warn("Request %s failed: %s", self.path, e)
+            self.reply(500, {"error": str(e)})
+
+
+@dataclass
+class BuildServer:
+    """
+    The ``BuildServer`` class keeps templates and a portal session loaded in a long-lived process, and builds or publishes maps on request over local HTTP or a Unix socket, so repeated builds do not pay for starting Python and reading workbooks each time.
+    """
+
+    _builders: dict
+    _loader: object
+    _templates: object
+    _gis: object
+    _manifest: object
+    _target: str | None
+    _lock: threading.Lock
+    _server: socketserver.BaseServer | None
+    _counters: dict[str, int]
+
+    __slots__ = (
+        "_builders",
+        "_loader",
+        "_templates",
+        "_gis",
+        "_manifest",
+        "_target",
+        "_lock",
+        "_server",
+        "_counters",
+    )
+
+    def __init__(
+        self, builders: dict, loader, gis=None, manifest=None, target: str | None = None
+    ):
+        """
+        Creates a new ``BuildServer`` and loads the templates.
+
+        :param builders: A dictionary with builder names as keys and functions as values.  Each function is called with the loaded templates and the *params* of the request as keyword arguments, and returns the layers of a map.
+        :type builders: dict
+        :param loader: A function taking no arguments that returns the templates, such as a call to *Templates.from_workbook*.
+        :type loader: function
+        :param gis: An authenticated GIS connection, used to publish maps.
+        :type gis: arcgis.gis.GIS
+        :param manifest: Optional ``Manifest`` recording the hash of published definitions.
+        :type manifest: mapmakers.manifest.Manifest
+        :param target: Optional Item ID of the web map published to when a request does not name one.
+        :type target: str
+        :return: Returns the newly created ``BuildServer``.
+        :rtype: BuildServer
+        """
+        self._builders = builders
+        self._loader = loader
+        self._templates = None
+        self._gis = gis
+        self._manifest = manifest
+        self._target = target
+        self._lock = threading.Lock()
+        self._server = None
+        self._counters = {"builds": 0, "published": 0, "reloads": 0}
+        self.reload()
+
+    def reload(self):
+        """
+        The *reload* method reads the templates again by calling the loader.  Builds in progress keep using the templates they started with.
+
+        :return: Modifies self as a side effect.
+        :rtype: NoneType
+        """
+        start = time.perf_counter()
+        templates = self._loader()
+        with self._lock:
+            self._templates = templates
+            self._counters["reloads"] += 1
+        logging.info("Templates loaded in %.2fs.", time.perf_counter() - start)
+
+    def build(
+        self,
+        name: str,
+        target: str | None = None,
+        publish: bool = True,
+        force: bool = False,
+        params: dict | None = None,
+        trim: bool = False,
+        budget: dict | None = None,
+    ) -> dict | None:
+        """
+        The *build* method runs the builder *name* against the loaded templates.  If *publish* is true, the result is published to the web map with Item ID *target*, otherwise the web map definition is returned without contacting the portal.  Either way the map is checked against *budget* first.
+
+        :param name: The name of the builder.
+        :type name: str
+        :param target: The Item ID of the target web map.  Defaults to the *target* of the server.
+        :type target: str
+        :param publish: Publishes the map if true.
+        :type publish: bool
+        :param force: Publishes even if the definition is unchanged.
+        :type force: bool
+        :param params: Keyword arguments for the builder.
+        :type params: dict
+        :param trim: Trims the definition, as in *Map.to_definition*.
+        :type trim: bool
+        :param budget: Optional limits checked against the definition, as in *Map.build*.
+        :type budget: dict
+        :return: A dictionary reporting the build, holding "published" or "definition" and "seconds", or None if there is no builder called *name*.
+        :rtype: dict | None
+        :raises BudgetExceeded: If any limit in *budget* is exceeded.  The map is not published.
+        :raises ValueError: If *publish* is true and there is no target.
+        """
+        if target is None:
+            target = self._target
+        if publish and target is None:
+            raise ValueError("Publishing {} needs a target.".format(name))
+        fn = self._builders.get(name)
+        if fn is None:
+            logging.warn("No builder called %s.", name)
+            return None
+        if params is None:
+            params = {}
+        start = time.perf_counter()
+        with self._lock:
+            templates = self._templates
+            self._counters["builds"] += 1
+        layers = fn(templates, **params)
+        result = {}
+        if publish:
+            mp = Map(target, layers, self._gis)
+            published = mp.build(force, self._manifest, trim, None, budget)
+            if published:
+                with self._lock:
+                    self._counters["published"] += 1
+            result.update({"published": published})
+        else:
+            mp = Map(target or "preview", layers)
+            definition = mp.to_definition(None, trim)
+            if budget is not None:
+                report = mp.cost_report(budget, definition)
+                if len(report["exceeded"]) > 0:
+                    raise BudgetExceeded(report)
+            result.update({"definition": definition})
+        result.update({"seconds": time.perf_counter() - start})
+        logging.info("Built %s in %.2fs.", name, result["seconds"])
+        return result
+
+    def status(self) -> dict:
+        """
+        The *status* method reports the builders, the loaded templates and the number of builds, publishes and reloads.
+
+        :return: A dictionary describing the server.
+        :rtype: dict
+        """
+        with self._lock:
+            templates = self._templates
+            counters = dict(self._counters)
+        names = []
+        if templates is not None and hasattr(templates, "template"):
+            names = list(templates.template)
+        return {"builders": list(self._builders), "templates": names, **counters}
+
+    def listen(
+        self, host: str = "127.0.0.1", port: int = 8765, socket: str | None = None
+    ) -> socketserver.BaseServer:
+        """
+        The *listen* method opens the server on *host* and *port*, or on the Unix socket at path *socket* if provided, without serving requests yet.  Called by *serve*.
+
+        :param host: The address to listen on.  Only local addresses should be used.
+        :type host: str
+        :param port: The port to listen on.  Use 0 to pick a free port.
+        :type port: int
+        :param socket: Optional path of a Unix socket to listen on instead.
+        :type socket: str
+        :return: The underlying server.
+        :rtype: socketserver.BaseServer
+        """
+        if socket is not None:
+            Path(socket).unlink(missing_ok=True)
+
+            class UnixServer(
+                socketserver.ThreadingMixIn, socketserver.UnixStreamServer
+            ):
+                daemon_threads = True
+
+            server = UnixServer(socket, Handler)
+        else:
+            server = ThreadingHTTPServer((host, port), Handler)
+        server.build_server = self
+        self._server = server
+        return server
+
+    def serve(
+        self, host: str = "127.0.0.1", port: int = 8765, socket: str | None = None
+    ):
+        """
+        The *serve* method answers requests until *shutdown* is called or the process is interrupted.
+
+        :param host: The address to listen on.  Only local addresses should be used.
+        :type host: str
+        :param port: The port to listen on.
+        :type port: int
+        :param socket: Optional path of a Unix socket to listen on instead.
+        :type socket: str
+        :return: Serves requests as a side effect.
+        :rtype: NoneType
+        """
+        server = self.listen(host, port, socket)
+        logging.info(
+            "Serving builds on %s.", socket or "{}:{}".format(*server.server_address)
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logging.info("Build server stopped.")
+        finally:
+            server.server_close()
+
+    def shutdown(self):
+        """
+        The *shutdown* method stops a server started with *serve* from another thread.
+
+        :return: Stops the server as a side effect.
+        :rtype: NoneType
+        """
+        if self._server is not None:
+            self._server.shutdown()
+
+    @property
+    def target(self):
+        """
+        The *target* property holds the Item ID of the web map published to when a request does not name one.
+        """
+        return self._target
+
+    @property
+    def templates(self):
+        """
+        The *templates* property holds the loaded templates.
+        """
+        return self._templates
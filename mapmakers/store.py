@@ -0,0 +1,269 @@
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from mapmakers.template import Template, TemplateItem, Templates
+import ast
+import json
+import logging
+import sqlite3
+import uuid
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS templates (
+    name TEXT PRIMARY KEY,
+    item_id TEXT
+);
+CREATE TABLE IF NOT EXISTS items (
+    id TEXT PRIMARY KEY,
+    "group" TEXT NOT NULL REFERENCES templates(name) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    title TEXT,
+    url TEXT,
+    layer_definition TEXT,
+    popup_info TEXT,
+    search TEXT
+);
+CREATE INDEX IF NOT EXISTS items_group ON items("group", position);
+CREATE INDEX IF NOT EXISTS items_name ON items(name);
+CREATE INDEX IF NOT EXISTS items_url ON items(url);
+"""
+
+COLUMNS = 'id, "group", name, title, url, layer_definition, popup_info, search'
+
+
+def as_json(value) -> str | None:
+    """
+    Convert a layer definition or popup info into JSON text for storage.  Text read from a workbook may already be JSON, or may be the Python representation of a dictionary.
+
+    :param value: The value to convert.
+    :type value: dict | str | None
+    :return: JSON text, or None if *value* is empty.
+    :rtype: str | None
+    """
+    match type(value).__name__:
+        case "dict" | "list":
+            return json.dumps(value)
+        case "str":
+            if value in ["", "nan", "null", "None"]:
+                return None
+            try:
+                parsed = json.loads(value)
+            except json.JSONDecodeError:
+                try:
+                    parsed = ast.literal_eval(value)
+                except (ValueError, SyntaxError):
+                    logging.warn("Unable to convert %s to JSON.", value[:50])
+                    return None
+            if type(parsed) is str:
+                return as_json(parsed)
+            return json.dumps(parsed)
+        case _:
+            return None
+
+
+@dataclass
+class TemplateStore:
+    """
+    The ``TemplateStore`` class keeps ``TemplateItem`` data in a local SQLite database, indexed by template group, item name and url, so that templates can be loaded in part and looked up without reading an entire workbook.
+    """
+
+    _path: Path
+
+    __slots__ = "_path"
+
+    def __init__(self, path: str):
+        """
+        Opens the template store at *path*, creating the database if it does not exist.
+
+        :param path: File path of the SQLite database.
+        :type path: str
+        :return: Returns the newly created ``TemplateStore``.
+        :rtype: TemplateStore
+        """
+        self._path = Path(path)
+        with closing(self.connect()) as con:
+            # write-ahead logging lets readers proceed while a harvest is written
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(SCHEMA)
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        The *connect* method opens a new connection to the database.  Each operation uses its own connection, so a ``TemplateStore`` can be shared between threads and processes.
+
+        :return: A connection to the database.
+        :rtype: sqlite3.Connection
+        """
+        con = sqlite3.connect(self._path, timeout=30)
+        con.execute("PRAGMA foreign_keys=ON")
+        return con
+
+    def write(self, templates: Templates):
+        """
+        The *write* method saves every ``Template`` in *templates* to the store in a single transaction, replacing any items previously stored for the same templates.  If the write fails, the store is left unchanged.
+
+        :param templates: The templates to save.
+        :type templates: Templates
+        :return: Writes to the database as a side effect.
+        :rtype: NoneType
+        """
+        with closing(self.connect()) as con, con:
+            for name, template in templates.template.items():
+                con.execute('DELETE FROM items WHERE "group" = ?', (name,))
+                con.execute(
+                    "INSERT OR REPLACE INTO templates (name, item_id) VALUES (?, ?)",
+                    (name, template.id),
+                )
+                rows = []
+                for position, (key, item) in enumerate(template.items.items()):
+                    rows.append(
+                        (
+                            str(item.id),
+                            name,
+                            position,
+                            key,
+                            item.title,
+                            item.url,
+                            as_json(item.layer_definition),
+                            as_json(item.popup_info),
+                            item.search_json(),
+                        )
+                    )
+                con.executemany(
+                    'INSERT OR REPLACE INTO items (id, "group", position, '
+                    "name, title, url, layer_definition, popup_info, search) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+        logging.debug("Stored %s templates.", len(templates.template))
+
+    def remove(self, name: str):
+        """
+        The *remove* method deletes the template called *name* and its items from the store.
+
+        :param name: The name of the template.
+        :type name: str
+        :return: Writes to the database as a side effect.
+        :rtype: NoneType
+        """
+        with closing(self.connect()) as con, con:
+            con.execute("DELETE FROM templates WHERE name = ?", (name,))
+
+    @staticmethod
+    def item(row: tuple) -> TemplateItem:
+        """
+        The *item* method is an internal library function that converts a row from the *items* table into a ``TemplateItem``.
+
+        :param row: A row selected from the *items* table.
+        :type row: tuple
+        :return: The ``TemplateItem`` stored in the row.
+        :rtype: TemplateItem
+        """
+        id, group, name, title, url, layer_def, popup_info, search = row
+        if layer_def is not None:
+            layer_def = json.loads(layer_def)
+        if popup_info is not None:
+            popup_info = json.loads(popup_info)
+        return TemplateItem.from_parts(
+            title,
+            group,
+            name,
+            layer_def,
+            popup_info,
+            url,
+            json.loads(search),
+            uuid.UUID(id),
+        )
+
+    def names(self) -> list[str]:
+        """
+        The *names* method returns the names of the templates in the store.
+
+        :return: A list of template names.
+        :rtype: list[str]
+        """
+        with closing(self.connect()) as con:
+            rows = con.execute("SELECT name FROM templates ORDER BY name")
+            return [row[0] for row in rows]
+
+    def load(self, groups: list[str] | None = None) -> Templates:
+        """
+        The *load* method reads templates from the store into a ``Templates`` object.  If *groups* is provided, only the templates with those names are read.
+
+        :param groups: Optional list of template names to load.
+        :type groups: list[str]
+        :return: A ``Templates`` object holding the stored templates.
+        :rtype: Templates
+        """
+        res = Templates()
+        with closing(self.connect()) as con:
+            templates = con.execute("SELECT name, item_id FROM templates").fetchall()
+            for name, item_id in templates:
+                if groups is not None and name not in groups:
+                    continue
+                template = Template(name, item_id)
+                rows = con.execute(
+                    'SELECT {} FROM items WHERE "group" = ? ORDER BY position'.format(
+                        COLUMNS
+                    ),
+                    (name,),
+                )
+                for row in rows:
+                    item = TemplateStore.item(row)
+                    template.items.update({item.item_name: item})
+                res.add(template)
+        return res
+
+    def template(self, name: str) -> Template | None:
+        """
+        The *template* method reads the template called *name* from the store.
+
+        :param name: The name of the template.
+        :type name: str
+        :return: The ``Template``, or None if it is not in the store.
+        :rtype: Template | None
+        """
+        return self.load([name]).template.get(name)
+
+    def by_name(self, name: str) -> list[TemplateItem]:
+        """
+        The *by_name* method returns the stored template items with the item name *name*.
+
+        :param name: The item name.
+        :type name: str
+        :return: A list of matching ``TemplateItem`` objects.
+        :rtype: list[TemplateItem]
+        """
+        with closing(self.connect()) as con:
+            rows = con.execute(
+                "SELECT {} FROM items WHERE name = ?".format(COLUMNS), (name,)
+            )
+            return [TemplateStore.item(row) for row in rows]
+
+    def by_url(self, url: str) -> list[TemplateItem]:
+        """
+        The *by_url* method returns the stored template items pointing at *url*.  If *url* is a service url, items pointing at any layer of the service are included.
+
+        :param url: The url of a layer or service.
+        :type url: str
+        :return: A list of matching ``TemplateItem`` objects.
+        :rtype: list[TemplateItem]
+        """
+        url = url.rstrip("/")
+        prefix = url + "/"
+        with closing(self.connect()) as con:
+            # a range over the index matches every url beginning with the prefix
+            rows = con.execute(
+                "SELECT {} FROM items WHERE url = ? OR (url >= ? AND url < ?)".format(
+                    COLUMNS
+                ),
+                (url, prefix, prefix + "\uffff"),
+            )
+            return [TemplateStore.item(row) for row in rows]
+
+    @property
+    def path(self):
+        """
+        The *path* property holds the file path of the SQLite database.
+        """
+        return self._path
@@ -1,15 +1,133 @@
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path, PurePath
 import mapmakers
+from mapmakers.cache import get_cache
+from mapmakers.scheduler import Scheduler, get_scheduler
+from mapmakers.search import SearchRegistry
+from mapmakers.utils import (
+    create_layer_id,
+    gather_limited,
+    open_workbook,
+    workbook_file,
+    workbook_name,
+)
 import arcgis
 from arcgis.gis import GIS
-from arcgis.mapping import WebMap
+import ast
+import asyncio
+import copy
+import csv
 import json
 import logging
+import math
+import os
 import pandas
 import progressbar
+import random
 import uuid
 
+WORKBOOK_COLUMNS = [
+    "name",
+    "title",
+    "group",
+    "id",
+    "layer_definition",
+    "popup_info",
+    "url",
+    "search",
+]
+
+SEARCH_FIELD = {"exactMatch": False, "type": "esriFieldTypeString"}
+
+
+def search_spec(value) -> tuple[dict, ...]:
+    """
+    Parse the search fields of a layer into a tuple of field specifications, each a dictionary with the keys "name", "exactMatch" and "type".  Accepts a list of field names or field dictionaries, the JSON text stored in a workbook, or the Python list representation, such as "['NAME', 'ADDRESS']", written by earlier versions of the library.
+
+    :param value: The search fields to parse.
+    :type value: list | str | None
+    :return: A tuple of field specifications.
+    :rtype: tuple[dict, ...]
+    """
+    match type(value).__name__:
+        case "NoneType" | "float":
+            return ()
+        case "dict":
+            if "name" not in value:
+                logging.warn("Search field %s has no name.", value)
+                return ()
+            field = {"name": value["name"]}
+            field.update(SEARCH_FIELD)
+            field.update(value)
+            return (field,)
+        case "str":
+            value = value.strip()
+            if value in ["", "nan", "null", "None"]:
+                return ()
+            if value[0] not in "[{":
+                return search_spec(
+                    [{"name": name} for name in value.replace(",", " ").split()]
+                )
+            try:
+                parsed = json.loads(value)
+            except json.JSONDecodeError:
+                try:
+                    parsed = ast.literal_eval(value)
+                except (ValueError, SyntaxError):
+                    logging.warn("Unable to read search fields %s.", value[:50])
+                    return ()
+            return search_spec(parsed)
+        case "list" | "tuple":
+            fields = []
+            for entry in value:
+                fields.extend(search_spec(entry))
+            return tuple(fields)
+        case _:
+            logging.debug("Unexpected search type: %s", type(value))
+            return ()
+
+
+def cell(value):
+    """
+    Return *value* as written to a workbook cell, with None and NaN written as empty cells as *pandas.DataFrame.to_csv* writes them.
+
+    :param value: The cell value.
+    :type value: object
+    :return: The value, or an empty string if it is missing.
+    :rtype: object
+    """
+    if value is None or (type(value) is float and math.isnan(value)):
+        return ""
+    return value
+
+
+def parse_json(value) -> dict | None:
+    """
+    Parse a layer definition or popup info read from a workbook.  Text may hold JSON, or the Python representation of a dictionary written by earlier versions of the library.
+
+    :param value: The value to parse.
+    :type value: dict | str | None
+    :return: The parsed dictionary, or None if *value* is empty or unreadable.
+    :rtype: dict | None
+    """
+    match type(value).__name__:
+        case "dict":
+            return value
+        case "str":
+            if value in ["", "nan", "null", "None"]:
+                return None
+            try:
+                return json.loads(value)
+            except json.JSONDecodeError:
+                try:
+                    return ast.literal_eval(value)
+                except (ValueError, SyntaxError):
+                    logging.warn("Unable to read %s.", value[:50])
+                    return None
+        case _:
+            return None
+
 
 @dataclass
 class TemplateItem:
@@ -23,8 +141,9 @@ class TemplateItem:
     _layer_definition: dict | None
     _popup_info: dict | None
     _url: str | None
-    _search: list | None
+    _search: tuple[dict, ...]
     _id: uuid.UUID
+    _parsed: tuple | None
 
     __slots__ = (
         "_title",
@@ -35,6 +154,7 @@ class TemplateItem:
         "_url",
         "_search",
         "_id",
+        "_parsed",
     )
 
     def __init__(
@@ -83,8 +203,9 @@ class TemplateItem:
                 logging.debug("Unexpected type: %s", type(popup_info))
                 self._popup_info = None
         self._url = url
-        self._search = search
+        self._search = search_spec(search)
         self._id = uuid.uuid4()
+        self._parsed = None
 
     @staticmethod
     def from_layer(layer: dict, group_name: str, searches: dict):
@@ -96,7 +217,7 @@ class TemplateItem:
         :param group_name: The name of the template web map from which the layer originates.
         :type group_name: str
         :param searches: A dictionary with layer IDs as keys and search fields as values, produced by the *Template.get_search* method.
-        :type searches: dict[str, list[str]]
+        :type searches: dict[str, list[dict]]
         :return: A ``TemplateItem`` containing the map data of *layer*.
         :rtype: TemplateItem
 
@@ -154,8 +275,8 @@ class TemplateItem:
         :type popup_info: str
         :param url: The url source of the layer.
         :type url: str
-        :param search: A list of field names within the layer that should be searchable.
-        :type search: list[str]
+        :param search: The searchable fields within the layer, as a list of field names or the JSON text of a workbook column.
+        :type search: list[str] | str
         :param id: A unique ID used internally by the library to track layers.
         :type id: uuid.UUID
         :return: A ``TemplateItem`` containing the map data of the layer.
@@ -232,29 +353,46 @@ class TemplateItem:
         :return: A list containing dictionary elements structured to enable search on an ESRI WebMap.
         :rtype: list[dict]
         """
+        # the field entries are built once, when the search fields are set
+        return [{"id": id, "field": dict(field)} for field in self._search]
+
+    def parsed(self) -> tuple:
+        """
+        The *parsed* method returns the layer definition and popup info of the ``TemplateItem`` as dictionaries, parsing text read from a workbook the first time it is called.
+
+        :return: A tuple of the layer definition and popup info.
+        :rtype: tuple[dict | None, dict | None]
+        """
+        if self._parsed is None:
+            self._parsed = (
+                parse_json(self._layer_definition),
+                parse_json(self._popup_info),
+            )
+        return self._parsed
+
+    def search_fields(self) -> list[str]:
+        """
+        The *search_fields* method returns the names of the searchable fields in the *search* property.
+
+        :return: A list of field names.
+        :rtype: list[str]
+        """
+        return [field["name"] for field in self._search]
+
+    def search_json(self) -> str:
+        """
+        The *search_json* method returns the search fields as JSON text, for storage in a workbook or template store.  Fields using the default settings are written by name alone, so the column stays easy to edit by hand.
+
+        :return: JSON text listing the search fields.
+        :rtype: str
+        """
         fields = []
-        if self.search is not None:
-            logging.debug("Search length: %s", len(self.search))
-            for name in self.search:
-                logging.debug("name before: %s", name)
-                name = name.replace("'", "")
-                name = name.replace(",", "")
-                name = name.replace("[", "")
-                name = name.replace("]", "")
-                logging.debug("name after: %s", name)
-                names = name.split()
-                logging.debug("names: %s", names)
-                for nm in names:
-                    logging.debug("Name is %s", nm)
-                    entry = {}
-                    entry.update({"id": id})
-                    field = {}
-                    field.update({"name": nm})
-                    field.update({"exactMatch": False})
-                    field.update({"type": "esriFieldTypeString"})
-                    entry.update({"field": field})
-                    fields.append(entry)
-        return fields
+        for field in self._search:
+            if all(field.get(key) == value for key, value in SEARCH_FIELD.items()):
+                fields.append(field["name"])
+            else:
+                fields.append(field)
+        return json.dumps(fields)
 
     @property
     def title(self):
@@ -299,6 +437,7 @@ class TemplateItem:
     @layer_definition.setter
     def layer_definition(self, value: dict):
         self._layer_definition = value
+        self._parsed = None
 
     @property
     def popup_info(self):
@@ -310,6 +449,7 @@ class TemplateItem:
     @popup_info.setter
     def popup_info(self, value: dict):
         self._popup_info = value
+        self._parsed = None
 
     @property
     def url(self):
@@ -325,13 +465,13 @@ class TemplateItem:
     @property
     def search(self):
         """
-        The *search* property holds a list of field names within a map layer that should be searchable.
+        The *search* property holds a tuple of the fields within a map layer that should be searchable.  Each field is a dictionary with the keys "name", "exactMatch" and "type".  Field names, or the JSON text of a workbook column, may be assigned and are parsed when set.
         """
         return self._search
 
     @search.setter
     def search(self, value: list):
-        self._search = value
+        self._search = search_spec(value)
 
     @property
     def id(self):
@@ -383,7 +523,7 @@ class Template:
         :return: Boolean indicating whether the item is of type arcgis.gis.Item.
         :rtype: bool
         """
-        if type(gis.content.get(self.id)) is arcgis.gis.Item:
+        if type(get_cache().get(gis, self.id)) is arcgis.gis.Item:
             return True
         else:
             return False
@@ -456,11 +596,22 @@ class Template:
         :return: A ``Template`` object containing layer data from the target web map.
         :rtype: Template
         """
-        item = gis.content.get(self.id)
-        searches = Template.get_search(item)
+        item = get_cache().get(gis, self.id, data_only=True)
+        return self.read_definition(get_cache().get_data(item))
+
+    def read_definition(self, definition: dict):
+        """
+        The *read_definition* method reads the layer data and search fields from the JSON *definition* of a web map into the ``Template``.  An internal library function called by *Template.load* and *Template.from_json*.
+
+        :param definition: The JSON definition of a web map, as returned by *arcgis.gis.Item.get_data*.
+        :type definition: dict
+        :return: The ``Template`` with its *items* updated.
+        :rtype: Template
+        """
+        searches = Template.search_in(definition)
         logging.debug("Search found: %s", searches)
-        wm = WebMap(item)
-        data = self.read(wm.layers, searches, items=[])
+        layers = definition.get("operationalLayers") or []
+        data = self.read(layers, searches, items=[])
         logging.debug("Layers found: %s", len(data))
         index = 0
         for datum in data:
@@ -471,6 +622,17 @@ class Template:
             index += 1
         return self
 
+    async def aload(self, gis: GIS):
+        """
+        The *aload* method is the asynchronous counterpart to *load*, reading the template web map on a worker thread so that other templates can load concurrently.
+
+        :param gis: An authenticated GIS connection.
+        :type gis: arcgis.gis.GIS
+        :return: A ``Template`` object containing layer data from the target web map.
+        :rtype: Template
+        """
+        return await asyncio.to_thread(self.load, gis)
+
     @staticmethod
     def get_search(item: arcgis.gis.Item):
         """
@@ -479,10 +641,21 @@ class Template:
         :param item: An ArcGIS Item ID pointing to a non-empty web map.
         :type item: arcgis.gis.Item
         :return: A dictionary with layer IDs as keys and search fields as values, containing the searchable fields within the provided web map.
-        :rtype: dict[str, list(str)]
+        :rtype: dict[str, list(dict)]
+        """
+        return Template.search_in(get_cache().get_data(item))
+
+    @staticmethod
+    def search_in(map_def: dict):
+        """
+        The *search_in* method reads the search fields from the JSON definition of a web map and returns a dictionary with layer ids as keys and search fields as values.  Called by *Template.get_search* and *Template.read_definition*.
+
+        :param map_def: The JSON definition of a web map.
+        :type map_def: dict
+        :return: A dictionary with layer IDs as keys and search fields as values, containing the searchable fields within the web map.
+        :rtype: dict[str, list(dict)]
         """
         d = {}
-        map_def = item.get_data()
         if "applicationProperties" in map_def:
             map_def = map_def["applicationProperties"]
         if "viewing" in map_def:
@@ -500,13 +673,13 @@ class Template:
                 if "field" in search:
                     search_field = search["field"]
                     if "name" in search_field:
-                        items.append(search_field["name"])
+                        items.append(search_field)
                 d.update({search_id: items})
         return d
 
-    def workbook(self, path, auto=False, named=False):
+    def workbook(self, path, auto=False, named=False, compression: str | None = None):
         """
-        The *workbook* method exports data from a ``Template`` object to a .csv workbook.  Called by *Templates.workbooks*.
+        The *workbook* method exports data from a ``Template`` object to a .csv workbook.  Called by *Templates.workbooks*.  Workbooks with a file name ending in ".csv.gz" or ".csv.zst" are compressed.
 
         :param path: The directory or file path destination for the workbook.
         :type path: str
@@ -514,59 +687,42 @@ class Template:
         :type bool:
         :param named: Indicates that names have been assigned to map layers using the *with_names* method, and should be preserved.
         :type named: bool
+        :param compression: If *path* is a directory, compresses the workbook with "gz" or "zst".
+        :type compression: str
         :return: Prints a .csv workbook to the target *path* as a side effect.
         :rtype: NoneType
         """
         lyrs = self._items.values()
         logging.debug("Layers read: %s", len(lyrs))
-        df = pandas.DataFrame(data={"name": []})
-        title = []
-        group = []
-        names = []
-        id = []
-        layer_def = []
-        popup_info = []
-        url = []
-        search = []
-        index = 0
-
         group_name = self.name
-
-        for layer in lyrs:
-            logging.debug("loop %s", layer.title)
-            if auto:
-                if layer.item_name is not None:
-                    logging.debug("Name found: %s.", layer.item_name)
-                    names.append(layer.item_name)
-                else:
-                    logging.debug("Name not found: auto-naming.")
-                    name = "{nm}_{i}".format(nm=group_name, i=index)
-                    names.append(name)
-            if named:
-                names.append(layer.item_name)
-            title.append(layer.title)
-            group.append(group_name)
-            id.append(layer.id)
-            layer_def.append(json.dumps(layer.layer_definition))
-            popup_info.append(json.dumps(layer.popup_info))
-            url.append(layer.url)
-            search.append(layer.search)
-            index += 1
-
-        df["title"] = title
-        df["group"] = group
-        if auto or named:
-            logging.debug("Adding names.")
-            df["name"] = names
-        df["id"] = id
-        df["layer_definition"] = layer_def
-        df["popup_info"] = popup_info
-        df["url"] = url
-        df["search"] = search
-        logging.debug("Length of csv: %s", len(df["popup_info"]))
-        if ".csv" not in path:
-            path = PurePath(path, "{}.csv".format(group_name))
-        df.to_csv(path, sep=",", index=False)
+        if ".csv" not in str(path):
+            path = PurePath(path, workbook_file(group_name, compression))
+        # rows are written as they are produced, so memory use stays flat
+        with open_workbook(path, "w") as f:
+            # pandas ended rows with os.linesep, so workbooks keep CRLF line endings on Windows
+            writer = csv.writer(f, lineterminator=os.linesep)
+            writer.writerow(WORKBOOK_COLUMNS)
+            for index, layer in enumerate(lyrs):
+                logging.debug("loop %s", layer.title)
+                name = None
+                if auto:
+                    name = layer.item_name
+                    if name is None:
+                        logging.debug("Name not found: auto-naming.")
+                        name = "{nm}_{i}".format(nm=group_name, i=index)
+                if named:
+                    name = layer.item_name
+                row = [
+                    name,
+                    layer.title,
+                    group_name,
+                    layer.id,
+                    json.dumps(layer.layer_definition),
+                    json.dumps(layer.popup_info),
+                    layer.url,
+                    layer.search_json(),
+                ]
+                writer.writerow([cell(value) for value in row])
 
     def workbook_parts(
         self,
@@ -602,10 +758,10 @@ class Template:
         :param search: A list holding the search definition for each layer.
         :type search: list[dict]
         """
-        item = gis.content.get(self.id)
+        item = get_cache().get(gis, self.id, data_only=True)
         searches = Template.get_search(item)
-        wm = WebMap(item)
-        lyrs = self.read(wm.layers, searches, [])
+        layers = get_cache().get_data(item).get("operationalLayers") or []
+        lyrs = self.read(layers, searches, [])
         index = 0
         for layer in lyrs:
             if layer.item_name is not None:
@@ -618,21 +774,45 @@ class Template:
             layer_def.append(layer.layer_definition)
             popup_info.append(layer.popup_info)
             url.append(layer.url)
-            search.append(layer.search)
+            search.append(layer.search_json())
             index += 1
 
+    @staticmethod
+    def from_json(path: str, name: str | None = None, id: str | None = None):
+        """
+        The *from_json* method reads a web map definition exported to a JSON file at *path* into a ``Template`` object, producing the same items as *load* without connecting to a portal.
+
+        :param path: The file path of the exported web map JSON.
+        :type path: str
+        :param name: The name of the ``Template``.  Defaults to the file name without its extension.
+        :type name: str
+        :param id: The Item ID of the web map.  Defaults to the file name without its extension.
+        :type id: str
+        :return: A ``Template`` object containing layer data from the web map definition.
+        :rtype: Template
+        """
+        stem = Path(path).stem
+        if name is None:
+            name = stem
+        if id is None:
+            id = stem
+        with open(path, encoding="utf-8") as f:
+            definition = json.load(f)
+        return Template(name, id).read_definition(definition)
+
     @staticmethod
     def from_workbook(path: str):
         """
-        The *from_workbook* method loads map data from a .csv workbook at file location *path* into a ``Template`` object.
+        The *from_workbook* method loads map data from a .csv workbook at file location *path* into a ``Template`` object.  Workbooks ending in ".csv.gz" or ".csv.zst" are decompressed.
 
         :param path: The file path location of the workbook.
         :type path: str
         :return: A ``Template`` object containing the layer data in the workbook.
         :rtype: Template
         """
-        name = Path(path).stem
-        df = pandas.read_csv(path)
+        name = workbook_name(path)
+        with open_workbook(path) as f:
+            df = pandas.read_csv(f)
         names = df["name"]
         titles = df["title"]
         group = df["group"]
@@ -643,18 +823,6 @@ class Template:
         search = df["search"]
         items = {}
         for i in range(0, len(names)):
-            search_item = []
-            srch = search[i]
-            match type(srch).__name__:
-                case "str":
-                    if srch != "[]":
-                        search_item.append(srch)
-                    else:
-                        logging.debug("Empty search field detected.")
-                case _:
-                    logging.debug(type(srch))
-                    search_item.extend(srch.tolist())
-            logging.debug("Search set to %s", srch)
             item = TemplateItem.from_parts(
                 str(titles[i]),
                 str(group[i]),
@@ -662,7 +830,7 @@ class Template:
                 str(layer_def[i]),
                 str(popup_info[i]),
                 str(url[i]),
-                search_item,
+                search[i],
                 uuid.UUID(str(ids[i])),
             )
             items.update({str(names[i]): item})
@@ -682,6 +850,84 @@ class Template:
             items.append(item.into_item())
         return mapmakers.Items(items)
 
+    def columns(self) -> dict[str, list]:
+        """
+        The *columns* method returns the layer data of the ``Template`` as columns, with layer definitions and popup info parsed.  The parsed dictionaries are shared with the memo of each ``TemplateItem`` and should be copied before they are modified.  Called by *into_layers*.
+
+        :return: A dictionary of equal length lists keyed by column name.
+        :rtype: dict[str, list]
+        """
+        items = list(self._items.values())
+        parsed = [item.parsed() for item in items]
+        return {
+            "item": items,
+            "title": [item.title for item in items],
+            "url": [item.url for item in items],
+            "layer_definition": [layer_def for layer_def, _ in parsed],
+            "popup_info": [popup_info for _, popup_info in parsed],
+        }
+
+    def into_layers(self, urls=None, visible=False, titles=None, opacity=0.5):
+        """
+        The *into_layers* method converts the ``Template`` directly into a ``Layers`` object, building every layer in one pass over the columns returned by *columns*.  The result matches *Items.from_template(urls, template).layers()*, without creating an ``Item`` and ``Layer`` for each layer.  Each of *urls*, *visible*, *titles* and *opacity* may be a single value applied to every layer, or a list with one value per layer in the template.
+
+        :param urls: The url source of each layer.  Defaults to the urls in the template.
+        :type urls: list[str]
+        :param visible: The visibility of each layer.
+        :type visible: bool | list[bool]
+        :param titles: The display title of each layer.  Defaults to the titles in the template.
+        :type titles: list[str]
+        :param opacity: The opacity of each layer.
+        :type opacity: float | list[float]
+        :return: A ``Layers`` object containing the layers of the template, or None if a list does not match the number of layers.
+        :rtype: mapmakers.Layers
+        """
+        columns = self.columns()
+        size = len(columns["item"])
+        values = {}
+        defaults = {
+            "urls": [url if url is not None else "none" for url in columns["url"]],
+            "visible": False,
+            "titles": columns["title"],
+            "opacity": 0.5,
+        }
+        given = {"urls": urls, "visible": visible, "titles": titles, "opacity": opacity}
+        for key, value in given.items():
+            if value is None:
+                value = defaults[key]
+            if type(value).__name__ not in ["list", "tuple"]:
+                value = [value] * size
+            if len(value) != size:
+                logging.warn("The number of %s and template items must be equal.", key)
+                return
+            values.update({key: value})
+        layers = []
+        search = SearchRegistry()
+        for item, url, title, layer_def, popup_info, visibility, alpha in zip(
+            columns["item"],
+            values["urls"],
+            values["titles"],
+            columns["layer_definition"],
+            columns["popup_info"],
+            values["visible"],
+            values["opacity"],
+        ):
+            id = create_layer_id(random.randint(10000, 99999))
+            layer = {"id": id, "url": url}
+            if title is not None:
+                layer.update({"title": title})
+            layer.update({"layerType": "ArcGISFeatureLayer"})
+            layer.update({"opacity": alpha})
+            # the parsed dicts are memoized on the template item, so each layer gets its own copy
+            if layer_def is not None:
+                layer.update({"layerDefinition": copy.deepcopy(layer_def)})
+            if popup_info is not None:
+                layer.update({"popupInfo": copy.deepcopy(popup_info)})
+            layer.update({"visibility": visibility})
+            layers.append(layer)
+            search.extend(item.into_search(id))
+        return mapmakers.Layers(layers, search)
+
     @property
     def name(self):
         """
@@ -742,10 +988,68 @@ class Templates:
         else:
             logging.warn("Template is unnamed.")
 
+    @staticmethod
+    def resolve(templates: dict[str, str], gis: GIS, chunk: int = 50):
+        """
+        The *resolve* method looks up the portal items for all of the Item IDs in *templates* using as few content searches as possible, querying up to *chunk* IDs per search.  IDs missing from the search results are fetched one at a time, and IDs whose definition is fresh in the on-disk cache of the ``ItemCache`` are not looked up at all.  Resolved items are added to the shared ``ItemCache``, so loading the templates afterwards does not fetch the items again.  IDs that cannot be found, or that do not refer to a web map, are logged and left out of the result.
+
+        :param templates: A dictionary with template names as keys and arcgis.mapping.WebMap Item IDs as values.
+        :type templates: dict[str, str]
+        :param gis: An authenticated GIS connection.
+        :type gis: arcgis.gis.GIS
+        :param chunk: Maximum number of IDs to query in a single search.
+        :type chunk: int
+        :return: A dictionary with template names as keys and the resolved items, carrying *modified*, *owner* and *type* metadata, as values.
+        :rtype: dict[str, arcgis.gis.Item | mapmakers.cache.CachedItem]
+        """
+        found = {}
+        for id in dict.fromkeys(templates.values()):
+            # items whose definition is fresh on disk are not looked up again
+            handle = get_cache().handle(gis, id)
+            if handle is not None:
+                found.update({id: handle})
+        ids = [id for id in dict.fromkeys(templates.values()) if id not in found]
+        host = Scheduler.host(getattr(gis, "url", None))
+        for i in range(0, len(ids), chunk):
+            query = " OR ".join("id:{}".format(id) for id in ids[i : i + chunk])
+            results = get_scheduler().call(
+                host,
+                gis.content.search,
+                query=query,
+                max_items=chunk,
+                outside_org=True,
+            )
+            for item in results:
+                found.update({item.id: item})
+                get_cache().put(gis, item)
+        logging.debug("Resolved %s of %s templates.", len(found), len(templates))
+        for id in ids:
+            if id in found:
+                continue
+            # searches can miss items that are not indexed yet or shared in unusual ways
+            try:
+                item = get_cache().get(gis, id)
+            except Exception as e:
+                logging.debug("Unable to fetch %s: %s", id, e)
+                continue
+            if item is not None:
+                found.update({id: item})
+        res = {}
+        for key, value in templates.items():
+            if value not in found:
+                logging.warn("Template %s not found at %s.", key, value)
+            elif found[value].type != "Web Map":
+                logging.warn(
+                    "Template %s is a %s, not a Web Map.", key, found[value].type
+                )
+            else:
+                res.update({key: found[value]})
+        return res
+
     @staticmethod
     def from_obj(templates: dict[str, str], gis: GIS):
         """
-        The *from_obj* method converts template information passed in a dictionary into a ``Templates`` class object.
+        The *from_obj* method converts template information passed in a dictionary into a ``Templates`` class object.  The items for all templates are resolved up front with *resolve*, and templates that cannot be found are skipped.
 
         :param templates: A dictionary with template names as keys and arcgis.mapping.WebMap Item IDs as values.
         :type templates: dict[str, str]
@@ -753,9 +1057,11 @@ class Templates:
         :rtype: Templates
         """
         res = Templates()
-        bar = progressbar.ProgressBar(max_value=len(templates))
+        resolved = Templates.resolve(templates, gis)
+        bar = progressbar.ProgressBar(max_value=len(resolved))
         index = 0
-        for key, value in templates.items():
+        for key, item in resolved.items():
+            value = item.id
             template = Template(key, value)
             template.load(gis)
             res._template.update({key: template})
@@ -763,28 +1069,75 @@ class Templates:
             bar.update(index)
         return res
 
-    def workbooks(self, dir: str, auto=False):
+    @staticmethod
+    async def afrom_obj(templates: dict[str, str], gis: GIS, limit: int = 8):
         """
-        For each ``Template`` in the *template* property, the *workbooks* method prints a .csv workbook to the directory at *dir* containing the layer data of the template web map.
+        The *afrom_obj* method is the asynchronous counterpart to *from_obj*, loading up to *limit* templates concurrently after resolving their items with *resolve*.
+
+        :param templates: A dictionary with template names as keys and arcgis.mapping.WebMap Item IDs as values.
+        :type templates: dict[str, str]
+        :param gis: An authenticated GIS connection.
+        :type gis: arcgis.gis.GIS
+        :param limit: Maximum number of templates to load at the same time.
+        :type limit: int
+        :return: A ``Templates`` object containing layer data from the web maps at the Item IDs stored in *templates*.
+        :rtype: Templates
+        """
+        res = Templates()
+        resolved = await asyncio.to_thread(Templates.resolve, templates, gis)
+        bar = progressbar.ProgressBar(max_value=len(resolved))
+        loaded = []
+
+        def call(template: Template):
+            async def run():
+                await template.aload(gis)
+                loaded.append(template.name)
+                bar.update(len(loaded))
+                return template
+
+            return run
+
+        calls = [call(Template(key, item.id)) for key, item in resolved.items()]
+        for template in await gather_limited(calls, limit):
+            res._template.update({template.name: template})
+        return res
+
+    def workbooks(
+        self,
+        dir: str,
+        auto=False,
+        compression: str | None = None,
+        workers: int | None = None,
+    ):
+        """
+        For each ``Template`` in the *template* property, the *workbooks* method prints a .csv workbook to the directory at *dir* containing the layer data of the template web map.  The workbooks are written in parallel on *workers* processes.
 
         :param dir: The target directory path in which to print the .csv workbooks.
         :type dir: str
         :param auto: Assigns names to map layers automatically if true.
         :type auto: bool
+        :param compression: Compresses the workbooks with "gz" or "zst".
+        :type compression: str
+        :param workers: The number of worker processes.  Defaults to the number of processors.
+        :type workers: int
         :return: Writes one or more .csv workbooks to target directory *dir* as a side effect.
         :rtype: NoneType
         """
         path = Path(dir)
         logging.debug("Path is {%s}", path)
         if path.is_dir():
-            for key, value in self._template.items():
-                workbook = PurePath(path, "{}.csv".format(key))
-                logging.debug("Workbook: %s", workbook)
-                value.workbook(path, auto)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                jobs = []
+                for key, value in self._template.items():
+                    workbook = PurePath(path, workbook_file(key, compression))
+                    logging.debug("Workbook: %s", workbook)
+                    jobs.append(pool.submit(value.workbook, workbook, auto))
+                for job in jobs:
+                    job.result()
         else:
             logging.warn("Dir must be a valid directory.")
 
-    def workbook(self, gis: GIS, dir: str, auto=False):
+    def workbook(self, gis: GIS, dir: str, auto=False, compression: str | None = None):
         """
         The *workbook* method prints a .csv workbook containing layer data from all of the ``Template`` objects in the *template* property.  If *dir* points to a directory, the workbook will be placed in the directory under the name "workbook.csv".  If *dir* provides a file name ending with a ".csv" extension, the workbook will be assigned the given file name.
 
@@ -794,6 +1147,8 @@ class Templates:
         :type dir: str
         :param auto: Assigns names to map layers automatically if true.
         :type bool:
+        :param compression: Compresses the workbook with "gz" or "zst", naming it "workbook.csv.gz" or "workbook.csv.zst".
+        :type compression: str
         :return: Writes a .csv workbook to the target directory *dir* as a side effect.
         :rtype: NoneType
         """
@@ -832,8 +1187,9 @@ class Templates:
             df["url"] = url
             df["search"] = search
             logging.debug("Length of csv: %s", len(df["popup_info"]))
-            path = PurePath(path, "workbook.csv")
-            df.to_csv(path, sep=",", index=False)
+            path = PurePath(path, workbook_file("workbook", compression))
+            with open_workbook(path, "w") as f:
+                df.to_csv(f, sep=",", index=False)
 
         else:
             logging.warn("Dir must be a valid directory.")
@@ -862,6 +1218,53 @@ class Templates:
                     t._template[name]._items.update({item.item_name: item})
         return t
 
+    @staticmethod
+    def from_dir(dir: str, pattern: str = "*.json", workers: int | None = None):
+        """
+        The *from_dir* method reads every web map definition matching *pattern* in the directory *dir* into a ``Templates`` object, parsing the files in parallel on *workers* processes.  Each ``Template`` is named after its file, as in *Template.from_json*.
+
+        :param dir: The directory holding the exported web map JSON files.
+        :type dir: str
+        :param pattern: A glob pattern selecting the files to read.
+        :type pattern: str
+        :param workers: The number of worker processes.  Defaults to the number of processors.
+        :type workers: int
+        :return: A ``Templates`` object containing layer data from the web map definitions.
+        :rtype: Templates
+        """
+        res = Templates()
+        paths = sorted(str(path) for path in Path(dir).glob(pattern))
+        logging.debug("Reading %s web maps from %s.", len(paths), dir)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for template in pool.map(Template.from_json, paths):
+                res.add(template)
+        return res
+
+    @staticmethod
+    def from_sqlite(path: str, groups: list[str] | None = None):
+        """
+        The *from_sqlite* method loads the contents of the SQLite template store at *path* into a ``Templates`` object.  If *groups* is provided, only the templates with those names are loaded.
+
+        :param path: The file path to the SQLite database.
+        :type path: str
+        :param groups: Optional list of template names to load.
+        :type groups: list[str]
+        :return: A ``Templates`` object containing map layer data from the store.
+        :rtype: Templates
+        """
+        return mapmakers.TemplateStore(path).load(groups)
+
+    def sqlite(self, path: str):
+        """
+        The *sqlite* method saves the ``Template`` objects in the *template* property to the SQLite template store at *path* in a single transaction, creating the database if needed.
+
+        :param path: The file path to the SQLite database.
+        :type path: str
+        :return: Writes to the database as a side effect.
+        :rtype: NoneType
+        """
+        mapmakers.TemplateStore(path).write(self)
+
     def into_items(self):
         """
         The *into_items* method converts a ``Templates`` object into an *Items* object.  Iterates through the ``Template`` objects in the *template* property and calls *Template.into_items* on each object.
@@ -1,3 +1,9 @@
+from pathlib import PurePath
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
 import random
 import string
 
@@ -20,16 +26,19 @@ def create_layer_id(layerIndex: int) -> str:
     )
 
 
-def expand_urls(stub: str, rng: range | list[int]) -> list[str]:
+def expand_urls(stub: str, rng: range | list[int | str], catalog=None) -> list[str]:
     """
-    Generate list of urls over range index given a service stub.
+    Generate list of urls over range index given a service stub.  Layer names in *rng* are resolved to layer indexes using *catalog*.
 
     :param stub: Url base string for map service.
     :type stub: str
-    :param rng: List of numbers generated by *range()* call.
+    :param rng: List of numbers generated by *range()* call, or a list of layer indexes and layer names.
     :type rng: range
-    :return: List of urls beginning in *stub* and ending in *rng* values.
+    :param catalog: A ``Catalog`` used to look up the index of named layers.
+    :type catalog: mapmakers.catalog.Catalog
+    :return: List of urls beginning in *stub* and ending in *rng* values, in the order of *rng*.
     :rtype: list[str]
+    :raises ValueError: If a layer name cannot be resolved, since a shorter list would pair the remaining urls with the wrong layers.
     """
     values = []
     match type(rng).__name__:
@@ -41,5 +50,139 @@ def expand_urls(stub: str, rng: range | list[int]) -> list[str]:
     if not stub.endswith("/"):
         stub = stub + "/"
     for i in values:
+        if type(i) is str and not i.isdigit():
+            if catalog is None:
+                raise ValueError("A catalog is required to resolve layer {}.".format(i))
+            name = i
+            i = catalog.layer_id(stub, name)
+            if i is None:
+                raise ValueError("Layer {} not found in {}.".format(name, stub))
         urls.append(stub + str(i))
     return urls
+
+
+def open_workbook(path, mode: str = "r"):
+    """
+    Open the .csv workbook at *path* as a text file, compressing or decompressing it according to the file extension.  Workbooks ending in ".gz" use gzip and workbooks ending in ".zst" use Zstandard, which requires the *zstandard* package.
+
+    :param path: File path of the workbook.
+    :type path: str
+    :param mode: "r" to read or "w" to write.
+    :type mode: str
+    :return: A file object for the workbook.
+    :rtype: io.TextIOBase
+    """
+    match PurePath(path).suffix:
+        case ".gz":
+            return gzip.open(path, mode + "t", encoding="utf-8", newline="")
+        case ".zst":
+            try:
+                import zstandard
+            except ImportError:
+                logging.warn("The zstandard package is required for .zst workbooks.")
+                raise
+            return zstandard.open(path, mode + "t", encoding="utf-8", newline="")
+        case _:
+            return open(path, mode, encoding="utf-8", newline="")
+
+
+def workbook_name(path) -> str:
+    """
+    Return the name of the workbook at *path*, without the ".csv" extension or any compression extension.
+
+    :param path: File path of the workbook.
+    :type path: str
+    :return: The workbook name.
+    :rtype: str
+    """
+    name = PurePath(path).name
+    for suffix in [".gz", ".zst", ".csv"]:
+        name = name.removesuffix(suffix)
+    return name
+
+
+def workbook_file(name: str, compression: str | None = None) -> str:
+    """
+    Return the file name of a workbook called *name*, compressed using *compression*.
+
+    :param name: The workbook name.
+    :type name: str
+    :param compression: "gz", "zst" or None for an uncompressed workbook.
+    :type compression: str
+    :return: The workbook file name, such as "name.csv" or "name.csv.gz".
+    :rtype: str
+    """
+    if compression is None:
+        return "{}.csv".format(name)
+    return "{}.csv.{}".format(name, compression.lstrip("."))
+
+
+def definition_hash(definition: dict) -> str:
+    """
+    Compute a hash of the operational layers and search settings in a web map *definition*.  Layer ids are generated randomly on each build, so they are replaced by their order of appearance before hashing, and two definitions with the same content produce the same hash.
+
+    :param definition: The JSON definition of a web map.
+    :type definition: dict
+    :return: The hexadecimal SHA-256 digest of the definition.
+    :rtype: str
+    """
+    ids = {}
+
+    def walk(layers: list) -> list:
+        res = []
+        for layer in layers:
+            if type(layer) is dict:
+                layer = dict(layer)
+                if "id" in layer:
+                    layer["id"] = ids.setdefault(
+                        layer["id"], "layer-{}".format(len(ids))
+                    )
+                if type(layer.get("layers")) is list:
+                    layer["layers"] = walk(layer["layers"])
+            res.append(layer)
+        return res
+
+    layers = walk(definition.get("operationalLayers", []))
+    search = dict(
+        definition.get("applicationProperties", {}).get("viewing", {}).get("search", {})
+    )
+    entries = []
+    for entry in search.get("layers", []):
+        entry = dict(entry)
+        if "id" in entry:
+            entry["id"] = ids.get(entry["id"], entry["id"])
+        entries.append(entry)
+    search.update({"layers": entries})
+    return content_hash({"operationalLayers": layers, "search": search})
+
+
+def content_hash(value) -> str:
+    """
+    Compute a hash of *value*, which may be any combination of dictionaries, lists and scalars.  Keys are sorted, so dictionaries with the same content produce the same hash.  Values that are not JSON types, such as UUIDs, are hashed by their string representation.
+
+    :param value: The value to hash.
+    :return: The hexadecimal SHA-256 digest of *value*.
+    :rtype: str
+    """
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+async def gather_limited(calls: list, limit: int = 8) -> list:
+    """
+    Await the coroutines returned by *calls*, running at most *limit* of them at the same time.
+
+    :param calls: A list of functions taking no arguments that each return an awaitable.
+    :type calls: list
+    :param limit: Maximum number of awaitables to run concurrently.
+    :type limit: int
+    :return: The results of the awaitables, in the same order as *calls*.
+    :rtype: list
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(call):
+        async with semaphore:
+            return await call()
+
+    return await asyncio.gather(*[run(call) for call in calls])
@@ -0,0 +1,327 @@
+from dataclasses import dataclass
+from pathlib import Path
+from mapmakers.graph import BuildGraph
+from mapmakers.template import Template, TemplateItem, Templates
+import logging
+import time
+
+
+class TemplateRecorder(dict):
+    """
+    The ``TemplateRecorder`` class is a dictionary of templates that records the names of the templates looked up in it, so that a ``Watcher`` learns which templates each builder uses.
+    """
+
+    def __init__(self, templates: dict):
+        super().__init__(templates)
+        self.used = set()
+
+    def __getitem__(self, key):
+        self.used.add(key)
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.used.add(key)
+        return super().get(key, default)
+
+
+def row(item: TemplateItem) -> tuple:
+    """
+    Return the workbook columns of *item* as a tuple, used to detect changed rows.
+
+    :param item: The template item.
+    :type item: TemplateItem
+    :return: A tuple of the title, group, name, layer definition, popup info, url, search fields and id of *item*.
+    :rtype: tuple
+    """
+    return (
+        item.title,
+        item.group_name,
+        item.item_name,
+        item.layer_definition,
+        item.popup_info,
+        item.url,
+        item.search,
+        str(item.id),
+    )
+
+
+@dataclass
+class Watcher:
+    """
+    The ``Watcher`` class polls template workbooks for changes.  When a workbook changes, only the rows that differ are replaced, only the builders that use the changed templates are run again, and the map is republished.  Builders are rerun whole, so every group a rerun builder makes is built again unless the builder passes a ``GroupCache`` to *Items.group* and *Layers.group*, in which case only the groups holding changed rows are rebuilt.
+    """
+
+    _paths: list[Path]
+    _builders: dict
+    _publish: object
+    _interval: float
+    _debounce: float
+    _templates: Templates
+    _stamps: dict[Path, tuple]
+    _results: dict
+    _uses: dict[str, set[str]]
+    _sources: dict[Path, set[str]]
+
+    __slots__ = (
+        "_paths",
+        "_builders",
+        "_publish",
+        "_interval",
+        "_debounce",
+        "_templates",
+        "_stamps",
+        "_results",
+        "_uses",
+        "_sources",
+    )
+
+    def __init__(
+        self,
+        paths: list[str],
+        builders: dict,
+        publish,
+        interval: float = 1,
+        debounce: float = 0.5,
+    ):
+        """
+        Creates a new ``Watcher``, reading the workbooks at *paths* and running every builder once.
+
+        :param paths: The workbook files to watch.  A directory watches every workbook in it.
+        :type paths: list[str]
+        :param builders: A dictionary with builder names as keys and functions as values.  Each function is called with the templates and returns a group or layers.  The map is assembled from the results in the order of the dictionary.
+        :type builders: dict
+        :param publish: A function called with the list of layers after each rebuild, such as one building a ``Map`` for the target web map.
+        :type publish: function
+        :param interval: Seconds between checks for changes.
+        :type interval: float
+        :param debounce: Seconds without further changes to wait before rebuilding, so that a save touching several files triggers one rebuild.
+        :type debounce: float
+        :return: Returns the newly created ``Watcher``.
+        :rtype: Watcher
+        """
+        if type(paths) is str:
+            paths = [paths]
+        self._paths = []
+        for path in paths:
+            path = Path(path)
+            if path.is_dir():
+                self._paths.extend(sorted(path.glob("*.csv*")))
+            else:
+                self._paths.append(path)
+        self._builders = builders
+        self._publish = publish
+        self._interval = interval
+        self._debounce = debounce
+        self._templates = Templates()
+        self._stamps = {}
+        self._results = {}
+        self._uses = {}
+        self._sources = {}
+        self.poll()
+        self.update(self._paths)
+        self.rebuild(list(self._builders))
+
+    @staticmethod
+    def stamp(path: Path) -> tuple | None:
+        """
+        The *stamp* method returns the modification time and size of the file at *path*, or None if it is missing.
+
+        :param path: The file path.
+        :type path: pathlib.Path
+        :return: A tuple of the modification time and size.
+        :rtype: tuple | None
+        """
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def poll(self) -> list[Path]:
+        """
+        The *poll* method returns the watched files that have changed since the last poll.
+
+        :return: A list of changed file paths.
+        :rtype: list[pathlib.Path]
+        """
+        changed = []
+        for path in self._paths:
+            stamp = Watcher.stamp(path)
+            if stamp != self._stamps.get(path):
+                self._stamps.update({path: stamp})
+                changed.append(path)
+        return changed
+
+    def update(self, paths: list[Path]) -> set[str]:
+        """
+        The *update* method reads the workbooks at *paths* and merges them into the templates, keeping the existing ``TemplateItem`` for every row that has not changed.  Templates no longer in their workbook, or whose workbook was removed, are dropped.
+
+        :param paths: The workbooks to read.
+        :type paths: list[pathlib.Path]
+        :return: The names of the templates that changed or were dropped.
+        :rtype: set[str]
+        """
+        changed = set()
+        for path in paths:
+            if not path.is_file():
+                logging.warn("Workbook %s is missing.", path)
+                changed.update(self.drop(path, set()))
+                continue
+            try:
+                templates = Templates.from_workbook(str(path))
+            except Exception as e:
+                # an editor may still be writing the file
+                logging.warn("Unable to read %s: %s", path, e)
+                self._stamps.pop(path, None)
+                continue
+            changed.update(self.drop(path, set(templates.template)))
+            for name, template in templates.template.items():
+                current = self._templates.template.get(name)
+                if current is None:
+                    self._templates.add(template)
+                    changed.add(name)
+                    continue
+                merged = Template(name, current.id)
+                rows = 0
+                for key, item in template.items.items():
+                    old = current.items.get(key)
+                    if old is not None and row(old) == row(item):
+                        merged.items.update({key: old})
+                    else:
+                        merged.items.update({key: item})
+                        rows += 1
+                rows += len(set(current.items) - set(template.items))
+                if rows > 0:
+                    logging.info("Template %s: %s rows changed.", name, rows)
+                    self._templates.add(merged)
+                    changed.add(name)
+        return changed
+
+    def drop(self, path: Path, names: set[str]) -> set[str]:
+        """
+        The *drop* method is an internal library function that records *names* as the templates read from *path*, and removes the templates previously read from *path* that are no longer among them.  Called by *update*.
+
+        :param path: The workbook path.
+        :type path: pathlib.Path
+        :param names: Names of the templates now in the workbook.
+        :type names: set[str]
+        :return: The names of the removed templates.
+        :rtype: set[str]
+        """
+        removed = self._sources.get(path, set()) - names
+        self._sources.update({path: names})
+        # a template moved to another watched workbook is still in use
+        removed -= set().union(*self._sources.values())
+        for name in removed:
+            logging.info("Template %s removed.", name)
+            self._templates.template.pop(name, None)
+        return removed
+
+    def affected(self, names: set[str]) -> list[str]:
+        """
+        The *affected* method returns the builders that used any of the templates in *names* when they last ran.  Changes are tracked per builder and template, not per group.
+
+        :param names: Names of changed templates.
+        :type names: set[str]
+        :return: A list of builder names.
+        :rtype: list[str]
+        """
+        return [
+            builder
+            for builder in self._builders
+            if builder not in self._uses or self._uses[builder] & names
+        ]
+
+    def run_builder(self, name: str):
+        """
+        The *run_builder* method is an internal library function that runs the builder *name*, recording the templates it uses.  Called by *rebuild*.
+
+        :param name: The builder name.
+        :type name: str
+        :return: A tuple of the builder result and the names of the templates used, or None if the builder failed.
+        :rtype: tuple | None
+        """
+        templates = Templates()
+        templates._template = TemplateRecorder(self._templates.template)
+        try:
+            result = self._builders[name](templates)
+        except Exception as e:
+            logging.warn("Builder %s failed: %s", name, e)
+            return None
+        return result, templates._template.used
+
+    def rebuild(self, builders: list[str]):
+        """
+        The *rebuild* method runs the builders in *builders* side by side, keeping the results of the other builders.  A builder that fails keeps its previous result, and is run again on the next change.
+
+        :param builders: The builders to run.
+        :type builders: list[str]
+        :return: Modifies self as a side effect.
+        :rtype: NoneType
+        """
+        graph = BuildGraph()
+        for name in builders:
+            graph.add(name, self.run_builder, name)
+        for name, outcome in graph.run().items():
+            if outcome is None:
+                # forget the templates used, so that any change runs the builder again
+                self._uses.pop(name, None)
+                continue
+            result, used = outcome
+            self._results.update({name: result})
+            self._uses.update({name: used})
+        logging.info("Rebuilt %s.", ", ".join(builders))
+
+    def check(self) -> bool:
+        """
+        The *check* method polls for changes and, once the files have been quiet for *debounce* seconds, rebuilds the affected builders and publishes the result.
+
+        :return: Boolean indicating whether the map was rebuilt.
+        :rtype: bool
+        """
+        changed = self.poll()
+        if len(changed) == 0:
+            return False
+        while True:
+            time.sleep(self._debounce)
+            more = self.poll()
+            if len(more) == 0:
+                break
+            changed.extend(path for path in more if path not in changed)
+        names = self.update(changed)
+        builders = self.affected(names)
+        if len(builders) == 0:
+            logging.info("No builders use the changed rows.")
+            return False
+        self.rebuild(builders)
+        self._publish(self.layers)
+        return True
+
+    def watch(self):
+        """
+        The *watch* method checks for changes every *interval* seconds until the process is interrupted.
+
+        :return: Rebuilds and publishes the map as a side effect.
+        :rtype: NoneType
+        """
+        logging.info("Watching %s workbooks.", len(self._paths))
+        try:
+            while True:
+                self.check()
+                time.sleep(self._interval)
+        except KeyboardInterrupt:
+            logging.info("Stopped watching.")
+
+    @property
+    def layers(self):
+        """
+        The *layers* property holds the latest result of each builder, in the order of *builders*.  Builders that have never succeeded are left out.
+        """
+        return [self._results[name] for name in self._builders if name in self._results]
+
+    @property
+    def templates(self):
+        """
+        The *templates* property holds the templates read from the watched workbooks.
+        """
+        return self._templates
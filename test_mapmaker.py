@@ -1,8 +1,10 @@
 from arcgis.gis import GIS
 import mapmakers as m
+import json
 import logging
 from examples.grants_pass.refs import *
 import pprint
+import pytest
 
 # format log messages to include time before message
 logging.basicConfig(
@@ -88,3 +90,866 @@ def test_read_template():
     lib = m.Templates()
     lib.add(tmp)
     logging.info(lib.template.keys())
+
+
+def test_catalog_expand(tmp_path, monkeypatch):
+    stub = "https://example.com/arcgis/rest/services/water/FeatureServer/"
+    metadata = {
+        "layers": [
+            {"id": 0, "name": "Hydrants", "geometryType": "esriGeometryPoint"},
+            {"id": 1, "name": "Mains", "geometryType": "esriGeometryPolyline"},
+        ],
+        "tables": [],
+    }
+    calls = []
+
+    class Response:
+        status_code = 200
+
+        def json(self):
+            return metadata
+
+    def get(url, params=None):
+        calls.append(url)
+        return Response()
+
+    monkeypatch.setattr(m.scheduler.requests, "get", get)
+    path = tmp_path / "catalog.json"
+    cat = m.Catalog(path)
+    assert cat.expand_urls(stub, ["mains", "Hydrants", 3]) == [
+        stub + "1",
+        stub + "0",
+        stub + "3",
+    ]
+    assert m.Catalog(path).layer_id(stub, "Mains") == 1
+    assert len(calls) == 1
+    with pytest.raises(ValueError):
+        cat.expand_urls(stub, ["Mains", "Valves"])
+    # concurrent misses share one cache file without tearing it
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda i: cat.fetch(stub + str(i)), range(32)))
+    assert len(json.loads(path.read_text())) == 33
+
+
+def test_item_cache(tmp_path):
+    class Handle:
+        def __init__(self, id, modified):
+            self.id = id
+            self.modified = modified
+            self.type = "Web Map"
+            self.title = id
+            self.owner = "owner"
+            self.calls = 0
+
+        def get_data(self):
+            self.calls += 1
+            return {"operationalLayers": [{"id": self.id, "title": "x" * 100}]}
+
+    first = Handle("a", 1)
+    cache = m.ItemCache(tmp_path, max_bytes=400)
+    cache.get_data(first)
+    cache.get_data(first)
+    assert first.calls == 1
+    # a new session reads the definition from disk
+    assert m.ItemCache(tmp_path).get_data(first)["operationalLayers"][0]["id"] == "a"
+    assert first.calls == 1
+    # a modified item is fetched again
+    assert m.ItemCache(tmp_path).get_data(Handle("a", 2)) is not None
+    # the least recently used definition is evicted once the cache is full
+    cache.get_data(Handle("b", 1))
+    assert not (tmp_path / "a.json").exists()
+    assert (tmp_path / "b.json").exists()
+
+    # a new session reads a fresh definition without contacting the portal
+    class Content:
+        def get(self, id):
+            raise AssertionError("portal contacted for {}".format(id))
+
+        def search(self, **kwargs):
+            raise AssertionError("portal searched")
+
+    class Stub:
+        url = "https://example.com/portal"
+        content = Content()
+
+    later = m.ItemCache(tmp_path)
+    handle = later.get(Stub(), "b", data_only=True)
+    assert type(handle) is m.CachedItem
+    assert (handle.modified, handle.type, handle.owner) == (1, "Web Map", "owner")
+    assert later.get_data(handle)["operationalLayers"][0]["id"] == "b"
+    previous = m.get_cache()
+    m.set_cache(later)
+    try:
+        assert m.Templates.resolve({"b": "b"}, Stub())["b"].type == "Web Map"
+    finally:
+        m.set_cache(previous)
+    later.ttl = 0
+    assert later.handle(Stub(), "b") is None
+
+
+def test_resolve_templates(tmp_path):
+    class Handle:
+        def __init__(self, id, type="Web Map"):
+            self.id = id
+            self.type = type
+
+    class Content:
+        def __init__(self):
+            self.queries = []
+            self.gets = []
+
+        def search(self, query, max_items, outside_org):
+            self.queries.append(query)
+            ids = [part[3:] for part in query.split(" OR ")]
+            return [items[id] for id in ids if id in items and id != "late"][:max_items]
+
+        def get(self, id):
+            self.gets.append(id)
+            return items.get(id)
+
+    class Stub:
+        url = "https://example.com/portal"
+        content = Content()
+
+    items = {id: Handle(id) for id in ["a", "b", "c", "late"]}
+    items.update({"app": Handle("app", "Web Mapping Application")})
+    templates = {
+        "a": "a",
+        "b": "b",
+        "c": "c",
+        "again": "a",
+        "late": "late",
+        "app": "app",
+        "gone": "gone",
+    }
+    previous = m.get_cache()
+    m.set_cache(m.ItemCache(tmp_path))
+    try:
+        resolved = m.Templates.resolve(templates, Stub(), chunk=2)
+    finally:
+        m.set_cache(previous)
+    assert len(Stub.content.queries) == 3
+    assert Stub.content.gets == ["late", "gone"]
+    assert sorted(resolved) == ["a", "again", "b", "c", "late"]
+    assert resolved["late"] is items["late"]
+
+
+def test_scheduler_retry():
+    class Response:
+        def __init__(self, status_code):
+            self.status_code = status_code
+            self.headers = {}
+
+    responses = [Response(429), Response(503), Response(200)]
+    scheduler = m.Scheduler(rate=100, burst=1, backoff=0.01)
+    result = scheduler.call("example.com", responses.pop, 0)
+    assert result.status_code == 200
+    counters = scheduler.counters
+    assert counters["throttled"] == 2
+    assert counters["retried"] == 2
+    assert counters["requests"] == 3
+    assert counters["failed"] == 0
+
+
+def test_scheduler_not_throttled():
+    calls = []
+
+    def fail(message):
+        calls.append(message)
+        raise RuntimeError(message)
+
+    scheduler = m.Scheduler(rate=100, burst=1, backoff=0.01)
+    for message in [
+        "Item 4290ab does not exist.",
+        "Url https://example.com/rest/services/503/FeatureServer/0 returned 404.",
+    ]:
+        with pytest.raises(RuntimeError):
+            scheduler.call("example.com", fail, message)
+    assert len(calls) == 2
+    assert scheduler.counters["retried"] == 0
+    assert m.Scheduler.throttled(RuntimeError("Error Code: 429"))
+
+
+def test_gather_limited(monkeypatch):
+    import asyncio
+    import threading
+    import time
+    from mapmakers.utils import gather_limited
+
+    active = []
+    peak = []
+
+    def call(index):
+        async def run():
+            active.append(index)
+            peak.append(len(active))
+            await asyncio.sleep(0.01 * (5 - index))
+            active.remove(index)
+            return index
+
+        return run
+
+    results = asyncio.run(gather_limited([call(i) for i in range(5)], 2))
+    assert results == [0, 1, 2, 3, 4]
+    assert max(peak) == 2
+    # templates load on worker threads, at most *limit* at a time, in input order
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    class Handle:
+        def __init__(self, id):
+            self.id = id
+
+    def load(self, gis):
+        with lock:
+            running.append(self.name)
+            peak.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.remove(self.name)
+        return self
+
+    names = ["e", "d", "c", "b", "a"]
+    monkeypatch.setattr(
+        m.Templates, "resolve", lambda t, gis: {k: Handle(v) for k, v in t.items()}
+    )
+    monkeypatch.setattr(m.Template, "load", load)
+    templates = asyncio.run(m.Templates.afrom_obj({n: n for n in names}, None, 2))
+    assert list(templates.template) == names
+    assert max(peak) == 2
+    # abuild passes its arguments through to build
+    calls = []
+    monkeypatch.setattr(m.Map, "build", lambda self, *args: calls.append(args) or True)
+    mp = m.Map("preview", [])
+    assert asyncio.run(mp.abuild(True, None, True, None, {"bytes": 1}))
+    assert calls == [(True, None, True, None, {"bytes": 1})]
+
+
+def test_compressed_workbook(tmp_path):
+    tmp = m.Template.from_workbook("examples/data/workbook_named.csv")
+    path = tmp_path / "workbook_named.csv.gz"
+    tmp.workbook(str(path), named=True)
+    read = m.Template.from_workbook(str(path))
+    assert read.name == "workbook_named"
+    assert list(read.items.keys()) == list(tmp.items.keys())
+
+
+def test_workbook_empty_cells(tmp_path):
+    import pandas
+
+    tmp = m.Template.from_workbook("examples/data/workbook_named.csv")
+    items = list(tmp.items.values())
+    items[0].title = float("nan")
+    items[1].url = None
+    path = tmp_path / "workbook.csv"
+    tmp.workbook(str(path), named=True)
+    # the rows the pandas writer produced before the workbooks were streamed
+    df = pandas.DataFrame(
+        {
+            "name": [item.item_name for item in items],
+            "title": [item.title for item in items],
+            "group": [tmp.name for item in items],
+            "id": [item.id for item in items],
+            "layer_definition": [json.dumps(item.layer_definition) for item in items],
+            "popup_info": [json.dumps(item.popup_info) for item in items],
+            "url": [item.url for item in items],
+            "search": [item.search_json() for item in items],
+        }
+    )
+    baseline = tmp_path / "baseline.csv"
+    df.to_csv(baseline, sep=",", index=False)
+    assert path.read_bytes() == baseline.read_bytes()
+    assert "nan" not in path.read_text().splitlines()[1].split(",")
+
+
+def test_template_store(tmp_path):
+    lib = m.Templates.from_workbook("examples/data/workbook_named.csv")
+    path = tmp_path / "templates.db"
+    lib.sqlite(path)
+    store = m.TemplateStore(path)
+    assert store.names() == list(lib.template.keys())
+    tmp = lib.template["missing_sidewalks"]
+    read = m.Templates.from_sqlite(path, ["missing_sidewalks"])
+    assert list(read.template["missing_sidewalks"].items) == list(tmp.items)
+    item = list(tmp.items.values())[0]
+    assert store.by_url(item.url)[0].item_name == item.item_name
+
+
+def test_from_json(tmp_path):
+    definition = {
+        "operationalLayers": [
+            {
+                "id": "parcels",
+                "title": "Parcels",
+                "layerType": "ArcGISFeatureLayer",
+                "url": "https://example.com/FeatureServer/0",
+            }
+        ],
+        "applicationProperties": {
+            "viewing": {
+                "search": {"layers": [{"id": "parcels", "field": {"name": "MAPNUM"}}]}
+            }
+        },
+    }
+    (tmp_path / "property.json").write_text(json.dumps(definition))
+    tmp = m.Template.from_json(tmp_path / "property.json")
+    assert tmp.items["property_0"].search_fields() == ["MAPNUM"]
+    lib = m.Templates.from_dir(tmp_path, workers=1)
+    assert list(lib.template.keys()) == ["property"]
+
+
+def test_offline_definition(tmp_path):
+    tmp = m.Template.from_workbook("examples/data/workbook_named.csv")
+    mp = m.Map("offline", tmp.into_items().group("Sidewalks"))
+    definition = mp.to_definition({"baseMap": {"title": "Topographic"}})
+    assert definition["baseMap"]["title"] == "Topographic"
+    assert definition["operationalLayers"][0]["layerType"] == "GroupLayer"
+    mp.write(tmp_path / "snapshot.json")
+    assert json.loads((tmp_path / "snapshot.json").read_text()) == mp.to_definition()
+
+
+def test_definition_hash(tmp_path):
+    tmp = m.Template.from_workbook("examples/data/workbook_named.csv")
+    first = m.Map("offline", tmp.into_items().group("Sidewalks")).to_definition()
+    second = m.Map("offline", tmp.into_items().group("Sidewalks")).to_definition()
+    # layer ids are random, but do not change the hash
+    assert m.definition_hash(first) == m.definition_hash(second)
+    manifest = m.Manifest(tmp_path / "manifest.json")
+    manifest.publish("target", m.definition_hash(first))
+    assert m.Manifest(tmp_path / "manifest.json").get("target") == m.definition_hash(
+        second
+    )
+
+
+def test_search_fields(tmp_path):
+    item = m.TemplateItem("title", "group", "name", None, None, None, "['A', 'B']")
+    assert item.search_fields() == ["A", "B"]
+    assert item.search_json() == '["A", "B"]'
+    item.search = '["A", {"name": "C", "exactMatch": true}]'
+    entries = item.into_search("layer")
+    assert entries[1] == {
+        "id": "layer",
+        "field": {"name": "C", "exactMatch": True, "type": "esriFieldTypeString"},
+    }
+    tmp = m.Template("search", "id")
+    tmp.items.update({"name": item})
+    tmp.workbook(tmp_path / "search.csv", named=True)
+    read = m.Template.from_workbook(tmp_path / "search.csv")
+    assert read.items["name"].search == item.search
+
+
+def test_search_registry():
+    item = m.TemplateItem("title", "group", "name", None, None, "url", ["A", "B"])
+    group = m.Items([item.into_item()]).group("Inner")
+    outer = m.Layers([], [])
+    outer.append(group)
+    outer.append(group)
+    mp = m.Map("offline", outer.group("Outer"))
+    search = mp.to_definition()["applicationProperties"]["viewing"]["search"]
+    assert [entry["field"]["name"] for entry in search["layers"]] == ["A", "B"]
+    # entries added to a nested group after linking are still found
+    group.search.append({"id": "late", "field": {"name": "C"}})
+    assert len(mp.search) == 3
+
+
+def test_into_layers():
+    tmp = m.Template.from_workbook("examples/data/workbook_named.csv")
+    urls = [item.url for item in tmp.items.values()]
+    batch = tmp.into_layers(urls, True)
+    items = m.Items.from_template(urls, tmp)
+    for item in items.items:
+        item.visible = True
+    single = items.layers()
+    strip = lambda layers: [{k: v for k, v in l.items() if k != "id"} for l in layers]
+    assert strip(batch.layers) == strip(single.layers)
+    assert tmp.into_layers(urls[:1]) is None
+    # layers do not share their definitions with the template or each other
+    batch.layers[0]["layerDefinition"]["changed"] = True
+    again = tmp.into_layers(urls)
+    assert "changed" not in again.layers[0]["layerDefinition"]
+
+
+def test_items_index(monkeypatch):
+    tmp = m.Template.from_workbook("examples/data/workbook_named.csv")
+    items = tmp.into_items()
+    first = items.items[0]
+    name = first.template.item_name
+    assert items.get(name) is first
+    assert items.get(first.url, by="url") is first
+    items.set_visible([name])
+    assert first.visible
+    items.set_urls({name: "https://example.com/0"})
+    assert items.get("https://example.com/0", by="url") is first
+    # a lookup that finds an item edited in place refreshes the index
+    title = m.Items.keys(first)["title"]
+    first.title = "Renamed"
+    assert first not in items.select([title], by="title").items
+    assert items.select(["Renamed"], by="title").items == [first]
+    # items added through the methods of Items are indexed in place
+    added = m.Item("https://example.com/added", first.template, title="Added")
+    items.insert(0, added)
+    items.append(m.Item("https://example.com/last", first.template, title="Last"))
+    assert items.get("Added", by="title") is added
+    assert items.get("Renamed", by="title") is first
+    assert items.get("Last", by="title") is items.items[-1]
+    # a lookup that misses does not rebuild the index
+    calls = []
+    reindex = m.Items.reindex
+    monkeypatch.setattr(
+        m.Items, "reindex", lambda self: calls.append(1) or reindex(self)
+    )
+    assert items.get("missing") is None
+    assert items.get("Renamed", by="title") is first
+    # set_urls keeps the indexes up to date rather than rebuilding them for each key
+    titles = [m.Items.keys(item)["title"] for item in items.items]
+    items.set_urls({title: "https://example.com/" + title for title in titles}, "title")
+    assert calls == []
+    assert items.get("https://example.com/Added", by="url") is added
+
+
+def test_frozen_items():
+    tmp = m.Template.from_workbook("examples/data/workbook_named.csv")
+    base = tmp.into_items().freeze()
+    name = base.items[0].template.item_name
+    shown = base.with_visible([name])
+    assert shown.items[0].visible and not base.items[0].visible
+    # unchanged items are shared between the variants
+    assert shown.items[1] is base.items[1]
+    moved = shown.with_url({0: "https://example.com/0"}, by="position")
+    assert moved.items[0].url == "https://example.com/0"
+    assert len(moved.without([name])) == len(base) - 1
+    assert moved.insert(0, m.Item("https://example.com/1")).items[0].url.endswith("1")
+    group = moved.group("Frozen")
+    assert group.group["layers"][0]["visibility"]
+    assert base.thaw().items[0].url == base.items[0].url
+
+
+def test_group_cache(tmp_path):
+    tmp = m.Template.from_workbook("examples/data/workbook_named.csv")
+    cache = m.GroupCache(tmp_path)
+    first = tmp.into_items().group("Sidewalks", cache=cache)
+    second = tmp.into_items().group("Sidewalks", cache=cache)
+
+    def same(a, b):
+        return m.definition_hash({"operationalLayers": [a]}) == m.definition_hash(
+            {"operationalLayers": [b]}
+        )
+
+    assert same(second.group, first.group)
+    assert cache.counters == {"hits": 1, "misses": 1}
+    # hits are copies with their own layer ids
+    ids = {layer["id"] for layer in second.group["layers"]}
+    assert ids.isdisjoint(layer["id"] for layer in first.group["layers"])
+    assert {entry["id"] for entry in second.search.entries()} <= ids
+    second.group["layers"][0]["title"] = "Changed"
+    third = tmp.into_items().group("Sidewalks", cache=cache)
+    assert third.group["layers"][0]["title"] != "Changed"
+    # a change to one item rebuilds the group
+    items = tmp.into_items()
+    items.items[0].visible = True
+    assert not same(items.group("Sidewalks", cache=cache).group, first.group)
+    # groups persist on disk across sessions
+    reread = tmp.into_items().group("Sidewalks", cache=m.GroupCache(tmp_path))
+    assert same(reread.group, first.group)
+    # layers, and groups built from layers, are reused too
+    cache = m.GroupCache()
+
+    def nested():
+        layers = tmp.into_items().layers(cache)
+        layers.append(tmp.into_items().group("Inner", False, cache=cache))
+        return layers.group("Outer", cache=cache)
+
+    outer = nested()
+    assert cache.counters == {"hits": 0, "misses": 3}
+    again = nested()
+    assert cache.counters == {"hits": 3, "misses": 3}
+    assert same(again.group, outer.group)
+    assert again.group["id"] != outer.group["id"]
+    assert again.group["layers"][0]["id"] != outer.group["layers"][0]["id"]
+
+
+def test_build_graph():
+    graph = m.BuildGraph(2, cache={})
+    graph.add("one", lambda: 1, key="one")
+    graph.add("two", lambda x: x + 1, deps=["one"])
+    graph.add("sum", lambda x, y: x + y, deps=["one", "two"])
+    assert graph.run() == {"one": 1, "two": 2, "sum": 3}
+    assert set(graph.timings) == {"one", "two", "sum"}
+    graph.add("loop", lambda x: x, deps=["loop"])
+    assert graph.run() is None
+
+
+def test_build_server():
+    import threading
+    import urllib.request
+
+    def sidewalks(t, visible=False):
+        return t.template["missing_sidewalks"].into_items().group("Sidewalks", visible)
+
+    server = m.BuildServer(
+        {"sidewalks": sidewalks},
+        lambda: m.Templates.from_workbook("examples/data/workbook_named.csv"),
+    )
+    address = server.listen(port=0).server_address
+    threading.Thread(target=server._server.serve_forever, daemon=True).start()
+    url = "http://{}:{}".format(*address)
+    body = json.dumps({"publish": False, "params": {"visible": True}}).encode()
+    with urllib.request.urlopen(url + "/build/sidewalks", body) as response:
+        result = json.loads(response.read())
+    assert result["definition"]["operationalLayers"][0]["visibility"]
+    # a map over the budget of the request is refused with the cost report
+    body = json.dumps({"publish": False, "budget": {"bytes": 1}}).encode()
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(url + "/build/sidewalks", body)
+    assert error.value.code == 409
+    assert "bytes" in json.loads(error.value.read())["report"]["exceeded"]
+    # publishing without a target is refused before the builder runs
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(url + "/build/sidewalks", b"{}")
+    assert error.value.code == 400
+    with pytest.raises(ValueError):
+        server.build("sidewalks")
+    with urllib.request.urlopen(url + "/status") as response:
+        assert json.loads(response.read())["builds"] == 2
+    server.shutdown()
+
+
+def test_watcher(tmp_path):
+    import csv
+    import os
+
+    with open("examples/data/workbook_named.csv", newline="") as f:
+        rows = list(csv.DictReader(f))[:3]
+    for row, group in zip(rows, ["one", "one", "two"]):
+        row.update({"group": group})
+    path = tmp_path / "workbook.csv"
+
+    def write(rows):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+    write(rows)
+    runs = []
+
+    def builder(name):
+        def build(t):
+            runs.append(name)
+            return t.template[name].into_items().group(name, False)
+
+        return build
+
+    published = []
+    watcher = m.Watcher(
+        str(path),
+        {"one": builder("one"), "two": builder("two")},
+        published.append,
+        debounce=0,
+    )
+    assert sorted(runs) == ["one", "two"]
+    assert not watcher.check()
+    kept = watcher.templates.template["one"].items["a"]
+    rows[2].update({"title": "Renamed"})
+    write(rows)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert watcher.check()
+    assert sorted(runs) == ["one", "two", "two"]
+    assert watcher.templates.template["one"].items["a"] is kept
+    assert published[0][1].group["layers"][0]["title"] == "Renamed"
+
+    def touch():
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    # a failing builder keeps its previous result and the watcher carries on
+    previous = watcher.layers[1]
+    rows[2].update({"title": "Broken"})
+    write(rows)
+    touch()
+    failing = {"two": lambda t: 1 / 0}
+    watcher._builders.update(failing)
+    assert watcher.check()
+    assert watcher.layers[1] is previous
+    # templates removed from the workbook are dropped
+    watcher._builders.update({"two": builder("two")})
+    write(rows[:2])
+    touch()
+    assert watcher.check()
+    assert "two" not in watcher.templates.template
+    assert watcher.layers[1] is previous
+    # removing the workbook drops its templates
+    path.unlink()
+    assert watcher.check()
+    assert watcher.templates.template == {}
+
+
+def test_trim_definition():
+    popup = {
+        "title": "{NAME}",
+        "expressionInfos": [{"name": "e", "expression": "$feature['ZONE'] + 1"}],
+        "fieldInfos": [
+            {"fieldName": "NAME", "visible": False, "isEditable": True},
+            {"fieldName": "ZONE", "visible": False},
+            {"fieldName": "OBJECTID", "visible": False},
+            {"fieldName": "SLOPE", "visible": True, "tooltip": ""},
+        ],
+    }
+    definition = {"operationalLayers": [{"title": "Layer", "popupInfo": popup}]}
+    before = json.dumps(definition)
+    trimmed, saved = m.trim_definition(definition)
+    assert json.dumps(definition) == before
+    infos = trimmed["operationalLayers"][0]["popupInfo"]["fieldInfos"]
+    assert [info["fieldName"] for info in infos] == ["NAME", "ZONE", "SLOPE"]
+    assert infos[0] == {"fieldName": "NAME", "visible": False}
+    assert saved["Layer"] > 0
+    # fields named through Arcade functions are kept, and {expression/...} names no field
+    popup = {
+        "title": "{expression/e}",
+        "expressionInfos": [
+            {
+                "name": "e",
+                "expression": 'Expects($feature, "ZONE", "NAME"); DomainName($feature, "SLOPE")',
+            }
+        ],
+        "fieldInfos": [
+            {"fieldName": name, "visible": False}
+            for name in ["NAME", "ZONE", "SLOPE", "OBJECTID"]
+        ],
+    }
+    definition = {"operationalLayers": [{"title": "Layer", "popupInfo": popup}]}
+    trimmed, saved = m.trim_definition(definition)
+    infos = trimmed["operationalLayers"][0]["popupInfo"]["fieldInfos"]
+    assert [info["fieldName"] for info in infos] == ["NAME", "ZONE", "SLOPE"]
+    # fields charted by media infos are kept, at the top level and in media elements
+    chart = {
+        "type": "barchart",
+        "value": {"fields": ["POP", "AREA"], "normalizeField": "TOTAL"},
+    }
+    charts = {
+        "title": "{NAME}",
+        "mediaInfos": [chart],
+        "popupElements": [
+            {
+                "type": "media",
+                "mediaInfos": [
+                    {
+                        "type": "piechart",
+                        "value": {"fields": ["ZONE"], "tooltipField": "LABEL"},
+                    }
+                ],
+            }
+        ],
+        "fieldInfos": [
+            {"fieldName": name, "visible": False}
+            for name in ["NAME", "POP", "AREA", "TOTAL", "ZONE", "LABEL", "OBJECTID"]
+        ],
+    }
+    trimmed, saved = m.trim_definition(
+        {"operationalLayers": [{"title": "Chart", "popupInfo": charts}]}
+    )
+    infos = trimmed["operationalLayers"][0]["popupInfo"]["fieldInfos"]
+    assert [info["fieldName"] for info in infos] == [
+        "NAME",
+        "POP",
+        "AREA",
+        "TOTAL",
+        "ZONE",
+        "LABEL",
+    ]
+    # every hidden field is kept when the expression does not name its fields
+    for expression in ['Expects($feature, "*")', "var f = $feature; f.ZONE"]:
+        popup.update({"expressionInfos": [{"name": "e", "expression": expression}]})
+        trimmed, saved = m.trim_definition(definition)
+        infos = trimmed["operationalLayers"][0]["popupInfo"]["fieldInfos"]
+        assert len(infos) == 4
+    t = m.Templates.from_workbook("examples/data/workbook_named.csv")
+    group = t.template["missing_sidewalks"].into_items().group("Sidewalks")
+    mp = m.Map("preview", [group])
+    assert len(json.dumps(mp.to_definition(trim=True))) < len(
+        json.dumps(mp.to_definition())
+    )
+
+
+def test_assign_scales():
+    class Catalog:
+        def count(self, url):
+            return {"a": 60000, "b": 100}[url]
+
+        def layer(self, url):
+            return {"geometryType": "esriGeometryPoint"}
+
+    def feature(url, **kwargs):
+        return {"url": url, "title": url, "layerType": "ArcGISFeatureLayer", **kwargs}
+
+    definition = {
+        "operationalLayers": [
+            {"title": "Group", "layers": [feature("a"), feature("b")]},
+            feature("a", minScale=4514),
+        ]
+    }
+    before = json.dumps(definition)
+    scaled, assigned = m.assign_scales(definition, Catalog())
+    assert json.dumps(definition) == before
+    dense, sparse = scaled["operationalLayers"][0]["layers"]
+    assert dense["minScale"] == 9028
+    assert "minScale" not in sparse
+    assert scaled["operationalLayers"][1]["minScale"] == 4514
+    assert assigned == {"a": 9028}
+
+    # a tighter scale range set on the service is kept
+    class Service(Catalog):
+        def layer(self, url):
+            return {
+                "geometryType": "esriGeometryPoint",
+                "minScale": 4000,
+                "maxScale": 100,
+            }
+
+    scaled, assigned = m.assign_scales({"operationalLayers": [feature("a")]}, Service())
+    assert "minScale" not in scaled["operationalLayers"][0]
+    assert assigned == {}
+
+    class Loose(Catalog):
+        def layer(self, url):
+            return {
+                "geometryType": "esriGeometryPoint",
+                "minScale": 50000,
+                "maxScale": 100,
+            }
+
+    scaled, assigned = m.assign_scales({"operationalLayers": [feature("a")]}, Loose())
+    layer = scaled["operationalLayers"][0]
+    assert (layer["minScale"], layer["maxScale"]) == (9028, 100)
+
+
+def test_feature_reduction():
+    t = m.Templates.from_workbook("examples/data/workbook_named.csv")
+    items = t.template["missing_sidewalks"].into_items()
+    template = items.items[0].template
+    items.items[1].reduction = "binning"
+    marker = {"type": "esriSMS", "style": "esriSMSCircle", "size": 6}
+    points = m.TemplateItem(
+        "Hydrants",
+        "water",
+        "hydrants",
+        {"drawingInfo": {"renderer": {"type": "simple", "symbol": marker}}},
+        None,
+        None,
+    )
+    items.append(m.Item("https://example.com/FeatureServer/0", points))
+    group = items.group("Sidewalks", reduction="cluster")
+    layers = group.group["layers"]
+    # the group default skips layers that do not draw points
+    assert layers[0]["layerDefinition"]["featureReduction"] == "None"
+    assert layers[1]["layerDefinition"]["featureReduction"]["type"] == "binning"
+    assert layers[-1]["layerDefinition"]["featureReduction"]["type"] == "cluster"
+    assert "cluster" not in str(template.layer_definition)
+    assert items.freeze().items[1].thaw().reduction == "binning"
+
+    class Catalog:
+        def count(self, url):
+            return 10000
+
+        def layer(self, url):
+            return {"geometryType": "esriGeometryPoint"}
+
+    definition = m.Map("preview", [group]).to_definition()
+    reduced, assigned = m.assign_reduction(definition, Catalog())
+    # layers that already have a feature reduction keep it
+    assert "Hydrants" not in assigned and "Steep Slopes" not in assigned
+    plain = t.template["missing_sidewalks"].into_items().group("Sidewalks")
+    reduced, assigned = m.assign_reduction(
+        m.Map("preview", [plain]).to_definition(), Catalog()
+    )
+    assert set(assigned.values()) == {"cluster"}
+    assert "cluster" not in str(template.layer_definition)
+
+
+def test_cost_report():
+    def layer(url, visible):
+        return {"url": url, "title": url, "visibility": visible}
+
+    water = "https://one.example.com/arcgis/rest/services/water/FeatureServer/"
+    sewer = "https://two.example.com/arcgis/rest/services/sewer/MapServer/"
+    layers = [
+        {
+            "title": "Utilities",
+            "layerType": "GroupLayer",
+            "visibility": True,
+            "layers": [layer(water + "0", True), layer(water + "1", True)],
+        },
+        {
+            "title": "Hidden",
+            "layerType": "GroupLayer",
+            "visibility": False,
+            "layers": [layer(sewer + "0", True)],
+        },
+        layer(sewer + "1", True),
+    ]
+    mp = m.Map("preview", layers)
+    report = mp.cost_report({"visible": 2, "hosts": 2})
+    assert report["layers"] == 4
+    assert report["visible"] == 3
+    assert report["services"] == 2
+    assert report["hosts"] == 2
+    assert report["requests"] == 5
+    assert list(report["groups"]) == ["Utilities", "Hidden", sewer + "1"]
+    assert report["exceeded"] == ["visible"]
+    with pytest.raises(m.BudgetExceeded) as error:
+        mp.build(budget={"visible": 2})
+    assert error.value.report["exceeded"] == ["visible"]
+    # the budget applies to the definition that would be published
+    hidden = [{"fieldName": str(i), "visible": False} for i in range(50)]
+    mp = m.Map(
+        "preview", [dict(layer(water + "0", True), popupInfo={"fieldInfos": hidden})]
+    )
+    trimmed = m.load_cost(mp.to_definition(trim=True))["bytes"]
+    assert not mp.build(trim=True, budget={"bytes": trimmed})
+
+
+def test_check_search():
+    url = "https://example.com/arcgis/rest/services/parcels/FeatureServer/0"
+    metadata = {
+        "fields": [
+            {"name": "MAPNUM", "type": "esriFieldTypeString"},
+            {"name": "OWNER", "type": "esriFieldTypeString"},
+            {"name": "ACRES", "type": "esriFieldTypeDouble"},
+        ],
+        "indexes": [{"name": "idx", "fields": "MAPNUM,ACRES"}],
+    }
+
+    class Catalog:
+        def layer(self, url):
+            return metadata
+
+    def entry(name):
+        return {
+            "id": "parcels",
+            "field": {"name": name, "exactMatch": False, "type": "esriFieldTypeString"},
+        }
+
+    entries = [entry("MAPNUM"), entry("OWNER"), entry("ACRES"), entry("GONE")]
+    mp = m.Map("preview", [{"id": "parcels", "url": url, "title": "Parcels"}])
+    mp.search.extend(entries)
+    issues = mp.check_search(Catalog(), drop=True, exact=True)
+    assert issues == {"parcels.OWNER": "unindexed", "parcels.GONE": "missing"}
+    fields = [entry["field"] for entry in mp.search.entries()]
+    assert [field["name"] for field in fields] == ["MAPNUM", "ACRES"]
+    assert all(field["exactMatch"] for field in fields)
+    assert fields[1]["type"] == "esriFieldTypeDouble"
+    assert not entries[0]["field"]["exactMatch"]
+    # layers without field metadata are left alone, as are fields without a type
+    metadata = {"fields": [{"name": "OWNER"}]}
+    mp = m.Map("preview", [{"id": "parcels", "url": url, "title": "Parcels"}])
+    mp.search.extend([entry("OWNER")])
+    assert mp.check_search(Catalog(), drop=True) == {}
+    assert mp.search.entries()[0]["field"] == entry("OWNER")["field"]
+    metadata = {"currentVersion": 11}
+    mp.search.extend([entry("MAPNUM")])
+    assert mp.check_search(Catalog(), drop=True) == {}
+    assert len(mp.search.entries()) == 2